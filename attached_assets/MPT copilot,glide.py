@@ -2,6 +2,11 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import yfinance as yf
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+from monte_carlo import simulate_portfolios
 
 # List your 6 symbols manually; ensure the first two are safe assets (e.g., bond ETFs)
 symbols = [
@@ -75,43 +80,43 @@ current_horizon = 5          # current remaining investment horizon in years
 target_safe_allocation = (max_investment_horizon - current_horizon) / max_investment_horizon
 glide_penalty_factor = 10
 
-# Set up arrays to hold results
-results = np.zeros((4, num_portfolios))
-weights_record = []
-
-for i in range(num_portfolios):
-    # Generate random weights for 6 assets
-    weights = np.random.random(num_assets)
-    weights /= np.sum(weights)
-    
-    # Calculate portfolio return and volatility
-    portfolio_return = np.dot(weights, mean_returns)
-    portfolio_stddev = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-    
-    # Calculate safe allocation as the sum of allocations for the first two assets
-    safe_allocation = weights[0] + weights[1]
-    
-    # Penalize if safe allocation is below the target safe allocation
-    penalty = glide_penalty_factor * max(0, target_safe_allocation - safe_allocation)**2
-    
-    # Updated utility function
-    utility = portfolio_return - 0.5 * A * portfolio_stddev**2 - penalty
-    
-    # Store results: [Return, Volatility, Sharpe Ratio, Utility]
-    results[0, i] = portfolio_return
-    results[1, i] = portfolio_stddev
-    results[2, i] = portfolio_return / portfolio_stddev  # Sharpe Ratio
-    results[3, i] = utility
-    
-    weights_record.append(weights)
-
-# Convert results to a DataFrame
-results_frame = pd.DataFrame(results.T, columns=['Return', 'Volatility', 'Sharpe Ratio', 'Utility'])
+# Simulation engine settings
+plot_sample_size = 20000  # points drawn on the scatter plot
+seed = None               # set an integer for reproducible runs
+num_processes = 1         # >1 shards batches across processes
+
+# Score portfolios in fixed-size batches; only the best portfolio and a
+# bounded sample of points for the scatter plot are kept in memory
+simulation = simulate_portfolios(
+    mean_returns.values,
+    cov_matrix.values,
+    A,
+    target_safe_allocation,
+    safe_assets=[0, 1],
+    num_portfolios=num_portfolios,
+    penalty_factor=glide_penalty_factor,
+    sample_size=plot_sample_size,
+    seed=seed,
+    processes=num_processes
+)
+
+# Sampled points for plotting
+results_frame = pd.DataFrame({
+    'Return': simulation.sample['returns'],
+    'Volatility': simulation.sample['volatility'],
+    'Sharpe Ratio': simulation.sample['sharpe'],
+    'Utility': simulation.sample['utility']
+})
 
 # Locate the portfolio with the maximum utility
-max_utility_idx = results_frame['Utility'].idxmax()
-max_utility_port = results_frame.loc[max_utility_idx]
-max_utility_weights = weights_record[max_utility_idx]
+best = simulation.best
+max_utility_port = pd.Series({
+    'Return': best['returns'],
+    'Volatility': best['volatility'],
+    'Sharpe Ratio': best['sharpe'],
+    'Utility': best['utility']
+})
+max_utility_weights = best['weights']
 
 # Plot the efficient frontier
 plt.scatter(
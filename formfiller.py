@@ -1,12 +1,97 @@
-from transformers import pipeline
+from collections import OrderedDict
+import hashlib
+import os
 import re
+import threading
+import time
+
+DEFAULT_MODEL = "bert-large-uncased-whole-word-masking-finetuned-squad"
+MODEL_ALIASES = {
+    "bert-large": DEFAULT_MODEL,
+    "distilbert": "distilbert-base-cased-distilled-squad",
+}
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def get_qa_pipeline(model=None, quantize=None, threads=None):
+    """Process-wide question-answering pipeline, loaded on first use.
+
+    Defaults come from ``FORMFILLER_MODEL`` (a model id or an alias such as
+    ``distilbert``), ``FORMFILLER_QUANTIZE=1`` for dynamic int8 quantization
+    of the linear layers on CPU, and ``FORMFILLER_THREADS`` for the torch
+    thread count. Each distinct configuration is loaded once per process.
+    """
+    model = model or os.environ.get("FORMFILLER_MODEL", DEFAULT_MODEL)
+    model = MODEL_ALIASES.get(model, model)
+    if quantize is None:
+        quantize = os.environ.get("FORMFILLER_QUANTIZE") == "1"
+    if threads is None and os.environ.get("FORMFILLER_THREADS"):
+        threads = int(os.environ["FORMFILLER_THREADS"])
+
+    key = (model, bool(quantize))
+    with _pipelines_lock:
+        if key not in _pipelines:
+            from transformers import pipeline
+
+            if threads or quantize:
+                import torch
+            if threads:
+                torch.set_num_threads(threads)
+            qa = pipeline("question-answering", model=model, device=-1)
+            if quantize:
+                qa.model = torch.quantization.quantize_dynamic(qa.model, {torch.nn.Linear}, dtype=torch.qint8)
+            _pipelines[key] = qa
+        return _pipelines[key]
+
+# Window length, overlap between context windows and the longest answer
+# considered, in tokens, as in the transformers question-answering pipeline
+QA_MAX_SEQ_LEN = 384
+QA_DOC_STRIDE = 128
+QA_MAX_ANSWER_LEN = 15
+# Spans kept per window before pooling answers that read the same
+QA_CANDIDATES = 12
 
 class FinancialFormFiller:
-    def __init__(self):
-        self.qa_pipeline = pipeline(
-            "question-answering",
-            model="bert-large-uncased-whole-word-masking-finetuned-squad"
-        )
+    # Rule-based fast path: when exactly one distinct value matches, the model
+    # is skipped for that question
+    AMOUNT = r'((?:₹|rs\.?|inr)\s?\d[\d,]*)'
+    FIELD_PATTERNS = {
+        # "I am ..." is too often followed by something other than a name
+        # ("I am Very Worried"), so only an explicit introduction counts
+        "What is the full name?": [
+            r'(?i:\bmy name is) ([A-Z][a-z]+(?: [A-Z][a-z]+)+)'
+        ],
+        "What is the age?": [
+            r'(?i)\b(\d{1,3})\s*(?:years?|yrs?)[\s-]*old\b',
+            r'(?i)\bage(?:d|\s+is|:)?\s*(\d{1,3})\b'
+        ],
+        "What is the monthly income?": [
+            r'(?i)\b(?:earning|earn|salary of|income of)\s*' + AMOUNT + r'\s*(?:per month|a month|monthly|/month)'
+        ],
+        "What are the fixed monthly expenses?": [
+            r'(?i)\bfixed (?:monthly )?expenses(?: are| of| is)?(?: around| about)?\s*' + AMOUNT
+        ],
+        "What are the variable monthly expenses?": [
+            r'(?i)\bvariable (?:monthly )?expenses(?: are| of| is)?(?: around| about)?\s*' + AMOUNT
+        ],
+        "How many dependents are there?": [
+            r'(?i)\b(\d+|one|two|three|four|five|six) dependents?\b'
+        ],
+    }
+
+    def __init__(self, batch_size=16, cache_size=1024, model=None, quantize=None, threads=None):
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.model_config = (model, quantize, threads)
+        # Formatted answers per document, keyed by a hash of the text
+        self._cache = OrderedDict()
+        # Tokenized contexts per document, same keys, so a document is
+        # tokenized once however many questions it gets
+        self._contexts = OrderedDict()
+        self._question_ids = {}
+        self._template = None
+        self.stats = {"documents": 0, "fields": 0, "seconds": 0.0}
         self.form_structure = {
             "Personal Information": {
                 "Full Name": "What is the full name?",
@@ -29,13 +114,24 @@ class FinancialFormFiller:
             # Add other sections following similar structure
         }
 
+    @property
+    def qa_pipeline(self):
+        return get_qa_pipeline(*self.model_config)
+
+    def _rule_value(self, context, question):
+        """Value from the regex fast path, or None when no single confident match exists"""
+        matches = set()
+        for pattern in self.FIELD_PATTERNS.get(question, []):
+            matches.update(m.group(1).strip() for m in re.finditer(pattern, context))
+        if len(matches) != 1:
+            return None
+        return self._format_value(matches.pop())
+
     def extract_value(self, context, question):
-        try:
-            result = self.qa_pipeline(question=question, context=context)
-            value = result['answer'].strip()
-            return self._format_value(value) if value else "Nil"
-        except:
-            return "Nil"
+        value = self._rule_value(context, question)
+        if value is not None:
+            return value
+        return self._answer_batch([(context, question)])[0]
 
     def _format_value(self, value):
         # Currency formatting
@@ -46,38 +142,233 @@ class FinancialFormFiller:
                 return formatted
         return value
 
-    def process_input(self, text):
+    def _questions(self):
+        """Every model question in form order"""
+        questions = []
+        for fields in self.form_structure.values():
+            for query in fields.values():
+                if isinstance(query, list):
+                    questions.extend(item[1] for item in query if isinstance(item, tuple))
+                else:
+                    questions.append(query)
+        return questions
+
+    def _assemble(self, values):
+        """Lay answers (in ``_questions`` order) back out into form sections"""
+        values = iter(values)
         results = {}
         for section, fields in self.form_structure.items():
             section_results = {}
             for field, query in fields.items():
                 if isinstance(query, list):
-                    list_items = []
-                    for item in query:
-                        if isinstance(item, tuple):
-                            q = item[1]
-                            val = self.extract_value(text, q)
-                            list_items.append(f"{item[0]}: {val}")
+                    list_items = [f"{item[0]}: {next(values)}" for item in query if isinstance(item, tuple)]
                     section_results[field] = "\n- ".join(list_items) if list_items else "Nil"
                 else:
-                    section_results[field] = self.extract_value(text, query)
+                    section_results[field] = next(values)
             results[section] = section_results
         return results
 
+    @staticmethod
+    def _key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _pair_template(self, tokenizer):
+        """Special tokens and token types around a (question, context) pair, read off a probe encoding"""
+        if self._template is None:
+            probe = tokenizer("a", "b")
+            ids, seq = probe["input_ids"], probe.sequence_ids()
+            types = probe.get("token_type_ids") or [0] * len(ids)
+            q = [i for i, s in enumerate(seq) if s == 0]
+            c = [i for i, s in enumerate(seq) if s == 1]
+            parts = (slice(0, q[0]), slice(q[-1] + 1, c[0]), slice(c[-1] + 1, None))
+            self._template = (
+                [ids[part] for part in parts],
+                [types[part] for part in parts],
+                (types[q[0]], types[c[0]]),
+                "token_type_ids" in tokenizer.model_input_names,
+            )
+        return self._template
+
+    def _encode_context(self, text, key=None):
+        """(token ids, character offsets, character span of each token's word)
+        for a document, tokenized once and cached.
+
+        Answers are widened to whole words, as the pipeline does by default.
+        """
+        key = key or self._key(text)
+        if key in self._contexts:
+            self._contexts.move_to_end(key)
+            return self._contexts[key]
+        encoding = self.qa_pipeline.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        offsets = [tuple(offset) for offset in encoding["offset_mapping"]]
+        words = [
+            tuple(encoding.word_to_chars(word)) if word is not None else offset
+            for word, offset in zip(encoding.word_ids(), offsets)
+        ]
+        self._contexts[key] = (encoding["input_ids"], offsets, words)
+        if len(self._contexts) > self.cache_size:
+            self._contexts.popitem(last=False)
+        return self._contexts[key]
+
+    def _features(self, question, context_ids):
+        """Model inputs for one question over a tokenized context, split into
+        overlapping windows when the context does not fit"""
+        tokenizer = self.qa_pipeline.tokenizer
+        if question not in self._question_ids:
+            self._question_ids[question] = tokenizer(question, add_special_tokens=False)["input_ids"]
+        q_ids = self._question_ids[question]
+        (prefix, middle, suffix), (t_prefix, t_middle, t_suffix), (t_q, t_c), with_types = self._pair_template(tokenizer)
+        max_length = min(tokenizer.model_max_length, QA_MAX_SEQ_LEN)
+        stride = min(max_length // 2, QA_DOC_STRIDE)
+        width = max(max_length - len(q_ids) - len(prefix) - len(middle) - len(suffix), 1)
+        step = max(width - stride, 1)
+        offset = len(prefix) + len(q_ids) + len(middle)
+        # The pipeline normalizes span scores over the context plus the CLS token
+        cls = prefix.index(tokenizer.cls_token_id) if tokenizer.cls_token_id in prefix else None
+        features = []
+        for first in range(0, max(len(context_ids) - stride, 1), step):
+            window = context_ids[first:first + width]
+            input_ids = prefix + q_ids + middle + window + suffix
+            types = t_prefix + [t_q] * len(q_ids) + t_middle + [t_c] * len(window) + t_suffix
+            features.append((input_ids, types if with_types else None, cls, offset, first, len(window)))
+            if first + width >= len(context_ids):
+                break
+        return features
+
+    def _candidate_spans(self, start_logits, end_logits, cls, offset, length):
+        """Most likely (probability, first, last) answer spans among ``length`` context tokens from ``offset``"""
+        import torch
+
+        def log_probs(logits):
+            context = logits[offset:offset + length]
+            if cls is not None:
+                context = torch.cat([context, logits[cls:cls + 1]])
+            return torch.log_softmax(context, dim=0)[:length]
+
+        ones = torch.ones(length, length, dtype=torch.bool)
+        # Spans end at or after their start and are at most QA_MAX_ANSWER_LEN tokens long
+        valid = ones.triu() & ~ones.triu(QA_MAX_ANSWER_LEN)
+        scores = (log_probs(start_logits)[:, None] + log_probs(end_logits)[None, :]).masked_fill(~valid, float("-inf"))
+        top = torch.topk(scores.view(-1).exp(), min(QA_CANDIDATES, length * length))
+        return [
+            (float(p), int(i) // length, int(i) % length)
+            for p, i in zip(top.values, top.indices) if p > 0
+        ]
+
+    def _answer_batch(self, pairs, keys=None):
+        """Answer (context, question) pairs, running the model on every
+        question window in batches of ``batch_size``. Contexts come from the
+        token cache, so each document is tokenized once."""
+        if not pairs:
+            return []
+        try:
+            import torch
+
+            qa = self.qa_pipeline
+            pad_id = qa.tokenizer.pad_token_id or 0
+            features = []
+            for n, (context, question) in enumerate(pairs):
+                ids, offsets, words = self._encode_context(context, keys[n] if keys else None)
+                features.extend((n, offsets, words) + feature for feature in self._features(question, ids))
+            # Candidate spans that read the same are pooled, as the pipeline does
+            scores = [{} for _ in pairs]
+            for i in range(0, len(features), self.batch_size):
+                chunk = features[i:i + self.batch_size]
+                width = max(len(f[3]) for f in chunk)
+                inputs = {
+                    "input_ids": torch.tensor([f[3] + [pad_id] * (width - len(f[3])) for f in chunk]),
+                    "attention_mask": torch.tensor([[1] * len(f[3]) + [0] * (width - len(f[3])) for f in chunk]),
+                }
+                if chunk[0][4] is not None:
+                    inputs["token_type_ids"] = torch.tensor([f[4] + [0] * (width - len(f[4])) for f in chunk])
+                with torch.no_grad():
+                    output = qa.model(**inputs)
+                for row, (n, offsets, words, _, _, cls, offset, first, length) in enumerate(chunk):
+                    if not length:
+                        continue
+                    # A word cut by the window edge is clipped to it, as in the pipeline's per-window encodings
+                    lo, hi = offsets[first][0], offsets[first + length - 1][1]
+                    for p, a, b in self._candidate_spans(
+                        output.start_logits[row], output.end_logits[row], cls, offset, length
+                    ):
+                        text = pairs[n][0][max(words[first + a][0], lo):min(words[first + b][1], hi)]
+                        total, seen = scores[n].get(text.lower(), (0.0, text))
+                        scores[n][text.lower()] = (total + p, seen)
+        except:
+            return ["Nil"] * len(pairs)
+        answers = []
+        for candidates in scores:
+            value = max(candidates.values(), key=lambda c: c[0])[1].strip() if candidates else ""
+            answers.append(self._format_value(value) if value else "Nil")
+        return answers
+
+    def process_documents(self, texts):
+        """Fill the form for many documents in one batched run.
+
+        Fields the regex fast path can answer skip the model; every remaining
+        question of every not-yet-seen document goes through the model
+        together. Documents already answered are served from the cache, and
+        each new document is tokenized once for all of its questions.
+        """
+        start = time.perf_counter()
+        questions = self._questions()
+        answers = {}
+        pending = OrderedDict()
+        for text in texts:
+            key = self._key(text)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                answers[key] = self._cache[key]
+            elif key not in pending:
+                pending[key] = text
+
+        pairs = []
+        for key, text in pending.items():
+            answers[key] = [self._rule_value(text, q) for q in questions]
+            pairs.extend((key, i) for i, value in enumerate(answers[key]) if value is None)
+        batch = self._answer_batch([(pending[key], questions[i]) for key, i in pairs], [key for key, _ in pairs])
+        for (key, i), value in zip(pairs, batch):
+            answers[key][i] = value
+        for key in pending:
+            self._cache[key] = answers[key]
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        self.stats["documents"] += len(texts)
+        self.stats["fields"] += len(pairs)
+        self.stats["seconds"] += time.perf_counter() - start
+        return [
+            self._assemble(answers[self._key(text)])
+            for text in texts
+        ]
+
+    def throughput(self):
+        """Documents per second and model latency per field over all runs so far"""
+        seconds = self.stats["seconds"]
+        return {
+            "docs_per_sec": round(self.stats["documents"] / seconds, 2) if seconds else 0.0,
+            "per_field_ms": round(seconds / self.stats["fields"] * 1000, 2) if self.stats["fields"] else 0.0,
+        }
+
+    def process_input(self, text):
+        return self.process_documents([text])[0]
+
     def print_results(self, results):
         for section, fields in results.items():
             print(f"\n## {section}")
             for field, value in fields.items():
                 print(f"{field}: {value if value else 'Nil'}")
 
-# Usage Example
-form_filler = FinancialFormFiller()
+if __name__ == "__main__":
+    # Usage Example
+    form_filler = FinancialFormFiller()
 
-sample_input = """
+    sample_input = """
 My name is Rohan Mehta. I'm 28 years old working as a software engineer earning ₹75,000 per month. 
 I have rental income of ₹15,000 and freelance income of ₹10,000. My fixed expenses are ₹35,000 
 and variable expenses around ₹20,000. I have 2 dependents - my parents.
 """
 
-results = form_filler.process_input(sample_input)
-form_filler.print_results(results)
+    results = form_filler.process_input(sample_input)
+    form_filler.print_results(results)
+    print(form_filler.throughput())
@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import hashlib
+import argparse
+import subprocess
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import timing
+from price_store import snapshot_id
+from portfolio_optimizer import (
+    calculate_risk_metrics,
+    format_allocation,
+    get_problem,
+    load_universe,
+    safe_target,
+    select_safe_assets,
+)
+
+DEFAULT_GRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "grids")
+# Allocations move fastest at low risk aversion (roughly with 1/A), so the
+# risk axis is spaced quadratically: 0.003 apart near 0, 0.33 apart near 10
+RISK_AXIS = 10 * np.linspace(0, 1, 61) ** 2
+PERIOD_AXIS = np.linspace(0, 30, 61)
+# Largest Frank-Wolfe gap, in annual utility, accepted from an interpolated lookup
+LOOKUP_TOL = 1e-4
+
+def _solve_row(args):
+    """Solve every time period for one risk aversion value"""
+    mean_returns, cov_matrix, safe_assets, risk_aversion, periods = args
+    problem = get_problem(len(mean_returns))
+    return np.array([
+        problem.solve(mean_returns, cov_matrix, risk_aversion, safe_target(t), safe_assets)
+        for t in periods
+    ])
+
+def _locate(axis, value):
+    """Lower grid index and interpolation fraction for ``value`` on ``axis``"""
+    i = int(np.clip(np.searchsorted(axis, value, side='right') - 1, 0, len(axis) - 2))
+    return i, (value - axis[i]) / (axis[i + 1] - axis[i])
+
+class AllocationGrid:
+    """Optimal allocations solved over a (risk_aversion, time_period) grid for one price snapshot"""
+
+    def __init__(self, snapshot, symbols, risk_axis, period_axis, weights, mean_returns, cov_matrix):
+        self.snapshot = snapshot
+        self.symbols = list(symbols)
+        self.risk_axis = risk_axis
+        self.period_axis = period_axis
+        self.weights = weights
+        self.mean_returns = mean_returns
+        self.cov_matrix = cov_matrix
+        self.safe_assets = select_safe_assets(cov_matrix)
+
+        self.expected_return = weights @ mean_returns
+        self.volatility = np.sqrt(np.einsum('rti,ij,rtj->rt', weights, cov_matrix, weights))
+        self.sharpe_ratio = self.expected_return / self.volatility
+        self.stats = {"interpolated": 0, "solves": 0}
+
+    @classmethod
+    def build(cls, data, symbols, risk_axis=RISK_AXIS, period_axis=PERIOD_AXIS, processes=None):
+        """Solve the full grid, one risk aversion row per task across a process pool"""
+        mean_returns, cov_matrix = calculate_risk_metrics(data)
+        safe_assets = select_safe_assets(cov_matrix)
+        tasks = [(mean_returns, cov_matrix, safe_assets, a, period_axis) for a in risk_axis]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            weights = np.stack(list(pool.map(_solve_row, tasks)))
+        return cls(snapshot_id(data), symbols, risk_axis, period_axis, weights, mean_returns, cov_matrix)
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            snapshot=self.snapshot,
+            symbols=np.array(self.symbols),
+            risk_axis=self.risk_axis,
+            period_axis=self.period_axis,
+            weights=self.weights,
+            mean_returns=self.mean_returns,
+            cov_matrix=self.cov_matrix,
+            expected_return=self.expected_return,
+            volatility=self.volatility,
+            sharpe_ratio=self.sharpe_ratio,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(
+                str(f['snapshot']), f['symbols'].tolist(), f['risk_axis'], f['period_axis'],
+                f['weights'], f['mean_returns'], f['cov_matrix'],
+            )
+
+    def optimality_gap(self, weights, risk_aversion, time_period):
+        """Upper bound on how far ``weights`` is from the optimal utility.
+
+        This is the Frank-Wolfe gap: the linearized objective is maximized over
+        the feasible set, which has a closed form here (the target safe share
+        on the best safe asset, the rest on the best asset overall).
+        """
+        gradient = self.mean_returns - risk_aversion * (self.cov_matrix @ weights)
+        target = safe_target(time_period)
+        best = target * gradient[self.safe_assets].max() + (1 - target) * gradient.max()
+        return float(best - gradient @ weights)
+
+    def lookup_weights(self, risk_aversion, time_period, tol=LOOKUP_TOL):
+        """Interpolated weights, falling back to an exact solve when the gap exceeds ``tol``"""
+        risk_aversion, time_period = float(risk_aversion), float(time_period)
+        i, fa = _locate(self.risk_axis, risk_aversion)
+        j, ft = _locate(self.period_axis, time_period)
+        w = self.weights
+        weights = ((1 - fa) * (1 - ft) * w[i, j] + fa * (1 - ft) * w[i + 1, j]
+                   + (1 - fa) * ft * w[i, j + 1] + fa * ft * w[i + 1, j + 1])
+        if (fa or ft) and self.optimality_gap(weights, risk_aversion, time_period) > tol:
+            self.stats["solves"] += 1
+            timing.count("grid_solve")
+            return get_problem(len(self.symbols)).solve(
+                self.mean_returns, self.cov_matrix, risk_aversion, safe_target(time_period), self.safe_assets
+            )
+        self.stats["interpolated"] += 1
+        timing.count("grid_interpolated")
+        return weights
+
+    def lookup(self, risk_aversion, time_period, tol=LOOKUP_TOL):
+        weights = self.lookup_weights(risk_aversion, time_period, tol)
+        return format_allocation(self.symbols, weights, self.mean_returns, self.cov_matrix)
+
+_grids = {}
+_builder = None
+
+def _grid_path(grid_dir, symbols, snapshot):
+    """(fund-set prefix, file path) of the saved grid for ``symbols`` at ``snapshot``"""
+    family = hashlib.sha256("\x1f".join(symbols).encode()).hexdigest()[:8]
+    return family, os.path.join(grid_dir, f"{family}-{snapshot}.npz")
+
+def _load_current(path):
+    """Saved grid at ``path``, or None if there is none or it was built over other axes"""
+    try:
+        grid = AllocationGrid.load(path)
+    except FileNotFoundError:
+        return None
+    if np.array_equal(grid.risk_axis, RISK_AXIS) and np.array_equal(grid.period_axis, PERIOD_AXIS):
+        return grid
+    return None
+
+@contextmanager
+def _build_lock(grid_dir, blocking=True):
+    """Serialize grid builds across processes; yields False when not ``blocking`` and another build holds it"""
+    with open(os.path.join(grid_dir, "build.lock"), "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def build_grid(data, symbols, grid_dir=None, processes=None, blocking=True):
+    """Build and save the grid for ``data`` unless a current one is already on disk.
+
+    Returns the grid, or None when ``blocking`` is off and another process
+    is building. Saved grids for older snapshots of the same funds are
+    removed; grids for other fund sets are left alone.
+    """
+    grid_dir = grid_dir or os.environ.get("ALLOCATION_GRID_DIR", DEFAULT_GRID_DIR)
+    os.makedirs(grid_dir, exist_ok=True)
+    family, path = _grid_path(grid_dir, symbols, snapshot_id(data))
+    with _build_lock(grid_dir, blocking) as locked:
+        if not locked:
+            return None
+        grid = _load_current(path)
+        if grid is None:
+            timing.count("grid_build")
+            grid = AllocationGrid.build(data, symbols, processes=processes)
+            grid.save(path)
+        for name in os.listdir(grid_dir):
+            stale = os.path.join(grid_dir, name)
+            if name.startswith(f"{family}-") and name.endswith(".npz") and stale != path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+    return grid
+
+def _build_in_background(grid_dir):
+    """Start ``allocation_grid.py --background`` detached, unless this process already has one running"""
+    global _builder
+    if _builder is not None and _builder.poll() is None:
+        return
+    timing.count("grid_background_build")
+    _builder = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--background"],
+        env=dict(os.environ, ALLOCATION_GRID_DIR=grid_dir),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, start_new_session=True,
+    )
+
+def get_grid(data, symbols, grid_dir=None, processes=None, wait=True):
+    """Grid for the snapshot in ``data``, from memory, from disk or freshly built.
+
+    A price refresh changes the snapshot and so invalidates the table, and
+    a saved grid over different axes is rebuilt. With ``wait`` off, a
+    missing grid is built by a detached low-priority process instead and
+    None is returned, so a request can answer with a direct solve rather
+    than stall for the build.
+    """
+    grid_dir = grid_dir or os.environ.get("ALLOCATION_GRID_DIR", DEFAULT_GRID_DIR)
+    key = snapshot_id(data)
+    if key in _grids:
+        timing.count("grid_cache_hit")
+        return _grids[key]
+
+    grid = _load_current(_grid_path(grid_dir, symbols, key)[1])
+    if grid is not None:
+        timing.count("grid_disk_hit")
+    else:
+        timing.count("grid_cache_miss")
+        if not wait:
+            _build_in_background(grid_dir)
+            return None
+        grid = build_grid(data, symbols, grid_dir, processes)
+
+    _grids.clear()
+    _grids[key] = grid
+    return grid
+
+if __name__ == "__main__":
+    # Rebuild the grid for the current snapshot, e.g. after a price refresh
+    parser = argparse.ArgumentParser(description="Build the allocation grid for the current price snapshot")
+    parser.add_argument("--background", action="store_true",
+                        help="Run at low priority and exit if another build is already running")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.background:
+        os.nice(10)
+    start = time.perf_counter()
+    universe, data, _ = load_universe()
+    grid = build_grid(data, universe.symbols, processes=args.processes, blocking=not args.background)
+    if grid is None:
+        print(json.dumps({"skipped": "Another grid build is running"}))
+    else:
+        print(json.dumps({
+            "snapshot": grid.snapshot,
+            "shape": list(grid.weights.shape),
+            "seconds": round(time.perf_counter() - start, 2),
+        }))
@@ -0,0 +1,157 @@
+import os
+import io
+import random
+import asyncio
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+import timing
+from price_store import PriceSource
+
+class SymbolNotFound(LookupError):
+    """The source has no data for a symbol; retrying will not help"""
+
+class ConcurrentSource(PriceSource):
+    """Fetch each symbol separately on a shared event loop.
+
+    At most ``concurrency`` symbols are in flight at once, counting fetches
+    that timed out but whose thread is still running. Failed fetches are
+    retried with jittered exponential backoff. Concurrent calls for the same
+    (symbol, start, end) share one fetch ("single flight"), including calls
+    from different threads. Symbols that still fail are left out of the
+    result and listed in ``data.attrs["failures"]``.
+    """
+
+    def __init__(self, concurrency=8, retries=3, backoff=0.5, timeout=30):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(concurrency, thread_name_prefix="price-fetch-symbol")
+        self._inflight = {}
+        self._semaphore = None
+        self.stats = {"fetches": 0, "retries": 0, "coalesced": 0}
+
+    def fetch_symbol(self, symbol, start, end):
+        """Blocking fetch of one symbol's closes as a Series indexed by date"""
+        raise NotImplementedError
+
+    def _event_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="price-fetch", daemon=True).start()
+            return self._loop
+
+    def _release(self, thread):
+        self._semaphore.release()
+        # A fetch abandoned after its timeout still finishes; collect its error so it is not reported unretrieved
+        if not thread.cancelled():
+            thread.exception()
+
+    async def _fetch_once(self, symbol, start, end):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        await self._semaphore.acquire()
+        thread = asyncio.get_running_loop().run_in_executor(self._executor, self.fetch_symbol, symbol, start, end)
+        # The slot is held until the thread returns, not just until the wait times out
+        thread.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.shield(thread), self.timeout)
+
+    async def _fetch_with_retry(self, symbol, start, end):
+        for attempt in range(self.retries + 1):
+            self.stats["fetches"] += 1
+            try:
+                return await self._fetch_once(symbol, start, end)
+            except SymbolNotFound:
+                raise
+            except Exception:
+                if attempt == self.retries:
+                    raise
+            self.stats["retries"] += 1
+            await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def _single_flight(self, symbol, start, end):
+        key = (symbol, start, end)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.ensure_future(self._fetch_with_retry(symbol, start, end))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def fetch_async(self, symbols, start, end):
+        symbols = list(symbols)
+        results = await asyncio.gather(
+            *(self._single_flight(sym, start, end) for sym in symbols), return_exceptions=True
+        )
+        closes = {sym: r for sym, r in zip(symbols, results) if not isinstance(r, BaseException)}
+        data = pd.DataFrame(closes).sort_index() if closes else pd.DataFrame()
+        data.attrs["failures"] = {
+            sym: f"{type(r).__name__}: {r}" for sym, r in zip(symbols, results) if isinstance(r, BaseException)
+        }
+        return data
+
+    def fetch(self, symbols, start, end):
+        future = asyncio.run_coroutine_threadsafe(self.fetch_async(symbols, start, end), self._event_loop())
+        data = future.result()
+        timing.count("price_fetch_failures", len(data.attrs["failures"]))
+        return data
+
+class AsyncYahooSource(ConcurrentSource):
+    """Yahoo Finance adjusted closes, downloaded one symbol per request.
+
+    Uses ``Ticker.history`` rather than ``yf.download``, which keeps its
+    results in module-global state and is not safe to call from several
+    threads at once.
+    """
+
+    def fetch_symbol(self, symbol, start, end):
+        import yfinance as yf
+
+        history = yf.Ticker(symbol).history(start=start, end=end, auto_adjust=True)
+        if history.empty or 'Close' not in history:
+            raise ValueError(f"Empty download for {symbol}")
+        close = history['Close']
+        # Exchange-local timestamps; the store keys closes by calendar date
+        close.index = close.index.tz_localize(None).normalize()
+        return close
+
+class HttpSource(ConcurrentSource):
+    """Closes served over HTTP as ``Date,Close`` CSV, one URL per symbol.
+
+    ``url_template`` uses ``{symbol}``, ``{start}`` and ``{end}``
+    placeholders, e.g. ``http://127.0.0.1:8700/prices/{symbol}?start={start}&end={end}``.
+    A 404 marks the symbol as unknown and is not retried.
+    """
+
+    def __init__(self, url_template, **kwargs):
+        super().__init__(**kwargs)
+        self.url_template = url_template
+
+    def fetch_symbol(self, symbol, start, end):
+        url = self.url_template.format(symbol=urllib.parse.quote(symbol), start=start, end=end)
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                raise SymbolNotFound(symbol) from e
+            raise
+        frame = pd.read_csv(io.BytesIO(body), index_col='Date', parse_dates=True)
+        return frame['Close']
+
+def fetch_options():
+    """Concurrency and retry settings from ``PRICE_FETCH_CONCURRENCY`` and ``PRICE_FETCH_RETRIES``"""
+    return {
+        "concurrency": int(os.environ.get("PRICE_FETCH_CONCURRENCY", 8)),
+        "retries": int(os.environ.get("PRICE_FETCH_RETRIES", 3)),
+    }
@@ -0,0 +1,183 @@
+import sys
+import os
+import json
+import argparse
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from portfolio_optimizer import (
+    SYMBOLS,
+    fetch_financial_data,
+    get_problem,
+    safe_target,
+    select_safe_assets,
+    shrunk_risk_metrics,
+)
+
+TRADING_DAYS = 252
+
+def config_grid(risk_aversions, time_periods, rebalances=(21,), windows=(TRADING_DAYS,)):
+    """Every combination of the given parameters as backtest configs"""
+    return [
+        {"risk_aversion": float(a), "time_period": float(t), "rebalance": int(r), "window": int(w)}
+        for a, t, r, w in itertools.product(risk_aversions, time_periods, rebalances, windows)
+    ]
+
+def _solve_estimation(args):
+    """Estimate risk metrics on one trailing window and solve every profile requested on it"""
+    data, profiles = args
+    mean_returns, cov_matrix = shrunk_risk_metrics(data)
+    safe_assets = select_safe_assets(cov_matrix)
+    problem = get_problem(len(mean_returns))
+    return np.array([
+        problem.solve(mean_returns, cov_matrix, a, safe_target(t), safe_assets)
+        for a, t in profiles
+    ])
+
+class BacktestResult:
+    """Walk-forward results with one row per config.
+
+    ``equity`` and ``drawdown`` are (configs, days) arrays starting at 1 and 0
+    on the first trading day; ``turnover`` holds the one-way traded fraction of
+    the portfolio on each rebalance day; ``weights`` is (configs, days, assets)
+    holdings at each close.
+    """
+
+    def __init__(self, configs, symbols, dates, equity, drawdown, turnover, weights):
+        self.configs = configs
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.equity = equity
+        self.drawdown = drawdown
+        self.turnover = turnover
+        self.weights = weights
+
+    def summary(self):
+        """Per-config performance figures, in the units the optimizer reports"""
+        years = (len(self.dates) - 1) / TRADING_DAYS
+        daily = self.equity[:, 1:] / self.equity[:, :-1] - 1
+        annual_return = self.equity[:, -1] ** (1 / years) - 1
+        volatility = daily.std(axis=1) * np.sqrt(TRADING_DAYS)
+        sharpe = np.divide(annual_return, volatility, out=np.zeros_like(volatility), where=volatility > 0)
+        return [
+            {
+                **config,
+                'total_return': round(float(self.equity[i, -1] - 1) * 100, 2),
+                'annual_return': round(float(annual_return[i]) * 100, 2),
+                'volatility': round(float(volatility[i]) * 100, 2),
+                'sharpe_ratio': round(float(sharpe[i]), 2),
+                'max_drawdown': round(float(self.drawdown[i].min()) * 100, 2),
+                'annual_turnover': round(float(self.turnover[i].sum() / years) * 100, 2),
+            }
+            for i, config in enumerate(self.configs)
+        ]
+
+def backtest(data, configs, processes=1):
+    """Walk-forward backtest of many optimizer configs over one price matrix.
+
+    Each config is a dict with ``risk_aversion``, ``time_period``,
+    ``rebalance`` (trading days between rebalances) and ``window`` (trading
+    days of history used for each estimate). Every config starts trading on
+    the same day, once the longest window is available, so the curves line
+    up. Allocations are solved once per distinct (window, rebalance day,
+    profile); the portfolio path is then evaluated for all configs at once on
+    (configs, days, assets) arrays.
+    """
+    prices = data.values
+    n_days, n_assets = prices.shape
+    rebalance = np.array([int(c["rebalance"]) for c in configs])
+    window = np.array([int(c["window"]) for c in configs])
+    if (rebalance < 1).any() or (window < 2).any():
+        raise ValueError("rebalance must be at least 1 day and window at least 2 days")
+    start = int(window.max())
+    if start >= n_days - 1:
+        raise ValueError(f"Need more than {start + 1} days of prices, got {n_days}")
+
+    # Rebalance day in effect on every trading day, per config
+    days = np.arange(start, n_days)
+    reb_day = start + (days - start) // rebalance[:, None] * rebalance[:, None]
+
+    # Distinct solves, grouped by estimation window so each is estimated once
+    estimations = {}
+    solve_index = np.empty(reb_day.shape, dtype=int)
+    for c, config in enumerate(configs):
+        profile = (float(config["risk_aversion"]), float(config["time_period"]))
+        for day in np.unique(reb_day[c]):
+            profiles = estimations.setdefault((int(window[c]), int(day)), {})
+            profiles.setdefault(profile, len(profiles))
+
+    tasks = [
+        (data.iloc[day - w:day], list(profiles))
+        for (w, day), profiles in estimations.items()
+    ]
+    if processes == 1 or len(tasks) == 1:
+        solved = [_solve_estimation(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            solved = list(pool.map(_solve_estimation, tasks, chunksize=4))
+
+    offsets = np.cumsum([0] + [len(p) for p in estimations.values()])
+    targets = np.concatenate(solved)
+    lookup = {
+        key: {profile: offset + i for profile, i in profiles.items()}
+        for (key, profiles), offset in zip(estimations.items(), offsets)
+    }
+    for c, config in enumerate(configs):
+        profile = (float(config["risk_aversion"]), float(config["time_period"]))
+        for day in np.unique(reb_day[c]):
+            solve_index[c, reb_day[c] == day] = lookup[(int(window[c]), int(day))][profile]
+
+    # Holdings drift with prices between rebalances
+    target = targets[solve_index]                                  # (configs, days, assets)
+    relative = prices[start:] / prices[reb_day]                    # (configs, days, assets)
+    value = target * relative
+    growth = value.sum(axis=2)
+    weights = value / growth[..., None]
+
+    # Day t's return comes from the holdings of the period containing day t - 1
+    carried = target[:, :-1] * prices[start + 1:] / prices[reb_day[:, :-1]]
+    daily = carried.sum(axis=2) / growth[:, :-1]
+    equity = np.concatenate([np.ones((len(configs), 1)), np.cumprod(daily, axis=1)], axis=1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+
+    traded = np.zeros(equity.shape)
+    drifted = carried / carried.sum(axis=2, keepdims=True)
+    is_rebalance = reb_day[:, 1:] == days[1:]
+    traded[:, 1:] = np.where(is_rebalance, 0.5 * np.abs(target[:, 1:] - drifted).sum(axis=2), 0.0)
+
+    return BacktestResult(configs, data.columns, data.index[start:], equity, drawdown, traded, weights)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of optimizer allocations")
+    parser.add_argument("--risk-aversion", type=float, nargs="+", default=[2, 5, 8])
+    parser.add_argument("--time-period", type=float, nargs="+", default=[5, 15, 25])
+    parser.add_argument("--rebalance", type=int, nargs="+", default=[21, 63],
+                        help="Trading days between rebalances")
+    parser.add_argument("--window", type=int, nargs="+", default=[TRADING_DAYS],
+                        help="Trading days of history per estimate")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    for name in ("risk_aversion", "time_period"):
+        limit = 10 if name == "risk_aversion" else 30
+        if not all(0 <= v <= limit for v in getattr(args, name)):
+            print(json.dumps({"error": f"{name} must be between 0 and {limit}"}))
+            sys.exit(1)
+
+    try:
+        data = fetch_financial_data(SYMBOLS)
+        configs = config_grid(args.risk_aversion, args.time_period, args.rebalance, args.window)
+        result = backtest(data, configs, args.processes)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+    print(json.dumps({
+        "start": str(result.dates[0].date()),
+        "end": str(result.dates[-1].date()),
+        "results": result.summary(),
+    }))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from portfolio_optimizer import (
+    OBJECTIVES, load_universe, solve_allocation, solve_cvar_allocation, universe_risk_metrics
+)
+
+_inputs = {}
+
+def _init_worker(universe, data, mean_returns, cov_matrix, objective, unavailable):
+    _inputs.update(
+        universe=universe, data=data, mean_returns=mean_returns, cov_matrix=cov_matrix, objective=objective,
+        unavailable=unavailable,
+    )
+
+def _solve_chunk(keys):
+    universe = _inputs['universe']
+    results = []
+    for risk_aversion, time_period in keys:
+        try:
+            if _inputs['objective'] == "cvar":
+                result = solve_cvar_allocation(
+                    universe.symbols, _inputs['data'], _inputs['mean_returns'], _inputs['cov_matrix'],
+                    risk_aversion, time_period, universe
+                )
+            else:
+                result = solve_allocation(
+                    universe.symbols, _inputs['mean_returns'], _inputs['cov_matrix'], risk_aversion, time_period,
+                    universe
+                )
+            # Funds whose prices could not be fetched are left out of this answer
+            if _inputs['unavailable'] and "error" not in result:
+                result["unavailable"] = _inputs['unavailable']
+        except Exception as e:
+            result = {"error": str(e)}
+        results.append(((risk_aversion, time_period), result))
+    return results
+
+def _profile_key(profile):
+    """Normalized (risk_aversion, time_period) for a profile, or an error message"""
+    if not isinstance(profile, dict):
+        return None, "Profile must be a JSON object"
+    try:
+        risk_aversion = float(profile.get("risk_aversion"))
+        time_period = float(profile.get("time_period"))
+    except (TypeError, ValueError):
+        return None, "risk_aversion and time_period must be numbers"
+    if not 0 <= risk_aversion <= 10:
+        return None, "Risk aversion must be between 0 and 10"
+    if not 0 <= time_period <= 30:
+        return None, "Time period must be between 0 and 30 years"
+    return (risk_aversion, time_period), None
+
+def optimize_batch(profiles, processes=None, chunk_size=32, objective=None):
+    """Optimize a whole client book, yielding ``(profile, result)`` as solves complete.
+
+    Prices and risk metrics are loaded once for the batch, identical
+    (risk_aversion, time_period) pairs are solved once, and the distinct
+    solves are spread across a process pool in chunks. The fund universe,
+    risk model and objective are the ones ``optimize_portfolio`` uses, so a
+    profile gets the same answer either way.
+    """
+    objective = objective or os.environ.get("OPTIMIZER_OBJECTIVE", "mean_variance")
+    groups = {}
+    for profile in profiles:
+        key, error = _profile_key(profile)
+        if error:
+            yield profile, {"error": error}
+        else:
+            groups.setdefault(key, []).append(profile)
+    if not groups:
+        return
+
+    try:
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Objective must be one of: {', '.join(OBJECTIVES)}")
+        universe, data, unavailable = load_universe()
+        mean_returns, cov_matrix = universe_risk_metrics(universe, data)
+    except Exception as e:
+        for members in groups.values():
+            for profile in members:
+                yield profile, {"error": str(e)}
+        return
+
+    keys = list(groups)
+    chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+    init_args = (universe, data, mean_returns, cov_matrix, objective, unavailable)
+
+    if processes == 1 or len(chunks) == 1:
+        _init_worker(*init_args)
+        completed = (_solve_chunk(chunk) for chunk in chunks)
+        for results in completed:
+            for key, result in results:
+                for profile in groups[key]:
+                    yield profile, result
+        return
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=init_args) as pool:
+        futures = [pool.submit(_solve_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            for key, result in future.result():
+                for profile in groups[key]:
+                    yield profile, result
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Optimize many client profiles read as JSON lines from stdin"
+    )
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    profiles = []
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            profiles.append(json.loads(line))
+        except json.JSONDecodeError:
+            print(json.dumps({"client_id": None, "error": "Invalid JSON input"}), flush=True)
+
+    for profile, result in optimize_batch(profiles, args.processes, args.chunk_size):
+        client_id = profile.get("client_id") if isinstance(profile, dict) else None
+        print(json.dumps({"client_id": client_id, **result}), flush=True)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,68 @@
+"""Allocation grid lookups at random off-grid points over the recorded price fixture.
+
+Draws --lookups (risk aversion, horizon) pairs uniformly over the input
+ranges. It reports how many are answered by interpolation rather than a
+fallback solve, the mean lookup time, and the worst weight and utility
+error of the interpolated answers against an exact solve.
+
+    python3 server/benchmarks/bench_allocation_grid.py --lookups 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+os.environ["PRICE_SOURCE"] = "fixture"
+os.environ.setdefault("PRICE_STORE_PATH", os.path.join(tempfile.mkdtemp(), "prices.sqlite"))
+
+import numpy as np
+
+from allocation_grid import LOOKUP_TOL, get_grid
+from portfolio_optimizer import SYMBOLS, fetch_financial_data, get_problem, safe_target
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--tol", type=float, default=LOOKUP_TOL)
+    parser.add_argument("--grid-dir", default=None, help="Defaults to a fresh temporary directory")
+    args = parser.parse_args()
+
+    data = fetch_financial_data(SYMBOLS)
+    start = time.perf_counter()
+    grid = get_grid(data, SYMBOLS, grid_dir=args.grid_dir or tempfile.mkdtemp())
+    build_s = round(time.perf_counter() - start, 2)
+
+    rng = np.random.default_rng(0)
+    points = np.c_[rng.uniform(0, 10, args.lookups), rng.uniform(0, 30, args.lookups)]
+    start = time.perf_counter()
+    answers = [grid.lookup_weights(a, t, args.tol) for a, t in points]
+    lookup_ms = (time.perf_counter() - start) / args.lookups * 1000
+
+    utility = lambda w, a: w @ grid.mean_returns - 0.5 * a * w @ grid.cov_matrix @ w
+    weight_error = utility_loss = 0.0
+    problem = get_problem(len(SYMBOLS))
+    for (a, t), weights in zip(points, answers):
+        exact = problem.solve(grid.mean_returns, grid.cov_matrix, a, safe_target(t), grid.safe_assets)
+        weight_error = max(weight_error, float(np.abs(weights - exact).max()))
+        utility_loss = max(utility_loss, float(utility(exact, a) - utility(weights, a)))
+
+    print(json.dumps({
+        "grid_shape": list(grid.weights.shape),
+        "build_s": build_s,
+        "lookups": args.lookups,
+        "tol": args.tol,
+        "hit_rate": round(grid.stats["interpolated"] / args.lookups, 3),
+        "mean_lookup_ms": round(lookup_ms, 3),
+        "max_weight_error": round(weight_error, 5),
+        "max_utility_loss": utility_loss,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Concurrent price fetching against a local fake HTTP price server.
+
+The fake server serves random-walk closes as CSV at
+/prices/<symbol>?start=..&end=.. . Each request waits --latency seconds.
+A --failure-rate fraction of requests fail with 503, and symbols starting
+with MISSING return 404. The script then reports:
+- sequential vs concurrent fetch time;
+- how many server hits concurrent identical requests cost, which shows the
+  coalescing;
+- retries and partial results under failures;
+- whether two stores refreshing the same file share one download.
+
+    python3 server/benchmarks/bench_async_fetch.py --symbols 50 --latency 0.05
+    python3 server/benchmarks/bench_async_fetch.py --serve 8700   # just run the fake server
+"""
+import argparse
+import collections
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from async_fetch import HttpSource
+from price_store import PriceStore, RandomWalkSource
+
+START, END = "2020-01-01", "2025-02-02"
+
+
+class FakePriceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, failure_rate=0.0, seed=0):
+        super().__init__(("127.0.0.1", port), FakePriceHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.walk = RandomWalkSource(seed)
+        self.hits = collections.Counter()
+        self.bodies = {}
+        self.lock = threading.Lock()
+
+    def csv(self, symbol, start, end):
+        key = (symbol, start, end)
+        if key not in self.bodies:
+            closes = self.walk.fetch([symbol], start, end)[symbol]
+            self.bodies[key] = closes.rename("Close").to_csv(index_label="Date").encode()
+        return self.bodies[key]
+
+    @property
+    def url_template(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/prices/{{symbol}}?start={{start}}&end={{end}}"
+
+
+class FakePriceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urllib.parse.urlparse(self.path)
+        symbol = urllib.parse.unquote(url.path.rsplit("/", 1)[-1])
+        query = dict(urllib.parse.parse_qsl(url.query))
+        with server.lock:
+            server.hits[symbol] += 1
+            fail = server.rng.random() < server.failure_rate
+        time.sleep(server.latency)
+        if symbol.startswith("MISSING"):
+            return self.send_error(404)
+        if fail:
+            return self.send_error(503)
+        body = server.csv(symbol, query["start"], query["end"])
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed_fetch(source, symbols):
+    start = time.perf_counter()
+    data = source.fetch(symbols, START, END)
+    return round(time.perf_counter() - start, 3), data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--callers", type=int, default=8, help="Threads issuing the same request at once")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Only run the fake server on PORT")
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        server = FakePriceServer(args.serve, args.latency)
+        print(server.url_template, flush=True)
+        server.serve_forever()
+        return
+
+    symbols = [f"FUND{i:04d}" for i in range(args.symbols)]
+    results = {}
+
+    server = FakePriceServer(latency=args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # Warm the server's responses so the timings measure the client
+        timed_fetch(HttpSource(server.url_template, concurrency=args.concurrency), symbols)
+        seconds, _ = timed_fetch(HttpSource(server.url_template, concurrency=1), symbols)
+        results["sequential_s"] = seconds
+        seconds, _ = timed_fetch(HttpSource(server.url_template, concurrency=args.concurrency), symbols)
+        results["concurrent_s"] = seconds
+
+        server.hits.clear()
+        source = HttpSource(server.url_template, concurrency=args.concurrency)
+        callers = [threading.Thread(target=source.fetch, args=(symbols, START, END)) for _ in range(args.callers)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+        results["coalescing"] = {
+            "callers": args.callers,
+            "server_hits": sum(server.hits.values()),
+            "coalesced": source.stats["coalesced"],
+        }
+
+        server.hits.clear()
+        server.failure_rate = 0.3
+        source = HttpSource(server.url_template, concurrency=args.concurrency, backoff=0.01)
+        seconds, data = timed_fetch(source, symbols + ["MISSING1", "MISSING2"])
+        results["flaky"] = {
+            "seconds": seconds,
+            "returned": data.shape[1],
+            "retries": source.stats["retries"],
+            "failures": sorted(data.attrs["failures"]),
+        }
+        server.failure_rate = 0.0
+
+        server.hits.clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prices.sqlite")
+            PriceStore(path).close()
+            refresh = lambda: PriceStore(path, HttpSource(server.url_template, concurrency=args.concurrency)).refresh(
+                symbols, START, END
+            )
+            refreshers = [threading.Thread(target=refresh) for _ in range(2)]
+            for t in refreshers:
+                t.start()
+            for t in refreshers:
+                t.join()
+        results["shared_store_server_hits"] = sum(server.hits.values())
+    finally:
+        server.shutdown()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
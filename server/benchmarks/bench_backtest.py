@@ -0,0 +1,56 @@
+"""Walk-forward backtest wall time as the number of configs grows.
+
+Runs config grids of increasing size over the recorded price fixture (or any
+--source) and reports total time, distinct solves and time per config.
+
+    python3 server/benchmarks/bench_backtest.py --risk-levels 2 5 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from backtest import backtest, config_grid
+from price_store import PriceStore, source_from_spec
+from portfolio_optimizer import SYMBOLS, fetch_financial_data
+
+
+def load_prices(source):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, "prices.sqlite"), source_from_spec(source))
+        return fetch_financial_data(SYMBOLS, store)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="fixture", help="A PRICE_SOURCE spec")
+    parser.add_argument("--risk-levels", type=int, nargs="+", default=[2, 5, 10],
+                        help="Risk aversion values per grid; configs = levels * 5 periods * 2 rebalances * 2 windows")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+
+    data = load_prices(args.source)
+    results = {}
+    for levels in args.risk_levels:
+        configs = config_grid(
+            [10 * i / max(levels - 1, 1) for i in range(levels)],
+            [0, 7.5, 15, 22.5, 30], [21, 63], [126, 252],
+        )
+        start = time.perf_counter()
+        result = backtest(data, configs, args.processes)
+        elapsed = time.perf_counter() - start
+        results[len(configs)] = {
+            "days": len(result.dates),
+            "seconds": round(elapsed, 2),
+            "per_config_ms": round(elapsed / len(configs) * 1000, 2),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
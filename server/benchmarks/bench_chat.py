@@ -0,0 +1,89 @@
+"""Chat matcher throughput as the knowledge base grows.
+
+Builds synthetic FAQ sets of increasing size and reports index build time and
+messages per second through KnowledgeBase.match, plus end-to-end throughput of
+a resident `chat_processor.py --serve` process.
+
+    python3 server/benchmarks/bench_chat.py --sizes 4 1000 10000
+"""
+import argparse
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from chat_processor import KnowledgeBase
+
+
+def synthetic_entries(size, rng):
+    vocab = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(size * 2 + 50)]
+    return [
+        {"intent": f"intent_{i}", "keywords": rng.sample(vocab, 3), "response": f"Answer {i}"}
+        for i in range(size)
+    ], vocab
+
+
+def synthetic_queries(vocab, count, rng):
+    return [" ".join(rng.choices(vocab, k=12)) for _ in range(count)]
+
+
+def bench_in_process(size, messages, rng):
+    entries, vocab = synthetic_entries(size, rng)
+    start = time.perf_counter()
+    kb = KnowledgeBase(entries)
+    build = time.perf_counter() - start
+    queries = synthetic_queries(vocab, messages, rng)
+    start = time.perf_counter()
+    for query in queries:
+        kb.match(query)
+    elapsed = time.perf_counter() - start
+    return entries, queries, {
+        "build_ms": round(build * 1000, 2),
+        "messages_per_sec": round(messages / elapsed),
+        "per_message_us": round(elapsed / messages * 1e6, 2),
+    }
+
+
+def bench_service(entries, queries):
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(entries, f)
+    try:
+        payload = "".join(json.dumps({"id": i, "message": q}) + "\n" for i, q in enumerate(queries))
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, os.path.join(SERVER_DIR, "chat_processor.py"), "--serve"],
+            input=payload, capture_output=True, text=True, check=True,
+            env=dict(os.environ, CHAT_KB_PATH=f.name),
+        )
+        elapsed = time.perf_counter() - start
+        assert len(proc.stdout.splitlines()) == len(queries)
+        return round(len(queries) / elapsed)
+    finally:
+        os.unlink(f.name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 1000, 10000])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = {}
+    for size in args.sizes:
+        entries, queries, result = bench_in_process(size, args.messages, rng)
+        result["service_messages_per_sec"] = bench_service(entries, queries)
+        results[size] = result
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Form filler question answering: the stock pipeline vs the cached-context path.
+
+Answers every model question of the form for synthetic client notes, once
+through the transformers question-answering pipeline (which tokenizes the
+note again for each question) and once through FinancialFormFiller's batch
+path (which tokenizes each note once), and reports both timings and how many
+answers agree. Exits non-zero if any answer differs.
+
+    python3 server/benchmarks/bench_formfiller.py --model distilbert --docs 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from formfiller import FinancialFormFiller
+
+NAMES = ["Rohan Mehta", "Asha Iyer", "Vikram Rao", "Neha Kapoor", "Arjun Shah"]
+JOBS = ["a software engineer", "a teacher", "a doctor", "an accountant", "a shop owner"]
+
+
+def synthetic_note(rng, sentences):
+    facts = [
+        f"My name is {rng.choice(NAMES)}.",
+        f"I'm {rng.randint(22, 60)} years old working as {rng.choice(JOBS)}.",
+        f"I earn about ₹{rng.randint(20, 200) * 1000:,} per month.",
+        f"I have rental income of ₹{rng.randint(5, 50) * 1000:,} and freelance income of ₹{rng.randint(5, 50) * 1000:,}.",
+        f"My fixed expenses are ₹{rng.randint(10, 80) * 1000:,} and variable expenses around ₹{rng.randint(5, 40) * 1000:,}.",
+        f"I have {rng.randint(0, 4)} dependents.",
+    ]
+    filler = "We discussed goals, insurance cover and how the market has moved this year."
+    return " ".join(facts + [filler] * sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="Model id or alias (default: FORMFILLER_MODEL or the bert-large default)")
+    parser.add_argument("--docs", type=int, default=16)
+    parser.add_argument("--sentences", type=int, default=10, help="Filler sentences per note, to vary its length")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    notes = [synthetic_note(rng, args.sentences) for _ in range(args.docs)]
+    filler = FinancialFormFiller(batch_size=args.batch_size, model=args.model)
+    questions = filler._questions()
+    pairs = [(note, question) for note in notes for question in questions]
+    qa = filler.qa_pipeline
+    # Warm the model and tokenizer so neither run pays for loading them
+    qa(question=questions[0], context=notes[0])
+
+    start = time.perf_counter()
+    outputs = qa(question=[q for _, q in pairs], context=[c for c, _ in pairs], batch_size=args.batch_size)
+    pipeline_seconds = time.perf_counter() - start
+    if isinstance(outputs, dict):
+        outputs = [outputs]
+    expected = [
+        filler._format_value(output["answer"].strip()) if output["answer"].strip() else "Nil"
+        for output in outputs
+    ]
+
+    start = time.perf_counter()
+    answers = filler._answer_batch(pairs)
+    cached_seconds = time.perf_counter() - start
+
+    agree = sum(a == b for a, b in zip(answers, expected))
+    print(json.dumps({
+        "pairs": len(pairs),
+        "pipeline_s": round(pipeline_seconds, 3),
+        "cached_context_s": round(cached_seconds, 3),
+        "speedup": round(pipeline_seconds / cached_seconds, 2) if cached_seconds else None,
+        "agree": agree,
+    }, indent=2))
+    if agree != len(pairs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
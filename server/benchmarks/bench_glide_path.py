@@ -0,0 +1,86 @@
+"""Glide-path planning for many clients over the recorded price fixture.
+
+Clients get random whole-year horizons. Each starts from cash or from one
+of --models model portfolios. The script plans them all with the path
+cache on and off and reports solves, cache hits and wall time. It then
+replans a year later: every client holds the first year of its plan and
+has one year less. With the cache, that year costs no solves. Finally it
+checks that a cached tail matches a fresh solve.
+
+    python3 server/benchmarks/bench_glide_path.py --clients 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+os.environ["PRICE_SOURCE"] = "fixture"
+os.environ.setdefault("PRICE_STORE_PATH", os.path.join(tempfile.mkdtemp(), "prices.sqlite"))
+
+import numpy as np
+
+from glide_path import GlidePathPlanner, MAX_YEARS, get_planner
+
+
+def run(planner, clients):
+    start = time.perf_counter()
+    for current, horizon, risk_aversion in clients:
+        planner.plan(current, horizon, risk_aversion)
+    return round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--models", type=int, default=3, help="Distinct starting allocations besides cash")
+    parser.add_argument("--risk-levels", type=float, nargs="+", default=[2, 5, 8])
+    args = parser.parse_args()
+
+    shared = get_planner()
+    n_assets = len(shared.symbols)
+    rng = np.random.default_rng(0)
+    starts = [np.zeros(n_assets)] + list(rng.dirichlet(np.ones(n_assets), args.models))
+    clients = [
+        (starts[rng.integers(len(starts))], int(rng.integers(1, MAX_YEARS + 1)), float(rng.choice(args.risk_levels)))
+        for _ in range(args.clients)
+    ]
+    fresh = lambda cache_size: GlidePathPlanner(
+        shared.symbols, shared.mean_returns, shared.cov_matrix, np.flatnonzero(shared.safe_mask), cache_size
+    )
+
+    # Compile every horizon's problem first so both runs time solving only
+    warm = fresh(0)
+    for years in range(1, MAX_YEARS + 1):
+        warm.path(starts[0], years, args.risk_levels[0])
+
+    results = {"clients": args.clients}
+    uncached = fresh(0)
+    uncached._problems = warm._problems
+    results["uncached_s"] = run(uncached, clients)
+    results["uncached_solves"] = uncached.stats["solves"]
+
+    cached = fresh(100_000)
+    cached._problems = warm._problems
+    results["cached_s"] = run(cached, clients)
+    results["cached_solves"] = cached.stats["solves"]
+    results["cache_hits"] = cached.stats["hits"]
+
+    solves = cached.stats["solves"]
+    next_year = [(cached.path(*client)[0], client[1] - 1, client[2]) for client in clients if client[1] > 1]
+    results["replan_s"] = run(cached, next_year)
+    results["replan_solves"] = cached.stats["solves"] - solves
+
+    full = cached.path(starts[1], 20, args.risk_levels[0])
+    tail = cached.path(full[4], 15, args.risk_levels[0])
+    results["tail_vs_fresh_max_diff"] = float(np.abs(tail - fresh(0).path(full[4], 15, args.risk_levels[0])).max())
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Start-up import cost of the Python entry points, measured with -X importtime.
+
+Each module is imported in a fresh interpreter --repeat times and the median
+cumulative import time is reported together with its heaviest dependencies.
+With --baseline, exits non-zero if any module got slower than allowed.
+
+    python3 server/benchmarks/bench_import_time.py --output import_times.json
+    python3 server/benchmarks/bench_import_time.py --baseline import_times.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = [
+    "portfolio_optimizer",
+    "notportfolio_optimizer",
+    "allocation_grid",
+    "batch_optimizer",
+    "efficient_frontier",
+    "chat_processor",
+]
+
+
+def import_times(module):
+    """Cumulative import time in microseconds of ``module`` and of each of its direct imports"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+    )
+    # Children are printed before their parent, one indent level deeper
+    direct = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() != module:
+            direct = {}
+        elif depth == 1:
+            direct[name.strip()] = int(cumulative)
+        elif depth == 0:
+            return int(cumulative), direct
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def measure(module, repeat, top):
+    runs = [import_times(module) for _ in range(repeat)]
+    total = statistics.median(run[0] for run in runs)
+    deps = {name: statistics.median(run[1].get(name, 0) for run in runs) for name in runs[0][1]}
+    heaviest = sorted(deps.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "ms": round(total / 1000, 2),
+        "heaviest": {name: round(us / 1000, 2) for name, us in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.repeat, args.top) for module in args.modules}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failed = False
+        for module, result in results.items():
+            if module not in baseline:
+                continue
+            limit = baseline[module]["ms"] * (1 + args.max_regression)
+            if result["ms"] > limit:
+                print(f"REGRESSION {module}: {result['ms']}ms > {limit:.2f}ms", file=sys.stderr)
+                failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""NAV ingestion throughput on a synthetic AMFI NAVAll.txt.
+
+Writes a file shaped like AMFI's daily NAV dump: --schemes schemes under
+fund-house and category headings, plus some "N.A." rows. Then it times:
+- parsing alone;
+- parsing plus the price store write;
+- with --dsn, the full run into Postgres. A scratch ``funds`` table is
+  created when missing, with --holdings rows matching the scheme names.
+
+    python3 server/benchmarks/bench_nav_ingest.py --schemes 15000
+    python3 server/benchmarks/bench_nav_ingest.py --dsn postgresql://localhost/funds_bench
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from database import connection
+from nav_ingest import ingest, parse_navs
+from price_store import PriceStore, RandomWalkSource
+
+HEADER = "Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date\n"
+
+
+def scheme_name(code):
+    return f"Synthetic Fund {code} - Direct Plan - Growth"
+
+
+def write_nav_file(path, schemes, date="17-Oct-2025", seed=0):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write(HEADER + "\n")
+        for code in range(100000, 100000 + schemes):
+            if code % 500 == 0:
+                f.write(f"\nOpen Ended Schemes(Equity Scheme - Category {code // 500})\n\n")
+                f.write(f"Fund House {code // 500} Mutual Fund\n\n")
+            nav = "N.A." if rng.random() < 0.01 else f"{rng.uniform(10, 500):.4f}"
+            f.write(f"{code};INF{code}A01;-;{scheme_name(code)};{nav};{date}\n")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - start, 3), result
+
+
+def prepare_funds(dsn, schemes, holdings):
+    with connection(dsn) as conn, conn.cursor() as cursor:
+        cursor.execute("""CREATE TABLE IF NOT EXISTS funds (
+            id SERIAL PRIMARY KEY, client_id INTEGER, fund_name TEXT NOT NULL,
+            units DECIMAL NOT NULL, current_nav DECIMAL NOT NULL, invested_amount DECIMAL NOT NULL,
+            current_value DECIMAL NOT NULL, last_updated TIMESTAMP DEFAULT now()
+        )""")
+        cursor.execute("SELECT count(*) FROM funds")
+        if cursor.fetchone()[0] == 0:
+            rng = random.Random(1)
+            rows = [(scheme_name(100000 + rng.randrange(schemes)), rng.uniform(1, 1000)) for _ in range(holdings)]
+            cursor.executemany(
+                "INSERT INTO funds (fund_name, units, current_nav, invested_amount, current_value)"
+                " VALUES (%s, %s, 0, 0, 0)", rows
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemes", type=int, default=15000)
+    parser.add_argument("--holdings", type=int, default=50000)
+    parser.add_argument("--dsn", help="Also run the Postgres load against this database")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "NAVAll.txt")
+        write_nav_file(path, args.schemes)
+        results["file_mb"] = round(os.path.getsize(path) / 1e6, 2)
+
+        with open(path) as lines:
+            results["parse_s"], records = timed(lambda: sum(1 for _ in parse_navs(lines)))
+        results["records"] = records
+
+        store = PriceStore(os.path.join(tmp, "prices.sqlite"), RandomWalkSource())
+        with open(path) as lines:
+            results["store_s"], _ = timed(lambda: ingest(lines, store, update_funds=False))
+
+        if args.dsn:
+            prepare_funds(args.dsn, args.schemes, args.holdings)
+            with open(path) as lines:
+                results["postgres_s"], stats = timed(lambda: ingest(lines, None, args.dsn))
+            results["funds_updated"] = stats["funds_updated"]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cold vs warm latency of fetch_financial_data through the price store.
+
+    python3 server/benchmarks/bench_price_store.py --source random:0
+    python3 server/benchmarks/bench_price_store.py --source yahoo
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_store import PriceStore, source_from_spec
+from portfolio_optimizer import SYMBOLS, fetch_financial_data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="random:0", help="yahoo, csv:<path>, pickle:<path>, fixture or random:<seed>")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prices.sqlite")
+
+        store = PriceStore(path, source_from_spec(args.source))
+        start = time.perf_counter()
+        data = fetch_financial_data(SYMBOLS, store)
+        cold = time.perf_counter() - start
+        store.close()
+
+        warm = []
+        for _ in range(args.repeat):
+            # Fresh connection each time, as a new optimizer process would open
+            store = PriceStore(path, source_from_spec(args.source))
+            start = time.perf_counter()
+            fetch_financial_data(SYMBOLS, store)
+            warm.append(time.perf_counter() - start)
+            store.close()
+
+    warm.sort()
+    print(json.dumps({
+        "source": args.source,
+        "rows": len(data),
+        "cold_ms": round(cold * 1000, 2),
+        "warm_p50_ms": round(warm[len(warm) // 2] * 1000, 2),
+        "warm_max_ms": round(warm[-1] * 1000, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
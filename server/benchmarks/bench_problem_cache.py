@@ -0,0 +1,74 @@
+"""Per-solve time of the cached, parameterized problem vs rebuilding it every call.
+
+    python3 server/benchmarks/bench_problem_cache.py --source random:0
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cvxpy as cp
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_store import PriceStore, source_from_spec
+from portfolio_optimizer import SYMBOLS, calculate_risk_metrics, fetch_financial_data, solve_allocation
+
+
+def solve_rebuild(mean_returns, cov_matrix, risk_aversion, time_period):
+    """The original build-a-new-problem-per-call path"""
+    weights = cp.Variable(len(mean_returns))
+    target_safe = (30 - float(time_period)) / 30
+    safe_assets = np.sqrt(np.diag(cov_matrix)).argsort()[:2]
+    constraints = [
+        cp.sum(weights) == 1,
+        weights >= 0,
+        cp.sum(weights[safe_assets]) >= target_safe
+    ]
+    utility = mean_returns @ weights - 0.5 * float(risk_aversion) * cp.quad_form(weights, cov_matrix)
+    problem = cp.Problem(cp.Maximize(utility), constraints)
+    problem.solve()
+    return weights.value
+
+
+def timed(fn, sweep):
+    samples = []
+    for risk_aversion, time_period in sweep:
+        start = time.perf_counter()
+        fn(risk_aversion, time_period)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="random:0")
+    parser.add_argument("--points", type=int, default=11, help="Grid points per input dimension")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, "prices.sqlite"), source_from_spec(args.source))
+        mean_returns, cov_matrix = calculate_risk_metrics(fetch_financial_data(SYMBOLS, store))
+
+    sweep = [
+        (risk_aversion, time_period)
+        for risk_aversion in np.linspace(0, 10, args.points)
+        for time_period in np.linspace(0, 30, args.points)
+    ]
+    print(json.dumps({
+        "solves": len(sweep),
+        "rebuild": timed(lambda a, t: solve_rebuild(mean_returns, cov_matrix, a, t), sweep),
+        "cached": timed(lambda a, t: solve_allocation(SYMBOLS, mean_returns, cov_matrix, a, t), sweep),
+    }))
+
+
+if __name__ == "__main__":
+    main()
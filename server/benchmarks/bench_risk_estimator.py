@@ -0,0 +1,73 @@
+"""Incremental risk estimator vs batch LedoitWolf: agreement and per-bar cost.
+
+Feeds the history one bar at a time and checks the incremental estimates
+against the batch result (full history and a rolling window). Exits non-zero
+if they differ by more than --tol.
+
+    python3 server/benchmarks/bench_risk_estimator.py
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.covariance import LedoitWolf
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from portfolio_optimizer import calculate_risk_metrics
+from risk_estimator import TRADING_DAYS, RiskEstimator
+
+FIXTURE = os.path.join(SERVER_DIR, "..", "stock_data_cache.pkl")
+
+
+def relative_error(a, b):
+    return float(np.abs(a - b).max() / np.abs(b).max())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prices", default=FIXTURE, help="Pickled close-price DataFrame")
+    parser.add_argument("--window", type=int, default=250)
+    parser.add_argument("--tol", type=float, default=1e-8)
+    args = parser.parse_args()
+
+    data = pd.read_pickle(args.prices).ffill().dropna()
+    returns = np.log(data / data.shift(1)).dropna().values
+
+    start = time.perf_counter()
+    batch_mean, batch_cov = calculate_risk_metrics(data)
+    batch_seconds = time.perf_counter() - start
+
+    full = RiskEstimator(data.shape[1])
+    rolling = RiskEstimator(data.shape[1], window=args.window)
+    start = time.perf_counter()
+    for x in returns:
+        full.add_return(x)
+    per_bar_seconds = (time.perf_counter() - start) / len(returns)
+    for x in returns:
+        rolling.add_return(x)
+
+    full_mean, full_cov = full.risk_metrics()
+    window_cov = LedoitWolf().fit(returns[-args.window:]).covariance_ * TRADING_DAYS
+    errors = {
+        "mean_returns": relative_error(full_mean, batch_mean),
+        "covariance": relative_error(full_cov, batch_cov),
+        "rolling_covariance": relative_error(rolling.risk_metrics()[1], window_cov),
+    }
+    print(json.dumps({
+        "bars": len(returns),
+        "batch_ms": round(batch_seconds * 1000, 3),
+        "per_bar_update_us": round(per_bar_seconds * 1e6, 3),
+        "relative_errors": errors,
+    }))
+    if max(errors.values()) > args.tol:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Private memory per optimizer worker with and without the shared price matrix.
+
+Starts --workers processes at once for each universe size. Each process loads
+the price matrix and computes risk metrics. It then reports its unique set
+size (private pages) and its RSS.
+
+    python3 server/benchmarks/bench_shared_prices.py --sizes 6 1000 --workers 1 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from price_store import PriceStore, source_from_spec
+from portfolio_optimizer import END_DATE, START_DATE
+
+WORKER = """
+import json, sys
+from portfolio_optimizer import calculate_risk_metrics, fetch_financial_data
+from price_store import PriceStore, source_from_spec
+
+symbols = json.loads(sys.argv[1])
+store = PriceStore(sys.argv[2], source_from_spec("random:0"))
+data = fetch_financial_data(symbols, store)
+calculate_risk_metrics(data)
+
+usage = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        key, _, rest = line.partition(":")
+        if key in ("Rss", "Private_Clean", "Private_Dirty"):
+            usage[key] = int(rest.split()[0])
+print(json.dumps(usage), flush=True)
+sys.stdin.read()
+"""
+
+
+def run_workers(symbols, store_path, workers, env):
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, json.dumps(symbols), store_path],
+            cwd=SERVER_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(workers)
+    ]
+    # Every worker stays alive until all have reported, so mappings overlap
+    reports = [json.loads(proc.stdout.readline()) for proc in procs]
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+    private = [(r["Private_Clean"] + r["Private_Dirty"]) / 1024 for r in reports]
+    return {
+        "private_mb": round(max(private), 1),
+        "rss_mb": round(max(r["Rss"] for r in reports) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 1000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "prices.sqlite")
+        base_env = dict(os.environ, SHARED_PRICES_DIR=os.path.join(tmp, "matrices"))
+        base_env.pop("SHARED_PRICES", None)
+        for size in args.sizes:
+            symbols = [f"SYM{i:05d}" for i in range(size)]
+            PriceStore(store_path, source_from_spec("random:0")).refresh(symbols, START_DATE, END_DATE)
+            for workers in args.workers:
+                results[f"{size} symbols, {workers} workers"] = {
+                    "private": run_workers(symbols, store_path, workers, base_env),
+                    "shared": run_workers(symbols, store_path, workers, dict(base_env, SHARED_PRICES="1")),
+                }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""End-to-end benchmark suite over the recorded price fixture.
+
+Replays stock_data_cache.pkl through the price store in place of Yahoo and
+times the main Python paths:
+- price fetch, cold (empty store) and warm;
+- risk metrics;
+- optimize_portfolio across the parameter range, mean-variance and CVaR;
+- batch risk analytics (VaR/CVaR, contributions, drawdown) over many candidates;
+- the Monte Carlo simulator at several portfolio counts;
+- 30-year retirement projections, lognormal and block bootstrap;
+- chat query matching;
+- the one-shot optimizer CLI, started with a cold and a warm store.
+
+Every metric is a duration, so lower is better. With --baseline, the run
+exits non-zero if any metric got slower than the allowed regression.
+
+    python3 server/benchmarks/bench_suite.py --output bench.json
+    python3 server/benchmarks/bench_suite.py --baseline bench.json --max-regression 0.3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Keep runs comparable: recorded prices, no optional caches or alternate paths
+for name in ("SHARED_PRICES", "RISK_STATE_PATH", "ALLOCATION_GRID", "FUND_UNIVERSE", "OPTIMIZER_TIMING",
+             "OPTIMIZER_PROFILE_DIR", "OPTIMIZER_OBJECTIVE", "RESULT_CACHE_DIR", "RESULT_CACHE_TTL"):
+    os.environ.pop(name, None)
+os.environ["PRICE_SOURCE"] = "fixture"
+# Every optimize sample must solve, not replay an earlier answer
+os.environ["RESULT_CACHE_SIZE"] = "0"
+
+import numpy as np
+
+RISK_LEVELS = [0, 2.5, 5, 7.5, 10]
+PERIODS = [0, 7.5, 15, 22.5, 30]
+CHAT_QUERIES = [
+    "What is a mutual fund?",
+    "How should I build my portfolio?",
+    "Tell me about investment options",
+    "hello there",
+]
+
+
+def ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": ms(statistics.median(samples)),
+        "p95_ms": ms(samples[min(len(samples) - 1, int(0.95 * len(samples)))]),
+    }
+
+
+def bench_fetch(store_path, repeat):
+    from portfolio_optimizer import fetch_financial_data, SYMBOLS
+    from price_store import PriceStore, source_from_spec
+
+    store = lambda: PriceStore(store_path, source_from_spec("fixture"))
+    cold, data = timed(lambda: fetch_financial_data(SYMBOLS, store()))
+    warm = [timed(lambda: fetch_financial_data(SYMBOLS, store()))[0] for _ in range(repeat)]
+    return data, {"cold_ms": ms(cold), **{f"warm_{k}": v for k, v in summarize(warm).items()}}
+
+
+def bench_risk_metrics(data, repeat):
+    from portfolio_optimizer import calculate_risk_metrics
+
+    first, _ = timed(lambda: calculate_risk_metrics(data))
+    samples = [timed(lambda: calculate_risk_metrics(data))[0] for _ in range(repeat)]
+    return {"first_ms": ms(first), **summarize(samples)}
+
+
+def bench_optimize(objective="mean_variance"):
+    from portfolio_optimizer import optimize_portfolio
+
+    sweep = [(a, t) for a in RISK_LEVELS for t in PERIODS]
+    first, result = timed(lambda: optimize_portfolio(*sweep[0], objective=objective))
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    samples = [timed(lambda: optimize_portfolio(a, t, objective=objective))[0] for a, t in sweep[1:]]
+    return {"first_ms": ms(first), **summarize(samples), "profiles": len(sweep)}
+
+
+def bench_risk_analytics(data, counts):
+    from portfolio_optimizer import calculate_risk_metrics
+    from risk_analytics import analyze
+
+    mean_returns, cov_matrix = calculate_risk_metrics(data)
+    rng = np.random.default_rng(0)
+    results = {}
+    for count in counts:
+        weights = rng.dirichlet(np.ones(data.shape[1]), count)
+        elapsed, _ = timed(lambda: analyze(data, weights, mean_returns, cov_matrix))
+        results[f"{count}_ms"] = ms(elapsed)
+    return results
+
+
+def bench_monte_carlo(data, counts):
+    from monte_carlo import simulate_portfolios
+    from shared_prices import log_returns
+
+    returns = log_returns(data)
+    mean_returns = np.exp(returns.mean(axis=0) * 252) - 1
+    cov_matrix = np.cov(returns, rowvar=False) * 252
+    results = {}
+    for count in counts:
+        elapsed, _ = timed(lambda: simulate_portfolios(
+            mean_returns, cov_matrix, 5.0, 0.5, safe_assets=[0, 1], num_portfolios=count, seed=0
+        ))
+        results[f"{count}_ms"] = ms(elapsed)
+    return results
+
+
+def bench_projection(data, paths):
+    from portfolio_optimizer import calculate_risk_metrics
+    from projection import project
+
+    mean_returns, cov_matrix = calculate_risk_metrics(data)
+    weights = np.full(data.shape[1], 1 / data.shape[1])
+    results = {}
+    for method in ("normal", "bootstrap"):
+        elapsed, _ = timed(lambda: project(
+            weights, mean_returns, cov_matrix, 30, monthly_sip=10_000, goal=1e7,
+            paths=paths, method=method, data=data, seed=0
+        ))
+        results[f"{method}_ms"] = ms(elapsed)
+    return results
+
+
+def bench_chat(repeat):
+    from chat_processor import process_query
+
+    first, _ = timed(lambda: process_query(CHAT_QUERIES[0]))
+    samples = [timed(lambda: process_query(q))[0] for _ in range(repeat) for q in CHAT_QUERIES]
+    return {"first_ms": ms(first), **summarize(samples)}
+
+
+def bench_cli(tmp):
+    """Full one-shot ``portfolio_optimizer.py`` process with an empty and a filled store"""
+    env = dict(os.environ, PRICE_STORE_PATH=os.path.join(tmp, "cli.sqlite"))
+    run = lambda: subprocess.run(
+        [sys.executable, os.path.join(SERVER_DIR, "portfolio_optimizer.py"), "5", "10"],
+        env=env, capture_output=True, check=True,
+    )
+    cold, _ = timed(run)
+    warm, _ = timed(run)
+    return {"cold_start_ms": ms(cold), "warm_start_ms": ms(warm)}
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif key.endswith("_ms"):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--portfolios", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--projection-paths", type=int, default=100_000)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 1_000, 10_000])
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="Ignore metrics faster than this in both runs; they are mostly noise")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PRICE_STORE_PATH"] = os.path.join(tmp, "prices.sqlite")
+        data, fetch = bench_fetch(os.environ["PRICE_STORE_PATH"], args.repeat)
+        results = {
+            "fetch_financial_data": fetch,
+            "calculate_risk_metrics": bench_risk_metrics(data, args.repeat),
+            "optimize_portfolio": bench_optimize(),
+            "optimize_portfolio_cvar": bench_optimize("cvar"),
+            "risk_analytics": bench_risk_analytics(data, args.candidates),
+            "monte_carlo": bench_monte_carlo(data, args.portfolios),
+            "projection": bench_projection(data, args.projection_paths),
+            "process_query": bench_chat(args.repeat),
+            "cli": bench_cli(tmp),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = flatten(json.load(f))
+        failed = False
+        for metric, value in flatten(results).items():
+            if metric not in baseline or max(value, baseline[metric]) < args.min_ms:
+                continue
+            limit = baseline[metric] * (1 + args.max_regression)
+            if value > limit:
+                print(f"REGRESSION {metric}: {value}ms > {limit:.3f}ms", file=sys.stderr)
+                failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Solve time and peak memory of the optimizer as the fund universe grows.
+
+Each (size, model) point runs in a fresh process on random-walk prices with a
+fifth of the funds tagged as debt. It reports estimation time, the first
+solve (which includes compiling the problem), a re-solve with new inputs, and
+peak RSS. The dense model is only run up to --dense-max funds.
+
+    python3 server/benchmarks/bench_universe.py --sizes 6 100 500 2000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+
+def run_point(size, model):
+    from price_store import RandomWalkSource
+    from portfolio_optimizer import END_DATE, START_DATE, calculate_risk_metrics, solve_allocation
+    from risk_model import factor_risk_metrics
+    from universe import Universe
+
+    symbols = [f"FUND{i:05d}" for i in range(size)]
+    universe = Universe(symbols, ["debt" if i % 5 == 0 else "equity" for i in range(size)])
+    data = RandomWalkSource(0).fetch(symbols, START_DATE, END_DATE).ffill().dropna()
+
+    start = time.perf_counter()
+    if model == "factor":
+        mean_returns, cov_matrix = factor_risk_metrics(data)
+    else:
+        mean_returns, cov_matrix = calculate_risk_metrics(data, state_path=None)
+    estimate = time.perf_counter() - start
+
+    timings = []
+    for risk_aversion, time_period in [(5, 10), (3, 20)]:
+        start = time.perf_counter()
+        solve_allocation(symbols, mean_returns, cov_matrix, risk_aversion, time_period, universe)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "estimate_s": round(estimate, 3),
+        "first_solve_s": round(timings[0], 3),
+        "resolve_s": round(timings[1], 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 100, 500, 1000, 2000])
+    parser.add_argument("--dense-max", type=int, default=500)
+    parser.add_argument("--point", nargs=2, metavar=("SIZE", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.point:
+        print(json.dumps(run_point(int(args.point[0]), args.point[1])))
+        return
+
+    env = dict(os.environ)
+    env.pop("RISK_STATE_PATH", None)
+    results = {}
+    for size in args.sizes:
+        models = ["dense", "factor"] if size <= args.dense_max else ["factor"]
+        for model in models:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--point", str(size), model],
+                capture_output=True, text=True, check=True, env=env,
+            )
+            results[f"{size} {model}"] = json.loads(proc.stdout)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
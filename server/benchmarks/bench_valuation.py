@@ -0,0 +1,116 @@
+"""Bulk valuation and XIRR over synthetic client transactions.
+
+Generates --clients clients with --funds holdings each and --transactions
+BUY/SIP/SELL rows per holding over five years. It times:
+- a full revaluation (holdings, average-cost basis, per-holding and
+  per-client XIRR);
+- an incremental update after --new-transactions arrive;
+- an incremental update after a NAV change on --nav-changes holdings.
+With --check, a sample of XIRRs is compared against scipy's brentq.
+
+    python3 server/benchmarks/bench_valuation.py --clients 100000
+    python3 server/benchmarks/bench_valuation.py --clients 2000 --check
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+import numpy as np
+import pandas as pd
+
+from valuation import Ledger, Valuation
+
+AS_OF = datetime.date(2025, 10, 17)
+START = pd.Timestamp("2020-01-01")
+
+
+def synthetic_transactions(clients, funds, transactions, seed=0, client_offset=0):
+    rng = np.random.default_rng(seed)
+    holdings = clients * funds
+    fund_id = np.repeat(np.arange(holdings), transactions) + client_offset * funds
+    rows = len(fund_id)
+    kind = np.where(rng.random(rows) < 0.15, "SELL", np.where(rng.random(rows) < 0.5, "SIP", "BUY"))
+    units = rng.uniform(1, 50, rows)
+    days = rng.integers(1, 5 * 365, rows)
+    # Every holding opens with a large purchase so sales never exceed units held
+    first = np.arange(0, rows, transactions)
+    kind[first], units[first], days[first] = "BUY", 1000.0, 0
+    return pd.DataFrame({
+        "client_id": fund_id // funds,
+        "fund_id": fund_id,
+        "type": kind,
+        "units": units,
+        "amount": units * rng.uniform(10, 100, rows),
+        "date": START + pd.to_timedelta(days, unit="D"),
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - start, 3), result
+
+
+def check(valuation, frame, samples, seed=1):
+    from scipy.optimize import brentq
+
+    rng = np.random.default_rng(seed)
+    worst = 0.0
+    for fund_id in rng.choice(valuation.holdings.index, samples, replace=False):
+        rows = frame[frame["fund_id"] == fund_id]
+        sign = np.where(rows["type"] == "SELL", 1.0, -1.0)
+        flows = list(zip(pd.to_datetime(rows["date"]), sign * rows["amount"]))
+        value = valuation.holdings.loc[fund_id, "value"]
+        if value > 0:
+            flows.append((pd.Timestamp(AS_OF), value))
+        first = min(date for date, _ in flows)
+        npv = lambda r: sum(a * (1 + r) ** (-(d - first).days / 365) for d, a in flows)
+        expected = brentq(npv, -0.9999, 1000)
+        worst = max(worst, abs(expected - valuation.holdings.loc[fund_id, "xirr"]))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--funds", type=int, default=3, help="Holdings per client")
+    parser.add_argument("--transactions", type=int, default=12, help="Transactions per holding")
+    parser.add_argument("--new-transactions", type=int, default=1000)
+    parser.add_argument("--nav-changes", type=int, default=1000)
+    parser.add_argument("--check", type=int, nargs="?", const=50, default=0,
+                        help="Compare this many holding XIRRs against brentq")
+    args = parser.parse_args()
+
+    frame = synthetic_transactions(args.clients, args.funds, args.transactions)
+    rng = np.random.default_rng(2)
+    navs = pd.Series(rng.uniform(10, 100, args.clients * args.funds), index=np.arange(args.clients * args.funds))
+
+    results = {"clients": args.clients, "transactions": len(frame)}
+    results["ledger_s"], ledger = timed(lambda: Ledger.from_frame(frame))
+    results["full_revalue_s"], valuation = timed(lambda: Valuation(ledger, navs, AS_OF))
+    results["xirr_unsolved"] = int(valuation.clients["xirr"].isna().sum())
+
+    new = frame.sample(args.new_transactions, random_state=3).assign(
+        type="SIP", units=5.0, amount=250.0, date=pd.Timestamp("2025-10-01")
+    )
+    results["add_transactions_s"], recomputed = timed(lambda: valuation.add_transactions(Ledger.from_frame(new)))
+    results["add_transactions_clients"] = recomputed
+
+    changed = navs.sample(args.nav_changes, random_state=4) * 1.01
+    results["update_navs_s"], recomputed = timed(lambda: valuation.update_navs(changed))
+    results["update_navs_clients"] = recomputed
+
+    if args.check:
+        results["check_max_abs_error"] = check(Valuation(ledger, navs, AS_OF), frame, args.check)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
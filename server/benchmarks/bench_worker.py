@@ -0,0 +1,94 @@
+"""p50/p99 latency of spawn-per-request vs the resident --serve worker.
+
+    python3 server/benchmarks/bench_worker.py --clients 8 --requests 20
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(SERVER_DIR, "portfolio_optimizer.py")
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p99_ms": pick(0.99), "n": len(samples)}
+
+
+def run_clients(clients, requests, call):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(idx):
+        for i in range(requests):
+            start = time.perf_counter()
+            call(idx, (idx + i) % 11, (idx * 3 + i) % 31)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(idx,)) for idx in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return percentiles(latencies)
+
+
+def bench_spawn(clients, requests, env):
+    def call(_, risk, period):
+        subprocess.run([sys.executable, SCRIPT, str(risk), str(period)], env=env, capture_output=True, check=True)
+    return run_clients(clients, requests, call)
+
+
+def bench_socket(clients, requests, env, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "optimizer.sock")
+        server = subprocess.Popen(
+            [sys.executable, SCRIPT, "--serve", "--socket", path, "--workers", str(workers)], env=env
+        )
+        try:
+            while not os.path.exists(path):
+                time.sleep(0.05)
+
+            def call(idx, risk, period):
+                with socket.socket(socket.AF_UNIX) as sock:
+                    sock.connect(path)
+                    with sock.makefile("rw") as conn:
+                        conn.write(json.dumps({"id": idx, "risk_aversion": risk, "time_period": period}) + "\n")
+                        conn.flush()
+                        conn.readline()
+
+            return run_clients(clients, requests, call)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--source", default="random:0")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PRICE_SOURCE=args.source, PRICE_STORE_PATH=os.path.join(tmp, "prices.sqlite"))
+        # Warm the price store so both modes measure the same work
+        subprocess.run([sys.executable, SCRIPT, "5", "10"], env=env, capture_output=True, check=True)
+        print(json.dumps({
+            "spawn": bench_spawn(args.clients, args.requests, env),
+            "serve": bench_socket(args.clients, args.requests, env, args.workers),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,145 @@
+import re
 import sys
 import json
 import os
+import math
+from collections import deque
+
+DEFAULT_KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_knowledge.json")
+EMPTY_QUERY_RESPONSE = "Please provide a question about mutual funds or financial topics."
+FALLBACK_RESPONSE = "Could you please ask about mutual funds, investments, or portfolio management?"
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: finds every keyword occurrence in one pass over the text"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for keyword, payload in keywords:
+            state = 0
+            for ch in keyword:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append((len(keyword), payload))
+
+        # Depth-1 states fail to the root; deeper ones follow their parent's failure chain
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """Yield ``(start, payload)`` for every keyword occurrence"""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, payload in self.output[state]:
+                yield i - length + 1, payload
+
+class KnowledgeBase:
+    """FAQ entries matched by keyword through a precompiled automaton.
+
+    Each keyword that starts at a word boundary in the query adds its IDF
+    weight to every entry listing it; the highest-scoring entry wins, ties
+    going to the entry listed first.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        intents_per_keyword = {}
+        for idx, entry in enumerate(entries):
+            for keyword in entry["keywords"]:
+                intents_per_keyword.setdefault(keyword.lower(), []).append(idx)
+        n_entries = len(entries)
+        self.automaton = KeywordAutomaton(
+            (keyword, (keyword, idxs, math.log(1 + n_entries / len(idxs))))
+            for keyword, idxs in intents_per_keyword.items()
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def match(self, query):
+        """Best-matching entry for ``query``, or None"""
+        text = query.lower()
+        scores = {}
+        seen = set()
+        for start, (keyword, idxs, weight) in self.automaton.find(text):
+            if keyword in seen or (start > 0 and text[start - 1].isalnum()):
+                continue
+            seen.add(keyword)
+            for idx in idxs:
+                scores[idx] = scores.get(idx, 0.0) + weight
+        if not scores:
+            return None
+        best = max(scores, key=lambda idx: (scores[idx], -idx))
+        return self.entries[best]
+
+_knowledge_base = None
+
+def get_knowledge_base():
+    """Process-wide knowledge base loaded from ``CHAT_KB_PATH``"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase.from_file(os.environ.get("CHAT_KB_PATH", DEFAULT_KB_PATH))
+    return _knowledge_base
 
 def process_query(query: str) -> str:
     try:
         if not query.strip():
-            return "Please provide a question about mutual funds or financial topics."
-
-        # Basic responses for testing
-        responses = {
-            "mutual": "Mutual funds are investment vehicles that pool money from multiple investors to purchase securities.",
-            "fund": "A fund is a collection of money from multiple investors used to purchase various securities.",
-            "investment": "Investment is the act of allocating resources, usually money, with the expectation of generating profit.",
-            "portfolio": "A portfolio is a collection of financial investments like stocks, bonds, commodities and cash.",
-        }
+            return EMPTY_QUERY_RESPONSE
 
-        # Simple keyword matching
-        query_lower = query.lower()
-        for keyword, response in responses.items():
-            if keyword in query_lower:
-                return response
+        entry = get_knowledge_base().match(query)
+        if entry:
+            return entry["response"]
 
-        return "Could you please ask about mutual funds, investments, or portfolio management?"
+        return FALLBACK_RESPONSE
 
     except Exception as e:
         print(f"Error in process_query: {str(e)}", file=sys.stderr)
         return "I encountered an issue while processing your request. Please try again."
 
+_ID_PATTERN = re.compile(r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+
+def serve():
+    """Answer JSON-line messages on stdin with JSON lines until stdin closes.
+
+    Every reply carries the request's ``id``; for a line that is not valid
+    JSON it is picked out of the raw text when possible, else it is null.
+    """
+    get_knowledge_base()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            input_data = json.loads(line)
+            if not isinstance(input_data, dict):
+                raise ValueError("Message must be a JSON object")
+            request_id = input_data.get("id")
+            response = {"id": request_id, "response": process_query(input_data.get('message', ''))}
+        except json.JSONDecodeError:
+            match = _ID_PATTERN.search(line)
+            response = {"id": json.loads(match.group(1)) if match else None, "error": "Invalid JSON input"}
+        except Exception as e:
+            response = {"id": request_id, "error": f"Error processing query: {str(e)}"}
+        print(json.dumps(response), flush=True)
+
 def main():
     for line in sys.stdin:
         try:
@@ -41,4 +154,7 @@ def main():
         break
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if sys.argv[1:] == ["--serve"]:
+        serve()
+    else:
+        main()
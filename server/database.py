@@ -0,0 +1,30 @@
+import os
+import threading
+from contextlib import contextmanager
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(dsn=None, max_connections=4):
+    """Process-wide psycopg2 connection pool for ``dsn`` (default: ``DATABASE_URL``)"""
+    global _pool
+    from psycopg2.pool import ThreadedConnectionPool
+
+    with _pool_lock:
+        if _pool is None:
+            dsn = dsn or os.environ.get("DATABASE_URL")
+            if not dsn:
+                raise RuntimeError("DATABASE_URL must be set to reach the database")
+            _pool = ThreadedConnectionPool(1, max_connections, dsn)
+        return _pool
+
+@contextmanager
+def connection(dsn=None):
+    """Pooled connection, committed on success and rolled back on error"""
+    pool = get_pool(dsn)
+    conn = pool.getconn()
+    try:
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn)
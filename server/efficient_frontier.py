@@ -0,0 +1,128 @@
+import os
+import json
+import numpy as np
+import cvxpy as cp
+
+import timing
+from price_store import snapshot_id
+from portfolio_optimizer import calculate_risk_metrics, format_allocation, load_universe
+
+DEFAULT_FRONTIER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "frontiers")
+
+class FrontierProblem:
+    """Long-only minimum-variance QP for a target return, re-solved along the frontier.
+
+    The covariance enters through its Cholesky factor and the target return
+    is a parameter, so each point reuses the canonicalization and warm starts
+    from its neighbour.
+    """
+
+    def __init__(self, n_assets):
+        self.weights = cp.Variable(n_assets)
+        self.mean_returns = cp.Parameter(n_assets)
+        self.risk_factor = cp.Parameter((n_assets, n_assets))
+        self.target_return = cp.Parameter()
+
+        constraints = [
+            cp.sum(self.weights) == 1,
+            self.weights >= 0,
+            self.mean_returns @ self.weights >= self.target_return
+        ]
+        self.problem = cp.Problem(cp.Minimize(cp.sum_squares(self.risk_factor @ self.weights)), constraints)
+
+    def set_inputs(self, mean_returns, cov_matrix):
+        self.mean_returns.value = np.asarray(mean_returns, dtype=float)
+        self.risk_factor.value = np.linalg.cholesky(cov_matrix).T
+
+    def solve(self, target_return):
+        self.target_return.value = float(target_return)
+        self.problem.solve(warm_start=True)
+        if self.problem.status not in ('optimal', 'optimal_inaccurate'):
+            raise RuntimeError(f"Frontier point failed: {self.problem.status}")
+        return np.maximum(self.weights.value, 0)
+
+def tangency_weights(mean_returns, cov_matrix):
+    """Maximum Sharpe ratio (zero risk-free rate) long-only portfolio.
+
+    Solved in the homogenized form: minimize y'Cy subject to mu'y = 1, y >= 0,
+    then w = y / sum(y).
+    """
+    y = cp.Variable(len(mean_returns))
+    problem = cp.Problem(
+        cp.Minimize(cp.sum_squares(np.linalg.cholesky(cov_matrix).T @ y)),
+        [mean_returns @ y == 1, y >= 0]
+    )
+    problem.solve()
+    if problem.status not in ('optimal', 'optimal_inaccurate'):
+        raise RuntimeError(f"Tangency portfolio failed: {problem.status}")
+    y = np.maximum(y.value, 0)
+    return y / y.sum()
+
+def trace_frontier(symbols, mean_returns, cov_matrix, points=50):
+    """Exact long-only efficient frontier from the minimum-variance to the maximum-return portfolio"""
+    problem = FrontierProblem(len(symbols))
+    problem.set_inputs(mean_returns, cov_matrix)
+
+    min_variance = problem.solve(mean_returns.min())
+    low, high = float(mean_returns @ min_variance), float(mean_returns.max())
+    frontier = [min_variance]
+    for target in np.linspace(low, high, points)[1:-1]:
+        frontier.append(problem.solve(target))
+    # Only the best fund alone reaches the top return; the QP is degenerate there
+    frontier.append(np.eye(len(symbols))[int(np.argmax(mean_returns))])
+
+    result = {
+        'points': [format_allocation(symbols, w, mean_returns, cov_matrix) for w in frontier],
+        'min_variance': format_allocation(symbols, min_variance, mean_returns, cov_matrix),
+    }
+    if (mean_returns > 0).any():
+        result['tangency'] = format_allocation(
+            symbols, tangency_weights(mean_returns, cov_matrix), mean_returns, cov_matrix
+        )
+    return result
+
+_frontiers = {}
+
+def get_frontier(points=50, frontier_dir=None):
+    """Frontier over the fund universe for the current price snapshot, cached in memory and on disk"""
+    if not 2 <= float(points) <= 500:
+        return {"error": "Points must be between 2 and 500"}
+    points = int(points)
+
+    frontier_dir = frontier_dir or os.environ.get("FRONTIER_DIR", DEFAULT_FRONTIER_DIR)
+    try:
+        universe, data, unavailable = load_universe()
+        key = (snapshot_id(data), points)
+        if key in _frontiers:
+            timing.count("frontier_cache_hit")
+            return _frontiers[key]
+
+        os.makedirs(frontier_dir, exist_ok=True)
+        path = os.path.join(frontier_dir, f"{key[0]}-{points}.json")
+        if os.path.exists(path):
+            timing.count("frontier_disk_hit")
+            with open(path) as f:
+                result = json.load(f)
+        else:
+            timing.count("frontier_cache_miss")
+            with timing.stage("risk_metrics"):
+                mean_returns, cov_matrix = calculate_risk_metrics(data)
+            with timing.stage("solve"):
+                result = {'snapshot': key[0], **trace_frontier(universe.symbols, mean_returns, cov_matrix, points)}
+            if unavailable:
+                result['unavailable'] = unavailable
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+            for name in os.listdir(frontier_dir):
+                if name.endswith(".json") and not name.startswith(key[0]):
+                    os.remove(os.path.join(frontier_dir, name))
+
+        for stale in [k for k in _frontiers if k[0] != key[0]]:
+            del _frontiers[stale]
+        _frontiers[key] = result
+        return result
+
+    except Exception as e:
+        return {"error": str(e)}
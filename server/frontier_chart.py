@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+DEFAULT_CHART_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "charts")
+MAX_SCATTER_POINTS = 5000
+HEXBIN_THRESHOLD = 50000
+
+def chart_dir():
+    path = os.environ.get("CHART_DIR", DEFAULT_CHART_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def chart_key(snapshot, **params):
+    """Content key for a chart: the price snapshot plus every input that shapes the point cloud"""
+    payload = json.dumps({"snapshot": snapshot, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+def save_points(key, sample, best):
+    """Persist the sampled point cloud and optimal portfolio for a later render"""
+    path = os.path.join(chart_dir(), f"{key}.npz")
+    if os.path.exists(path):
+        return path
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp_path,
+        volatility=sample['volatility'],
+        returns=sample['returns'],
+        sharpe=sample['sharpe'],
+        optimal=np.array([best['volatility'], best['returns']]),
+    )
+    os.replace(tmp_path, path)
+    return path
+
+def render(key, max_points=MAX_SCATTER_POINTS, hexbin_threshold=HEXBIN_THRESHOLD):
+    """Render (or reuse) the PNG for ``key``; returns its path.
+
+    Clouds above ``hexbin_threshold`` are drawn as a hexbin density of the
+    mean Sharpe ratio, and clouds above ``max_points`` are randomly thinned,
+    so render time does not grow with the number of portfolios.
+    """
+    directory = chart_dir()
+    png_path = os.path.join(directory, f"{key}.png")
+    if os.path.exists(png_path):
+        return png_path
+
+    with np.load(os.path.join(directory, f"{key}.npz")) as f:
+        volatility, returns, sharpe, optimal = f['volatility'], f['returns'], f['sharpe'], f['optimal']
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if len(volatility) > hexbin_threshold:
+        mappable = ax.hexbin(volatility, returns, C=sharpe, reduce_C_function=np.mean,
+                             gridsize=80, cmap='YlGnBu', mincnt=1)
+    else:
+        if len(volatility) > max_points:
+            keep = np.random.default_rng(0).choice(len(volatility), max_points, replace=False)
+            volatility, returns, sharpe = volatility[keep], returns[keep], sharpe[keep]
+        mappable = ax.scatter(volatility, returns, c=sharpe, cmap='YlGnBu', marker='o', alpha=0.3)
+    ax.scatter(optimal[0], optimal[1], marker='*', color='r', s=500, label='Optimal Portfolio')
+    fig.colorbar(mappable, ax=ax, label='Sharpe Ratio')
+    ax.set_xlabel('Volatility')
+    ax.set_ylabel('Expected Return')
+    ax.set_title('Efficient Frontier')
+    ax.legend()
+
+    tmp_path = f"{png_path}.{os.getpid()}.tmp"
+    fig.savefig(tmp_path, format='png')
+    plt.close(fig)
+    os.replace(tmp_path, png_path)
+    return png_path
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(json.dumps({"error": "Requires a chart id"}))
+        sys.exit(1)
+    try:
+        print(json.dumps({"path": render(sys.argv[1])}))
+    except FileNotFoundError:
+        print(json.dumps({"error": "Unknown chart id"}))
+        sys.exit(1)
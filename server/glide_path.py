@@ -0,0 +1,209 @@
+import math
+from collections import OrderedDict
+import numpy as np
+import cvxpy as cp
+import timing
+from price_store import snapshot_id
+from portfolio_optimizer import (
+    calculate_risk_metrics, format_allocation, load_universe, safe_target, select_safe_assets
+)
+
+MAX_YEARS = 30
+DEFAULT_TURNOVER_COST = 0.002
+PATH_CACHE_SIZE = 4096
+# Starting allocations are rounded to this before keying the path cache
+STATE_DECIMALS = 4
+
+class GlidePathProblem:
+    """Year-by-year allocations over a horizon, solved as one stacked program.
+
+    Each year earns ``mu' w_t - 0.5 * A * w_t' C w_t`` and pays
+    ``cost * ||w_t - w_{t-1}||_1`` to rebalance from the year before (the
+    first year from the current allocation). Year ``t`` must hold at least
+    ``targets[t]`` in safe assets. All inputs are parameters, so a problem
+    compiled for ``(n_assets, years)`` is reused across clients.
+    """
+
+    def __init__(self, n_assets, years):
+        self.weights = cp.Variable((years, n_assets))
+        self.current = cp.Parameter(n_assets, nonneg=True)
+        self.mean_returns = cp.Parameter(n_assets)
+        self.risk_factor = cp.Parameter((n_assets, n_assets))
+        self.safe_mask = cp.Parameter(n_assets, nonneg=True)
+        self.targets = cp.Parameter(years, nonneg=True)
+        self.turnover_cost = cp.Parameter(nonneg=True)
+
+        # Trades bound |w_t - w_{t-1}| from above, keeping the cost term DPP
+        trades = cp.Variable((years, n_assets), nonneg=True)
+        previous = cp.vstack([cp.reshape(self.current, (1, n_assets), order='C'), self.weights[:-1]])
+        utility = (
+            cp.sum(self.weights @ self.mean_returns)
+            - cp.sum_squares(self.weights @ self.risk_factor.T)
+            - self.turnover_cost * cp.sum(trades)
+        )
+        constraints = [
+            cp.sum(self.weights, axis=1) == 1,
+            self.weights >= 0,
+            self.weights @ self.safe_mask >= self.targets,
+            trades >= self.weights - previous,
+            trades >= previous - self.weights,
+        ]
+        self.problem = cp.Problem(cp.Maximize(utility), constraints)
+
+    def solve(self, current, mean_returns, risk_factor, safe_mask, targets, turnover_cost):
+        self.current.value = current
+        self.mean_returns.value = mean_returns
+        self.risk_factor.value = risk_factor
+        self.safe_mask.value = safe_mask
+        self.targets.value = targets
+        self.turnover_cost.value = turnover_cost
+        self.problem.solve(warm_start=True)
+        timing.record_solve(self.problem)
+
+        if self.problem.status not in ('optimal', 'optimal_inaccurate'):
+            raise RuntimeError(f"Glide path failed: {self.problem.status}")
+        weights = np.maximum(self.weights.value, 0)
+        return weights / weights.sum(axis=1, keepdims=True)
+
+class GlidePathPlanner:
+    """Glide paths for one set of risk estimates, memoizing every solved step.
+
+    By the principle of optimality, the tail of an optimal path from year
+    ``t`` on is the optimal path for a client holding ``w_{t-1}`` with
+    ``horizon - t`` years left. Each solve therefore caches all its suffixes,
+    keyed by (starting allocation, years left, risk aversion, cost). Clients
+    who start where an earlier plan passed, with a horizon it covered, are
+    answered without solving.
+    """
+
+    def __init__(self, symbols, mean_returns, cov_matrix, safe_assets, cache_size=PATH_CACHE_SIZE):
+        self.symbols = list(symbols)
+        self.mean_returns = np.asarray(mean_returns, dtype=float)
+        self.cov_matrix = cov_matrix
+        self.cholesky = np.linalg.cholesky(cov_matrix).T
+        self.safe_mask = np.zeros(len(self.symbols))
+        self.safe_mask[list(safe_assets)] = 1
+        self.cache_size = cache_size
+        self._problems = {}
+        self._paths = OrderedDict()
+        self.stats = {"solves": 0, "hits": 0}
+
+    def _key(self, current, horizon, risk_aversion, turnover_cost):
+        state = np.round(current, STATE_DECIMALS) + 0.0
+        return state.tobytes(), round(horizon, 6), float(risk_aversion), float(turnover_cost)
+
+    def _problem(self, years):
+        if years not in self._problems:
+            with timing.stage("build_problem"):
+                self._problems[years] = GlidePathProblem(len(self.symbols), years)
+        return self._problems[years]
+
+    def _remember(self, key, path):
+        self._paths[key] = path
+        self._paths.move_to_end(key)
+        while len(self._paths) > self.cache_size:
+            self._paths.popitem(last=False)
+
+    def path(self, current, horizon, risk_aversion, turnover_cost=DEFAULT_TURNOVER_COST):
+        """(years, n_assets) allocations for each year until ``horizon`` years from now"""
+        current = np.asarray(current, dtype=float)
+        horizon = min(float(horizon), MAX_YEARS)
+        years = max(1, math.ceil(horizon))
+        key = self._key(current, horizon, risk_aversion, turnover_cost)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            self.stats["hits"] += 1
+            timing.count("glide_path_cache_hit")
+            return self._paths[key]
+
+        self.stats["solves"] += 1
+        timing.count("glide_path_cache_miss")
+        targets = np.array([safe_target(horizon - t) for t in range(years)]).clip(0, 1)
+        with timing.stage("solve"):
+            path = self._problem(years).solve(
+                current, self.mean_returns, np.sqrt(0.5 * float(risk_aversion)) * self.cholesky,
+                self.safe_mask, targets, float(turnover_cost)
+            )
+        self._remember(key, path)
+        # Every tail of the path is itself optimal from the allocation before it
+        for t in range(1, years):
+            self._remember(self._key(path[t - 1], horizon - t, risk_aversion, turnover_cost), path[t:])
+        return path
+
+    def plan(self, current, horizon, risk_aversion, turnover_cost=DEFAULT_TURNOVER_COST):
+        """Response payload: one allocation per year with its turnover"""
+        current = np.asarray(current, dtype=float)
+        path = self.path(current, horizon, risk_aversion, turnover_cost)
+        previous = np.vstack([current, path[:-1]])
+        turnover = np.abs(path - previous).sum(axis=1) / 2
+        if not current.any():
+            turnover[0] = 0.0
+        steps = []
+        for t, weights in enumerate(path):
+            step = format_allocation(self.symbols, weights, self.mean_returns, self.cov_matrix)
+            step.update({
+                'year': t,
+                'safe_allocation': round(float(self.safe_mask @ weights) * 100, 2),
+                'turnover': round(float(turnover[t]) * 100, 2),
+            })
+            steps.append(step)
+        return {
+            'path': steps,
+            'total_turnover': round(float(turnover.sum()) * 100, 2),
+            'turnover_cost': round(float(turnover_cost * 2 * turnover.sum()) * 100, 4),
+        }
+
+_planners = {}
+
+def get_planner():
+    """Planner for the current price snapshot of the configured fund universe.
+
+    Uses the same funds and safe assets as ``optimize_portfolio``: the
+    universe's safe-class funds when it is tagged, else the two
+    lowest-volatility ones.
+    """
+    universe, data, _ = load_universe()
+    key = (snapshot_id(data), tuple(universe.asset_classes))
+    if key not in _planners:
+        with timing.stage("risk_metrics"):
+            mean_returns, cov_matrix = calculate_risk_metrics(data)
+        safe_assets = select_safe_assets(cov_matrix, universe)
+        if len(safe_assets) == 0:
+            raise ValueError("The fund universe has no funds in a safe asset class")
+        _planners.clear()
+        _planners[key] = GlidePathPlanner(universe.symbols, mean_returns, cov_matrix, safe_assets)
+    return _planners[key]
+
+def plan_glide_path(risk_aversion, time_period, current=None, turnover_cost=DEFAULT_TURNOVER_COST):
+    """Year-by-year allocation path for one client.
+
+    ``current`` maps symbols to percentages of the existing portfolio; left
+    out, the first year is bought from cash without a rebalancing cost.
+    """
+    try:
+        risk_aversion, time_period, turnover_cost = float(risk_aversion), float(time_period), float(turnover_cost)
+    except (TypeError, ValueError):
+        return {"error": "Risk aversion, time period and turnover cost must be numbers"}
+    if not (0 <= risk_aversion <= 10):
+        return {"error": "Risk aversion must be between 0-10"}
+    if not (0 <= time_period <= MAX_YEARS):
+        return {"error": "Time period must be between 0-30 years"}
+    if not (0 <= turnover_cost <= 0.1):
+        return {"error": "Turnover cost must be between 0 and 0.1"}
+    if current is not None and not isinstance(current, dict):
+        return {"error": "Current allocation must map symbols to percentages"}
+
+    try:
+        planner = get_planner()
+        weights = np.zeros(len(planner.symbols))
+        if current:
+            unknown = set(current) - set(planner.symbols)
+            if unknown:
+                return {"error": f"Unknown symbols: {', '.join(sorted(unknown))}"}
+            weights = np.array([float(current.get(sym, 0)) for sym in planner.symbols]) / 100
+            if (weights < 0).any() or not math.isclose(weights.sum(), 1, abs_tol=0.01):
+                return {"error": "Current allocation must be non-negative and sum to 100"}
+            weights = weights / weights.sum()
+        return planner.plan(weights, time_period, risk_aversion, turnover_cost)
+    except Exception as e:
+        return {"error": str(e)}
@@ -0,0 +1,149 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+class SimulationResult:
+    """Bounded summary of a random-portfolio run.
+
+    Holds the top-k portfolios by utility, the best-return portfolio in each
+    volatility bin (the frontier envelope) and a fixed-size sample of points
+    for plotting, so memory does not grow with the number of portfolios.
+    """
+
+    FIELDS = ('weights', 'returns', 'volatility', 'sharpe', 'utility')
+
+    def __init__(self, n_assets, top_k, frontier_bins, max_volatility):
+        self.count = 0
+        self.top_k = top_k
+        self.max_volatility = max_volatility
+        self.top = self._empty(n_assets, 0)
+        self.frontier = self._empty(n_assets, frontier_bins)
+        self.frontier['returns'][:] = -np.inf
+        self.sample = self._empty(n_assets, 0)
+
+    @staticmethod
+    def _empty(n_assets, size):
+        return {
+            'weights': np.zeros((size, n_assets)),
+            'returns': np.zeros(size),
+            'volatility': np.zeros(size),
+            'sharpe': np.zeros(size),
+            'utility': np.zeros(size),
+        }
+
+    @staticmethod
+    def _take(scores, idx):
+        return {field: scores[field][idx] for field in SimulationResult.FIELDS}
+
+    def add(self, scores, sample_size=0):
+        """Fold one scored batch into the running summary"""
+        self.count += len(scores['utility'])
+
+        merged = {f: np.concatenate([self.top[f], scores[f]]) for f in self.FIELDS}
+        if len(merged['utility']) > self.top_k:
+            keep = np.argpartition(merged['utility'], -self.top_k)[-self.top_k:]
+            merged = self._take(merged, keep)
+        order = np.argsort(merged['utility'])[::-1]
+        self.top = self._take(merged, order)
+
+        bins = len(self.frontier['returns'])
+        idx = np.minimum((scores['volatility'] / self.max_volatility * bins).astype(int), bins - 1)
+        batch_best = np.full(bins, -np.inf)
+        np.maximum.at(batch_best, idx, scores['returns'])
+        winners = np.flatnonzero(scores['returns'] == batch_best[idx])
+        winners = winners[scores['returns'][winners] > self.frontier['returns'][idx[winners]]]
+        for f in self.FIELDS:
+            self.frontier[f][idx[winners]] = scores[f][winners]
+
+        if sample_size:
+            self.sample = {
+                f: np.concatenate([self.sample[f], scores[f][:sample_size]]) for f in self.FIELDS
+            }
+
+    def merge(self, other):
+        """Combine with a result computed on another shard"""
+        filled = np.isfinite(other.frontier['returns'])
+        other_frontier = self._take(other.frontier, np.flatnonzero(filled))
+        count = self.count + other.count
+        self.add(other.top)
+        self.add(other_frontier)
+        self.count = count
+        self.sample = {f: np.concatenate([self.sample[f], other.sample[f]]) for f in self.FIELDS}
+        return self
+
+    @property
+    def best(self):
+        """Highest-utility portfolio as a dict of scalars and its weights"""
+        return {f: self.top[f][0] for f in self.FIELDS}
+
+    def efficient_frontier(self):
+        """Envelope bins that beat every lower-volatility bin, in volatility order"""
+        returns = self.frontier['returns']
+        filled = np.isfinite(returns)
+        efficient = filled & (returns >= np.maximum.accumulate(np.where(filled, returns, -np.inf)))
+        return self._take(self.frontier, np.flatnonzero(efficient))
+
+def score_portfolios(weights, mean_returns, cov_matrix, risk_aversion, target_safe, safe_assets,
+                     penalty_factor=10):
+    """Return, volatility, Sharpe ratio and penalized utility for a block of weight vectors"""
+    returns = weights @ mean_returns
+    variance = np.einsum('bi,ij,bj->b', weights, cov_matrix, weights, optimize=True)
+    volatility = np.sqrt(variance)
+    safe_allocation = weights[:, safe_assets].sum(axis=1)
+    penalty = penalty_factor * np.maximum(0, target_safe - safe_allocation) ** 2
+    utility = returns - 0.5 * risk_aversion * variance - penalty
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility != 0, returns / volatility, 0)
+    return {
+        'weights': weights,
+        'returns': returns,
+        'volatility': volatility,
+        'sharpe': sharpe,
+        'utility': utility,
+    }
+
+def _run_batches(args):
+    (mean_returns, cov_matrix, risk_aversion, target_safe, safe_assets, penalty_factor,
+     batches, top_k, frontier_bins, sample_fraction) = args
+    n_assets = len(mean_returns)
+    result = SimulationResult(n_assets, top_k, frontier_bins, np.sqrt(np.diag(cov_matrix)).max())
+    alpha = np.ones(n_assets)
+    for seed, size in batches:
+        rng = np.random.default_rng(seed)
+        weights = rng.dirichlet(alpha, size=size)
+        scores = score_portfolios(
+            weights, mean_returns, cov_matrix, risk_aversion, target_safe, safe_assets, penalty_factor
+        )
+        result.add(scores, int(np.ceil(size * sample_fraction)))
+    return result
+
+def simulate_portfolios(mean_returns, cov_matrix, risk_aversion, target_safe, safe_assets,
+                        num_portfolios, penalty_factor=10, batch_size=100_000, top_k=1,
+                        frontier_bins=200, sample_size=0, seed=None, processes=1):
+    """Score ``num_portfolios`` Dirichlet-sampled portfolios in fixed-size batches.
+
+    Every batch draws from its own child of ``seed``'s SeedSequence, so a
+    seeded run gives the same result whatever ``processes`` is set to.
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    sizes = [batch_size] * (num_portfolios // batch_size)
+    if num_portfolios % batch_size:
+        sizes.append(num_portfolios % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = list(zip(seeds, sizes))
+    sample_fraction = min(1.0, sample_size / num_portfolios) if num_portfolios else 0
+
+    def task(shard):
+        return (mean_returns, cov_matrix, float(risk_aversion), float(target_safe), list(safe_assets),
+                penalty_factor, shard, top_k, frontier_bins, sample_fraction)
+
+    if processes <= 1 or len(batches) == 1:
+        return _run_batches(task(batches))
+
+    shards = [batches[i::processes] for i in range(processes) if batches[i::processes]]
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        results = list(pool.map(_run_batches, [task(shard) for shard in shards]))
+    merged = results[0]
+    for other in results[1:]:
+        merged.merge(other)
+    return merged
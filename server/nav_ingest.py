@@ -0,0 +1,226 @@
+"""Stream daily NAV files into the ``funds`` table and the price store.
+
+Reads AMFI's ``NAVAll.txt`` format (``;``-separated, with fund-house and
+category heading lines) or a CSV with ``Scheme Code``, ``Scheme Name``,
+``Net Asset Value`` (or ``NAV``) and ``Date`` columns, from a path, ``-``
+(stdin) or an http(s) URL. Records are parsed lazily and handled in
+batches, so memory stays flat however large the file is.
+
+Each batch is COPYed into a temporary staging table and appended to the
+price store. A symbol map (a JSON object of scheme code to store symbol,
+from ``--symbols`` or ``NAV_SYMBOLS``) stores NAVs under the symbols the
+optimizer uses and skips unmapped schemes; without one, NAVs are stored
+under the scheme code. Once the file is read, a single UPDATE sets
+``current_nav`` and ``current_value = units * nav`` on every holding whose
+``scheme_code`` matches, using the latest NAV per scheme.
+
+    python3 server/nav_ingest.py NAVAll.txt --symbols schemes.json
+    python3 server/nav_ingest.py https://www.amfiindia.com/spages/NAVAll.txt --no-db
+"""
+import io
+import csv
+import sys
+import json
+import time
+import argparse
+import os
+import datetime
+import urllib.request
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, islice
+
+import timing
+from database import connection
+from price_store import default_store, PriceStore
+
+AMFI_NAV_URL = "https://www.amfiindia.com/spages/NAVAll.txt"
+BATCH_SIZE = 5000
+DATE_FORMATS = ("%d-%b-%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+CSV_COLUMNS = {
+    "scheme code": "code",
+    "scheme name": "name",
+    "net asset value": "nav",
+    "nav": "nav",
+    "date": "date",
+}
+
+@lru_cache(maxsize=1024)
+def _parse_date(text):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognized date: {text}")
+
+def _record(code, name, nav, date):
+    """(scheme_code, scheme_name, nav, 'YYYY-MM-DD'), or None for rows without a usable NAV"""
+    try:
+        nav = float(nav.replace(",", ""))
+        date = _parse_date(date.strip())
+    except ValueError:
+        return None
+    if not nav > 0:
+        return None
+    return code.strip(), name.strip(), nav, date
+
+def parse_amfi(lines):
+    """Yield NAV records from AMFI ``NAVAll.txt`` lines"""
+    for line in lines:
+        fields = line.rstrip("\r\n").split(";")
+        # Headings (fund house, scheme category) and blank lines have no separators
+        if len(fields) < 6 or not fields[0].strip().isdigit():
+            continue
+        record = _record(fields[0], fields[3], fields[4], fields[5])
+        if record is not None:
+            yield record
+
+def parse_csv(lines):
+    """Yield NAV records from CSV lines with a header row"""
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [col.strip().lower() for col in header]
+    index = {CSV_COLUMNS[col]: i for i, col in enumerate(columns) if col in CSV_COLUMNS}
+    missing = {"code", "name", "nav", "date"} - set(index)
+    if missing:
+        raise ValueError(f"NAV CSV is missing columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        if len(row) < len(header):
+            continue
+        record = _record(row[index["code"]], row[index["name"]], row[index["nav"]], row[index["date"]])
+        if record is not None:
+            yield record
+
+def parse_navs(lines):
+    """Yield NAV records from either format, detected from the first non-blank line"""
+    lines = iter(lines)
+    for first in lines:
+        if first.strip():
+            break
+    else:
+        return
+    parser = parse_amfi if first.count(";") >= 5 else parse_csv
+    yield from parser(chain([first], lines))
+
+@contextmanager
+def open_nav_source(source):
+    """Text line stream for a path, ``-`` (stdin) or an http(s) URL"""
+    if source == "-":
+        yield sys.stdin
+    elif source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=60) as response:
+            yield io.TextIOWrapper(response, encoding="utf-8", errors="replace")
+    else:
+        with open(source, encoding="utf-8", errors="replace", newline="") as f:
+            yield f
+
+def load_symbol_map(path=None):
+    """Scheme code -> store symbol from a JSON file (default: ``NAV_SYMBOLS``), or None"""
+    path = path or os.environ.get("NAV_SYMBOLS")
+    if not path:
+        return None
+    with open(path) as f:
+        mapping = json.load(f)
+    if not isinstance(mapping, dict):
+        raise ValueError(f"{path} must hold a JSON object of scheme code to symbol")
+    return {str(code).strip(): symbol for code, symbol in mapping.items()}
+
+def _store_rows(batch, symbols):
+    if symbols is None:
+        return [(code, date, nav) for code, _, nav, date in batch]
+    return [(symbols[code], date, nav) for code, _, nav, date in batch if code in symbols]
+
+def batches(records, size=BATCH_SIZE):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+def _copy_batch(cursor, batch):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows((code, nav, date) for code, _, nav, date in batch)
+    buffer.seek(0)
+    cursor.copy_expert("COPY nav_staging (scheme_code, nav, nav_date) FROM STDIN WITH (FORMAT csv)", buffer)
+
+UPDATE_FUNDS = """
+    UPDATE funds
+    SET current_nav = latest.nav,
+        current_value = funds.units * latest.nav,
+        last_updated = now()
+    FROM (
+        SELECT DISTINCT ON (scheme_code) scheme_code, nav
+        FROM nav_staging
+        ORDER BY scheme_code, nav_date DESC
+    ) AS latest
+    WHERE funds.scheme_code = latest.scheme_code
+"""
+
+def ingest(lines, store=None, dsn=None, update_funds=True, batch_size=BATCH_SIZE, symbols=None):
+    """Stream NAV records from ``lines`` into the price store and the funds table.
+
+    ``symbols`` maps scheme codes to price store symbols (see ``load_symbol_map``).
+
+    Returns counts of records read and holdings updated. The funds update
+    happens in one transaction, so a failed run leaves the table untouched.
+    """
+    stats = {"records": 0, "funds_updated": 0}
+
+    def load(conn):
+        cursor = conn.cursor() if conn is not None else None
+        if cursor is not None:
+            cursor.execute("""CREATE TEMP TABLE nav_staging (
+                scheme_code TEXT NOT NULL, nav NUMERIC NOT NULL, nav_date DATE NOT NULL
+            ) ON COMMIT DROP""")
+        for batch in batches(parse_navs(lines), batch_size):
+            stats["records"] += len(batch)
+            if cursor is not None:
+                with timing.stage("copy_navs"):
+                    _copy_batch(cursor, batch)
+            if store is not None:
+                with timing.stage("store_navs"):
+                    store.add_closes(_store_rows(batch, symbols))
+        if cursor is not None:
+            with timing.stage("update_funds"):
+                cursor.execute(UPDATE_FUNDS)
+            stats["funds_updated"] = cursor.rowcount
+
+    if update_funds:
+        with connection(dsn) as conn:
+            load(conn)
+    else:
+        load(None)
+    return stats
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="nav_ingest.py")
+    parser.add_argument("source", nargs="?", default=AMFI_NAV_URL, help="NAV file path, - for stdin, or URL")
+    parser.add_argument("--dsn", help="Postgres connection string (default: DATABASE_URL)")
+    parser.add_argument("--store", help="Price store path (default: PRICE_STORE_PATH)")
+    parser.add_argument("--symbols", help="JSON map of scheme code to store symbol (default: NAV_SYMBOLS)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-db", action="store_true", help="Only update the price store")
+    parser.add_argument("--no-store", action="store_true", help="Only update the funds table")
+    args = parser.parse_args(argv)
+
+    store = None
+    if not args.no_store:
+        store = PriceStore(args.store) if args.store else default_store()
+
+    start = time.perf_counter()
+    try:
+        symbols = load_symbol_map(args.symbols)
+        with open_nav_source(args.source) as lines:
+            stats = ingest(lines, store, args.dsn, not args.no_db, args.batch_size, symbols)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(stats))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -31,7 +31,7 @@ def calculate_risk_metrics(data):
     momentum = data.pct_change(90).iloc[-1].values
     
     # Enhanced return estimation
-    mean_returns = np.exp(log_returns.mean() * trading_days) - 1
+    mean_returns = np.exp(log_returns.mean().values * trading_days) - 1
     
     # Regularized covariance matrix
     cov_matrix = LedoitWolf().fit(log_returns).covariance_ * trading_days
@@ -93,18 +93,20 @@ def optimize_portfolio(risk_aversion, time_period):
         constraints.append(weights @ momentum >= 0.25)
         constraints.append(cp.norm(weights - prev_weights, 1) <= 0.15)
 
-        # Risk parity constraint
-        risk_contributions = cp.multiply(weights, cov_matrix @ weights)
-        constraints.append(cp.sum(risk_contributions) <= 0.25)
+        # Risk budget: the risk contributions w_i * (cov @ w)_i sum to the
+        # portfolio variance, so bound that directly (the elementwise product
+        # of two variable expressions is not DCP)
+        portfolio_variance = cp.quad_form(weights, cov_matrix)
+        constraints.append(portfolio_variance <= 0.25)
 
         # Adaptive objective function
         portfolio_return = mean_returns @ weights
-        portfolio_volatility = cp.quad_form(weights, cov_matrix)
+        utility = portfolio_return - 0.5 * risk_aversion * portfolio_variance
         
         # Solve optimization
         print("Solving optimization problem...")
         problem = cp.Problem(cp.Maximize(utility), constraints)
-        problem.solve(solver=cp.ECOS)
+        problem.solve()
         
         if problem.status not in ['optimal', 'optimal_inaccurate']:
             raise RuntimeError(f"Optimization failed: {problem.status}")
@@ -0,0 +1,168 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import { createInterface } from "readline";
+
+type PendingRequest = {
+  resolve: (value: any) => void;
+  reject: (reason: Error) => void;
+  timer: NodeJS.Timeout;
+};
+
+const MIN_RESPAWN_DELAY_MS = 100;
+const MAX_RESPAWN_DELAY_MS = 30000;
+
+// One resident `<script> --serve` Python process. Requests are written as
+// JSON lines and matched to responses by id. A process that dies is
+// respawned after a delay that doubles on every consecutive failure, so a
+// script that cannot start does not spin.
+class PythonWorker {
+  private proc!: ChildProcessWithoutNullStreams;
+  private pending = new Map<number, PendingRequest>();
+  private stopped = false;
+  private running = false;
+  private respawnDelayMs = MIN_RESPAWN_DELAY_MS;
+  private respawnTimer?: NodeJS.Timeout;
+
+  constructor(private script: string, private timeoutMs: number) {
+    this.start();
+  }
+
+  get inFlight() {
+    return this.pending.size;
+  }
+
+  get available() {
+    return this.running;
+  }
+
+  private start() {
+    this.respawnTimer = undefined;
+    this.proc = spawn("python3", [this.script, "--serve"]);
+    this.running = true;
+    const proc = this.proc;
+
+    createInterface({ input: proc.stdout }).on("line", (line) => {
+      let response: any;
+      try {
+        response = JSON.parse(line);
+      } catch (error) {
+        console.error("Invalid response from Python worker:", line);
+        return;
+      }
+      // A reply without an id answers a line the worker could not parse; it
+      // processes lines in order, so that is the oldest request in flight
+      const requestId = response.id ?? this.pending.keys().next().value;
+      const request = this.pending.get(requestId);
+      if (!request) return;
+      clearTimeout(request.timer);
+      this.pending.delete(requestId);
+      this.respawnDelayMs = MIN_RESPAWN_DELAY_MS;
+      const { id, ...result } = response;
+      request.resolve(result);
+    });
+
+    proc.stderr.on("data", (data: Buffer) => {
+      console.error(`${this.script}:`, data.toString());
+    });
+
+    // A write to a worker that is exiting fails with EPIPE; the exit handler deals with it
+    proc.stdin.on("error", (error) => {
+      console.error(`${this.script} input closed:`, error.message);
+    });
+
+    const down = (error: Error) => {
+      if (proc !== this.proc || !this.running) return;
+      this.running = false;
+      this.failAll(error);
+      if (this.stopped) return;
+      this.respawnTimer = setTimeout(() => this.start(), this.respawnDelayMs);
+      this.respawnDelayMs = Math.min(this.respawnDelayMs * 2, MAX_RESPAWN_DELAY_MS);
+    };
+    proc.on("error", (error) => down(new Error(`${this.script} failed: ${error.message}`)));
+    proc.on("exit", (code) => down(new Error(`${this.script} exited with code ${code}`)));
+  }
+
+  private failAll(error: Error) {
+    this.pending.forEach((request) => {
+      clearTimeout(request.timer);
+      request.reject(error);
+    });
+    this.pending.clear();
+  }
+
+  private restart(reason: Error) {
+    const proc = this.proc;
+    this.failAll(reason);
+    this.start();
+    proc.kill("SIGKILL");
+  }
+
+  send(id: number, payload: Record<string, unknown>): Promise<any> {
+    if (!this.running) {
+      return Promise.reject(new Error(`${this.script} is restarting`));
+    }
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        // A stuck solve blocks everything queued behind it, so replace the process
+        this.restart(new Error(`${this.script} timed out after ${this.timeoutMs}ms`));
+      }, this.timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      this.proc.stdin.write(JSON.stringify({ id, ...payload }) + "\n");
+    });
+  }
+
+  stop() {
+    this.stopped = true;
+    clearTimeout(this.respawnTimer);
+    this.failAll(new Error("Worker pool stopped"));
+    this.proc.kill();
+  }
+}
+
+// Pool of resident workers for one script; each request goes to the worker
+// with the fewest requests in flight.
+export class PythonWorkerPool {
+  private workers: PythonWorker[];
+  private nextId = 0;
+
+  constructor(script: string, size: number, timeoutMs: number) {
+    this.workers = Array.from({ length: size }, () => new PythonWorker(script, timeoutMs));
+  }
+
+  request(payload: Record<string, unknown>): Promise<any> {
+    const ready = this.workers.filter((worker) => worker.available);
+    const worker = (ready.length ? ready : this.workers).reduce((a, b) => (b.inFlight < a.inFlight ? b : a));
+    return worker.send(this.nextId++, payload);
+  }
+
+  stop() {
+    this.workers.forEach((worker) => worker.stop());
+  }
+}
+
+export class OptimizerPool extends PythonWorkerPool {
+  constructor(
+    size = Number(process.env.OPTIMIZER_WORKERS) || 2,
+    timeoutMs = Number(process.env.OPTIMIZER_TIMEOUT_MS) || 30000,
+  ) {
+    super("server/portfolio_optimizer.py", size, timeoutMs);
+  }
+
+  optimize(riskAversion: unknown, timePeriod: unknown): Promise<any> {
+    return this.request({
+      action: "optimize",
+      risk_aversion: riskAversion,
+      time_period: timePeriod,
+    });
+  }
+
+  frontier(points: number): Promise<any> {
+    return this.request({ action: "frontier", points });
+  }
+}
+
+let sharedPool: OptimizerPool | undefined;
+
+export function getOptimizerPool() {
+  if (!sharedPool) sharedPool = new OptimizerPool();
+  return sharedPool;
+}
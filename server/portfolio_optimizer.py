@@ -1,101 +1,587 @@
 import sys
+import os
+import re
 import json
+import signal
+import argparse
+import socket
 import numpy as np
-import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
-import cvxpy as cp
-from sklearn.covariance import LedoitWolf
-import io
-import base64
-
-def fetch_financial_data(symbols):
-    """Fetch and preprocess financial data with error handling"""
+import timing
+from price_store import default_store
+from shared_prices import log_returns, shared_close_matrix
+from risk_model import FactorModel, factor_risk_metrics
+from universe import default_universe
+from result_cache import get_result_cache
+
+# cvxpy and scikit-learn are imported where they are first needed: they
+# dominate start-up time and the grid, cache and worker paths can skip them.
+
+START_DATE = "2020-01-01"
+END_DATE = "2025-02-02"
+
+SYMBOLS = [
+    '0P0000XVUB.BO',
+    '0P0000XV5S.BO',
+    '0P0000XVK2.BO',
+    '0P0000XVJK.BO',
+    '0P0000XVU2.BO',
+    '0P0001IAU9.BO'
+]
+
+# Universes this large use a factor covariance model instead of a dense one
+FACTOR_MODEL_MIN_ASSETS = 100
+
+def fetch_financial_data(symbols, store=None, allow_partial=False):
+    """Fetch and preprocess financial data with error handling.
+
+    Prices come from the local price store, which only goes to the network
+    for date ranges it has not seen yet. With ``SHARED_PRICES`` set, the
+    cleaned matrix is published once to a memory-mapped file that every
+    worker reads without a private copy. Symbols with no prices are an
+    error unless ``allow_partial``, in which case they are just left out.
+    """
     try:
-        data = yf.download(symbols, start="2020-01-01", end="2025-02-02", auto_adjust=True)['Close']
+        store = store or default_store()
+        with timing.stage("fetch"):
+            if os.environ.get("SHARED_PRICES"):
+                matrix = shared_close_matrix(store, symbols, START_DATE, END_DATE)
+                data = matrix.frame() if matrix is not None else store.get_close_matrix(symbols, START_DATE, END_DATE)
+            else:
+                data = store.get_close_matrix(symbols, START_DATE, END_DATE)
         if data.empty:
             raise ValueError("No data downloaded")
-        return data.fillna(method='ffill').dropna()
+        missing = [sym for sym in symbols if sym not in data.columns]
+        if missing and not allow_partial:
+            raise ValueError(f"No prices for {', '.join(missing)}")
+        return data
     except Exception as e:
         raise RuntimeError(f"Data fetch failed: {str(e)}")
 
-def calculate_risk_metrics(data):
-    """Calculate annualized returns and regularized covariance matrix"""
-    log_returns = np.log(data / data.shift(1)).dropna()
+def calculate_risk_metrics(data, state_path=None):
+    """Calculate annualized returns and regularized covariance matrix.
+
+    With ``state_path`` (default: the ``RISK_STATE_PATH`` environment
+    variable) the estimates come from persisted incremental statistics that
+    only process rows added since the last call. ``RISK_WINDOW`` (trading
+    days) limits the estimates to recent returns and ``RISK_DECAY``
+    (per-day factor) weights older returns down, with or without state.
+    """
+    state_path = state_path or os.environ.get("RISK_STATE_PATH")
+    window, decay = risk_settings()
+    if state_path:
+        from risk_estimator import incremental_risk_metrics
+        return incremental_risk_metrics(data, state_path, window, decay)
+    if window or decay:
+        from risk_estimator import windowed_risk_metrics
+        return windowed_risk_metrics(data, window, decay)
+    return shrunk_risk_metrics(data)
+
+def risk_settings():
+    """(window, decay) of the risk estimates, or (None, None) when neither is configured"""
+    if not (os.environ.get("RISK_WINDOW") or os.environ.get("RISK_DECAY")):
+        return None, None
+    from risk_estimator import estimator_settings
+    return estimator_settings()
+
+def shrunk_risk_metrics(data):
+    """Annualized geometric mean returns and Ledoit-Wolf covariance of ``data``"""
+    from sklearn.covariance import LedoitWolf
+
+    returns = log_returns(data)
     trading_days = 252
     
     # Geometric mean returns for long-term stability
-    mean_returns = np.exp(log_returns.mean() * trading_days) - 1
+    mean_returns = np.exp(returns.mean(axis=0) * trading_days) - 1
     
     # Regularized covariance matrix
-    cov_matrix = LedoitWolf().fit(log_returns).covariance_ * trading_days
+    cov_matrix = LedoitWolf().fit(returns).covariance_ * trading_days
     
-    return mean_returns.values, cov_matrix
+    return mean_returns, cov_matrix
+
+class PortfolioProblem:
+    """Mean-variance problem compiled once and re-solved with new parameter values.
+
+    The covariance enters through its Cholesky factor scaled by the risk
+    aversion, ``sum_squares(risk_factor @ w) == 0.5 * A * w' C w``, which keeps
+    the problem DPP-compliant so CVXPY reuses its canonicalization and the
+    solver can warm start from the previous solution.
+    """
+
+    def __init__(self, n_assets):
+        import cvxpy as cp
+
+        self.weights = cp.Variable(n_assets)
+        self.risk_factor = cp.Parameter((n_assets, n_assets))
+        self._build(cp.sum_squares(self.risk_factor @ self.weights))
+
+    def _build(self, risk, extra_constraints=()):
+        import cvxpy as cp
+
+        n_assets = self.weights.shape[0]
+        self.mean_returns = cp.Parameter(n_assets)
+        self.safe_mask = cp.Parameter(n_assets, nonneg=True)
+        self.target_safe = cp.Parameter(nonneg=True)
+
+        utility = self.mean_returns @ self.weights - risk
+        constraints = [
+            cp.sum(self.weights) == 1,
+            self.weights >= 0,
+            self.safe_mask @ self.weights >= self.target_safe,
+            *extra_constraints
+        ]
+        self.problem = cp.Problem(cp.Maximize(utility), constraints)
+
+    def _set_risk(self, cov_matrix, risk_aversion):
+        self.risk_factor.value = np.sqrt(0.5 * risk_aversion) * np.linalg.cholesky(cov_matrix).T
+
+    def solve(self, mean_returns, cov_matrix, risk_aversion, target_safe, safe_assets):
+        n_assets = len(mean_returns)
+        safe_mask = np.zeros(n_assets)
+        safe_mask[safe_assets] = 1
+
+        self.mean_returns.value = np.asarray(mean_returns, dtype=float)
+        self._set_risk(cov_matrix, risk_aversion)
+        self.safe_mask.value = safe_mask
+        self.target_safe.value = target_safe
+        self.problem.solve(warm_start=True)
+        timing.record_solve(self.problem)
+
+        if self.problem.status != 'optimal':
+            raise RuntimeError("Optimization failed to converge")
+        return self.weights.value
+
+class FactorPortfolioProblem(PortfolioProblem):
+    """Mean-variance problem over a ``FactorModel`` covariance.
+
+    Risk is ``sum_squares(exposure @ w) + sum_squares(specific_scale * w)``,
+    so the problem holds ``n_factors * n_assets`` parameters instead of a
+    dense ``n_assets ** 2`` factor and stays tractable for thousands of funds.
+    """
+
+    def __init__(self, n_assets, n_factors):
+        import cvxpy as cp
+
+        self.weights = cp.Variable(n_assets)
+        self.exposure = cp.Parameter((n_factors, n_assets))
+        self.specific_scale = cp.Parameter(n_assets, nonneg=True)
+        self._build(
+            cp.sum_squares(self.exposure @ self.weights)
+            + cp.sum_squares(cp.multiply(self.specific_scale, self.weights))
+        )
+
+    def _set_risk(self, risk_model, risk_aversion):
+        self.exposure.value = np.sqrt(0.5 * risk_aversion) * risk_model.loadings.T
+        self.specific_scale.value = np.sqrt(0.5 * risk_aversion * risk_model.specific)
+
+class CvarPortfolioProblem(PortfolioProblem):
+    """Mean-CVaR linear program over historical daily return scenarios.
+
+    CVaR at ``alpha`` uses the Rockafellar-Uryasev form
+    ``var_level + sum(excess) / ((1 - alpha) * n_scenarios)`` with
+    ``excess >= loss - var_level``. The risk aversion weighs daily CVaR
+    scaled by sqrt(252), putting it on the annual scale of the returns.
+    """
+
+    def __init__(self, n_assets, n_scenarios, alpha=0.95):
+        import cvxpy as cp
+
+        self.weights = cp.Variable(n_assets)
+        self.scenarios = cp.Parameter((n_scenarios, n_assets))
+        self.risk_weight = cp.Parameter(nonneg=True)
+        self.var_level = cp.Variable()
+        excess = cp.Variable(n_scenarios, nonneg=True)
+        self.cvar = self.var_level + cp.sum(excess) / ((1 - alpha) * n_scenarios)
+        self._build(
+            self.risk_weight * self.cvar,
+            [excess >= -(self.scenarios @ self.weights) - self.var_level]
+        )
+
+    def _set_risk(self, scenarios, risk_aversion):
+        self.scenarios.value = scenarios
+        self.risk_weight.value = risk_aversion * np.sqrt(252)
+
+_problems = {}
+
+def get_problem(n_assets, n_factors=None):
+    """Process-wide compiled problem for ``n_assets`` assets, dense or with ``n_factors`` factors"""
+    key = (n_assets, n_factors)
+    if key in _problems:
+        timing.count("problem_cache_hit")
+        return _problems[key]
+
+    timing.count("problem_cache_miss")
+    with timing.stage("build_problem"):
+        if n_factors:
+            _problems[key] = FactorPortfolioProblem(n_assets, n_factors)
+        else:
+            _problems[key] = PortfolioProblem(n_assets)
+    return _problems[key]
+
+def get_cvar_problem(n_assets, n_scenarios):
+    """Process-wide compiled mean-CVaR problem for a scenario matrix shape"""
+    key = ("cvar", n_assets, n_scenarios)
+    if key in _problems:
+        timing.count("problem_cache_hit")
+        return _problems[key]
+
+    timing.count("problem_cache_miss")
+    with timing.stage("build_problem"):
+        _problems[key] = CvarPortfolioProblem(n_assets, n_scenarios)
+    return _problems[key]
+
+def safe_target(time_period):
+    """Minimum safe-asset allocation for a 0-30 year horizon"""
+    return (30 - float(time_period)) / 30
+
+def select_safe_assets(cov_matrix, universe=None):
+    """Safe assets: the universe's safe-class funds if it is tagged, else the two lowest-volatility ones"""
+    if universe is not None and universe.tagged:
+        return universe.safe_assets()
+    variances = cov_matrix.diag() if isinstance(cov_matrix, FactorModel) else np.diag(cov_matrix)
+    volatilities = np.sqrt(variances)
+    return volatilities.argsort()[:2]
+
+def portfolio_variance(weights, cov_matrix):
+    if isinstance(cov_matrix, FactorModel):
+        return cov_matrix.variance(weights)
+    return float(weights @ cov_matrix @ weights)
+
+def solve_allocation(symbols, mean_returns, cov_matrix, risk_aversion, time_period, universe=None):
+    """Solve for one (risk_aversion, time_period) pair given precomputed risk metrics"""
+    target_safe = safe_target(time_period)
+    safe_assets = select_safe_assets(cov_matrix, universe)
+    if target_safe > 0 and len(safe_assets) == 0:
+        raise ValueError("The fund universe has no funds in a safe asset class")
+
+    n_factors = cov_matrix.n_factors if isinstance(cov_matrix, FactorModel) else None
+    weights = get_problem(len(symbols), n_factors).solve(
+        mean_returns, cov_matrix, float(risk_aversion), target_safe, safe_assets
+    )
+
+    return format_allocation(symbols, weights, mean_returns, cov_matrix)
+
+def solve_cvar_allocation(symbols, data, mean_returns, cov_matrix, risk_aversion, time_period, universe=None):
+    """Mean-CVaR allocation over the historical returns in ``data``, with its risk report"""
+    from risk_analytics import analyze, format_report
+
+    target_safe = safe_target(time_period)
+    safe_assets = select_safe_assets(cov_matrix, universe)
+    if target_safe > 0 and len(safe_assets) == 0:
+        raise ValueError("The fund universe has no funds in a safe asset class")
+
+    scenarios = np.expm1(log_returns(data))
+    weights = get_cvar_problem(len(symbols), len(scenarios)).solve(
+        mean_returns, scenarios, float(risk_aversion), target_safe, safe_assets
+    )
+
+    if isinstance(cov_matrix, FactorModel):
+        cov_matrix = cov_matrix.covariance()
+    result = format_allocation(symbols, weights, mean_returns, cov_matrix)
+    result.update(format_report(symbols, analyze(data, weights, mean_returns, cov_matrix)))
+    return result
+
+def format_allocation(symbols, weights, mean_returns, cov_matrix):
+    """Response payload for a weight vector"""
+    portfolio_return = float(mean_returns @ weights)
+    portfolio_volatility = float(np.sqrt(portfolio_variance(weights, cov_matrix)))
+
+    # Process results
+    # Solver noise can leave tiny negatives that would round to -0.0
+    optimal_weights = np.where(weights > 0, weights, 0.0).round(4)
+    allocations = {sym: round(float(w)*100, 2) for sym, w in zip(symbols, optimal_weights)}
+
+    return {
+        'expected_return': round(portfolio_return*100, 2),
+        'volatility': round(portfolio_volatility*100, 2),
+        'sharpe_ratio': round(portfolio_return/portfolio_volatility, 2),
+        'allocations': allocations
+    }
+
+def load_universe(universe=None, store=None):
+    """Configured fund universe, its prices, and the funds left out for lack of prices.
+
+    The returned universe is restricted to the funds with prices, so every
+    caller optimizes and reports over the same assets as ``optimize_portfolio``.
+    """
+    universe = universe or default_universe(SYMBOLS)
+    data = fetch_financial_data(universe.symbols, store, allow_partial=True)
+    unavailable = [sym for sym in universe.symbols if sym not in data.columns]
+    if unavailable:
+        universe = universe.subset(data.columns)
+    return universe, data, unavailable
+
+def universe_risk_metrics(universe, data):
+    """Risk estimates for ``universe``: a factor model for large universes, else the full covariance"""
+    with timing.stage("risk_metrics"):
+        if len(universe) >= FACTOR_MODEL_MIN_ASSETS:
+            return factor_risk_metrics(data)
+        return calculate_risk_metrics(data)
+
+OBJECTIVES = ("mean_variance", "cvar")
+
+def optimize_portfolio(risk_aversion, time_period, use_grid=None, objective=None):
+    """Optimal allocation for one client profile.
+
+    With ``use_grid`` (default: the ``ALLOCATION_GRID`` environment variable)
+    the answer comes from the precomputed allocation grid for the current
+    price snapshot instead of a fresh solve, once that grid has been built
+    in the background. The fund universe comes from
+    ``FUND_UNIVERSE``; large ones are solved over a factor risk model.
+
+    ``objective`` (default: ``OPTIMIZER_OBJECTIVE``, else ``mean_variance``)
+    set to ``cvar`` minimizes historical CVaR instead of variance and adds
+    VaR/CVaR, drawdown and risk contributions to the answer.
+
+    Answers are cached (see ``result_cache``) under the inputs and the price
+    store's data version, so a repeat request is served without loading
+    prices or solving until the stored prices change.
+    """
+    if use_grid is None:
+        use_grid = bool(os.environ.get("ALLOCATION_GRID"))
+    objective = objective or os.environ.get("OPTIMIZER_OBJECTIVE", "mean_variance")
+    if objective not in OBJECTIVES:
+        return {"error": f"Objective must be one of: {', '.join(OBJECTIVES)}"}
 
-def optimize_portfolio(risk_aversion, time_period):
     # Input validation
+    try:
+        risk_aversion, time_period = float(risk_aversion), float(time_period)
+    except (TypeError, ValueError):
+        return {"error": "Risk aversion and time period must be numbers"}
     if not (0 <= float(risk_aversion) <= 10):
         return {"error": "Risk aversion must be between 0 and 10"}
     if not (0 <= float(time_period) <= 30):
         return {"error": "Time period must be between 0 and 30 years"}
-    
-    symbols = [
-        '0P0000XVUB.BO',
-        '0P0000XV5S.BO', 
-        '0P0000XVK2.BO',
-        '0P0000XVJK.BO',
-        '0P0000XVU2.BO',
-        '0P0001IAU9.BO'
-    ]
-    
+
+    try:
+        universe = default_universe(SYMBOLS)
+        store = default_store()
+        cache = get_result_cache()
+        key = None
+        # Ranges still to download can change the answer, so those requests bypass the cache;
+        # symbols in failure backoff do not count as missing until they are due for a retry
+        if cache is not None and not store.missing_ranges(universe.symbols, START_DATE, END_DATE):
+            key = cache.make_key(
+                "optimize", store.path, store.version(), universe.symbols, universe.asset_classes,
+                risk_settings(), bool(use_grid), objective, float(risk_aversion), float(time_period)
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Funds whose prices could not be fetched are left out of this answer
+        universe, data, unavailable = load_universe(universe, store)
+        large = len(universe) >= FACTOR_MODEL_MIN_ASSETS
+        grid = None
+        if use_grid and objective == "mean_variance" and not large and not universe.tagged:
+            from allocation_grid import get_grid
+            # A grid still being built for new prices is not waited for; this request solves directly
+            grid = get_grid(data, universe.symbols, wait=False)
+        if grid is not None:
+            with timing.stage("grid_lookup"):
+                result = grid.lookup(risk_aversion, time_period)
+        else:
+            mean_returns, cov_matrix = universe_risk_metrics(universe, data)
+            with timing.stage("solve"):
+                if objective == "cvar":
+                    result = solve_cvar_allocation(
+                        universe.symbols, data, mean_returns, cov_matrix, risk_aversion, time_period, universe
+                    )
+                else:
+                    result = solve_allocation(
+                        universe.symbols, mean_returns, cov_matrix, risk_aversion, time_period, universe
+                    )
+        if unavailable and "error" not in result:
+            result["unavailable"] = unavailable
+        if key is not None and "error" not in result:
+            cache.put(key, result)
+        return result
+
+    except Exception as e:
+        return {"error": str(e)}
+
+def analyze_portfolios(candidates):
+    """Risk report for each candidate weight vector (in percent, summing to 100) over the fund universe"""
+    from risk_analytics import analyze, format_report
+
     try:
-        data = fetch_financial_data(symbols)
+        universe = default_universe(SYMBOLS)
+        weights = np.asarray(candidates, dtype=float) / 100
+        if weights.ndim == 1:
+            weights = weights[None, :]
+        if weights.ndim != 2 or weights.shape[1] != len(universe):
+            return {"error": f"Each candidate needs {len(universe)} weights, ordered as {', '.join(universe.symbols)}"}
+        # Candidates weight every fund, so all of them need prices
+        data = fetch_financial_data(universe.symbols)
         mean_returns, cov_matrix = calculate_risk_metrics(data)
-        
-        # Convex optimization setup
-        weights = cp.Variable(len(symbols))
-        target_safe = (30 - float(time_period)) / 30  # 0-30 year horizon
-        
-        # Dynamic safe asset selection (lowest volatility)
-        volatilities = np.sqrt(np.diag(cov_matrix))
-        safe_assets = volatilities.argsort()[:2]
-        
-        # Optimization constraints
-        constraints = [
-            cp.sum(weights) == 1,
-            weights >= 0,
-            cp.sum(weights[safe_assets]) >= target_safe
-        ]
-        
-        # Objective function
-        portfolio_return = mean_returns @ weights
-        portfolio_volatility = cp.quad_form(weights, cov_matrix)
-        utility = portfolio_return - 0.5 * float(risk_aversion) * portfolio_volatility
-        
-        problem = cp.Problem(cp.Maximize(utility), constraints)
-        problem.solve()
-        
-        if problem.status != 'optimal':
-            raise RuntimeError("Optimization failed to converge")
-        
-        # Process results
-        optimal_weights = weights.value.round(4)
-        allocations = {sym: round(w*100, 2) for sym, w in zip(symbols, optimal_weights)}
-        
-        return {
-            'expected_return': round(portfolio_return.value*100, 2),
-            'volatility': round(np.sqrt(portfolio_volatility.value)*100, 2),
-            'sharpe_ratio': round((portfolio_return.value/np.sqrt(portfolio_volatility.value)), 2),
-            'allocations': allocations
-        }
-        
+        with timing.stage("risk_analytics"):
+            report = analyze(data, weights, mean_returns, cov_matrix)
+        return {"candidates": [format_report(universe.symbols, report, i) for i in range(len(weights))]}
     except Exception as e:
         return {"error": str(e)}
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
+class RequestTimeout(BaseException):
+    # BaseException so optimize_portfolio's catch-all does not swallow it
+    pass
+
+def _raise_timeout(signum, frame):
+    raise RequestTimeout()
+
+ACTIONS = ("optimize", "risk", "glide_path", "project", "frontier", "cache_stats")
+
+def run_action(request):
+    """Dispatch a worker request on its ``action`` (default ``optimize``)"""
+    action = request.get("action", "optimize")
+    if action == "optimize":
+        return optimize_portfolio(
+            request.get("risk_aversion"), request.get("time_period"), objective=request.get("objective")
+        )
+    if action == "risk":
+        return analyze_portfolios(request.get("weights"))
+    if action == "glide_path":
+        from glide_path import plan_glide_path, DEFAULT_TURNOVER_COST
+        return plan_glide_path(
+            request.get("risk_aversion"), request.get("time_period"), request.get("current"),
+            request.get("turnover_cost", DEFAULT_TURNOVER_COST)
+        )
+    if action == "project":
+        from projection import project_portfolio
+        return project_portfolio(
+            request.get("risk_aversion"), request.get("time_period"), request.get("monthly_sip", 0),
+            request.get("initial", 0), request.get("step_up", 0), request.get("goal"),
+            request.get("method", "normal"), request.get("paths", 100_000)
+        )
+    if action == "frontier":
+        from efficient_frontier import get_frontier
+        return get_frontier(request.get("points", 50))
+    if action == "cache_stats":
+        cache = get_result_cache()
+        return {"result_cache": dict(cache.stats, entries=len(cache)) if cache is not None else None}
+    return {"error": f"Unknown action: {action}"}
+
+_ID_PATTERN = re.compile(r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+
+def _recover_id(line):
+    """``id`` of a request that is not valid JSON, when one can be picked out of the raw line"""
+    match = _ID_PATTERN.search(line)
+    return json.loads(match.group(1)) if match else None
+
+def handle_request(line, timeout=None):
+    """Answer one newline-delimited JSON request with a JSON line.
+
+    Every request is timed stage by stage. The timings are added to the
+    response under ``timing`` when the request sets ``"timing": true`` and
+    written to stderr as a JSON line when ``OPTIMIZER_TIMING`` is set.
+    ``OPTIMIZER_PROFILE_DIR`` additionally runs each request under cProfile
+    and keeps one profile file per request there.
+    """
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError:
+        return json.dumps({"id": _recover_id(line), "error": "Invalid JSON input"})
+    if not isinstance(request, dict):
+        return json.dumps({"id": None, "error": "Request must be a JSON object"})
+
+    request_id = request.get("id")
+    action = request.get("action", "optimize")
+    # The action names the profile file, so anything unrecognised gets a fixed label
+    action = action if action in ACTIONS else "unknown"
+    profile_dir = os.environ.get("OPTIMIZER_PROFILE_DIR")
+    with timing.request(profile_dir, label=action) as stats:
+        if timeout:
+            signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            result = run_action(request)
+        except RequestTimeout:
+            result = {"error": f"Request timed out after {timeout}s"}
+        except Exception as e:
+            # A bad request must not take the resident worker down with it
+            result = {"error": str(e)}
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        with timing.stage("encode"):
+            response = json.dumps({"id": request_id, **result})
+
+    report = stats.as_dict()
+    if os.environ.get("OPTIMIZER_TIMING"):
+        print(json.dumps({"event": "timing", "id": request_id, "action": action, "pid": os.getpid(), **report}),
+              file=sys.stderr, flush=True)
+    if request.get("timing"):
+        response = json.dumps({"id": request_id, **result, "timing": report})
+    return response
+
+def serve_stream(stream_in, stream_out, timeout=None):
+    """Serve requests from a line-oriented stream until it closes"""
+    for line in stream_in:
+        if not line.strip():
+            continue
+        stream_out.write(handle_request(line, timeout) + "\n")
+        stream_out.flush()
+
+def serve_socket(path, workers, timeout=None):
+    """Serve a Unix socket from ``workers`` pre-forked, already-warm processes.
+
+    Each worker accepts one connection at a time; a worker that dies is
+    replaced by the supervisor.
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    children = set()
+
+    def spawn_worker():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                while True:
+                    conn, _ = listener.accept()
+                    with conn, conn.makefile("r", encoding="utf-8") as stream_in, \
+                            conn.makefile("w", encoding="utf-8") as stream_out:
+                        serve_stream(stream_in, stream_out, timeout)
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    def shutdown(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    for _ in range(workers):
+        spawn_worker()
+    try:
+        while True:
+            pid, _ = os.wait()
+            children.discard(pid)
+            spawn_worker()
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        listener.close()
+        os.unlink(path)
+
+def main(argv):
+    if argv and argv[0] == "--serve":
+        parser = argparse.ArgumentParser(prog="portfolio_optimizer.py --serve")
+        parser.add_argument("--socket", help="Unix socket path (default: stdin/stdout)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--timeout", type=float, default=None, help="Per-request timeout in seconds")
+        args = parser.parse_args(argv[1:])
+        if args.socket:
+            serve_socket(args.socket, args.workers, args.timeout)
+        else:
+            serve_stream(sys.stdin, sys.stdout, args.timeout)
+        return
+
+    if len(argv) != 2:
         print(json.dumps({"error": "Requires risk_aversion (0-10) and time_period (0-30)"}))
         sys.exit(1)
-        
-    result = optimize_portfolio(sys.argv[1], sys.argv[2])
+
+    result = optimize_portfolio(argv[0], argv[1])
     print(json.dumps(result))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,386 @@
+import os
+import fcntl
+import datetime
+import hashlib
+import sqlite3
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+import timing
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices.sqlite")
+# Recorded Yahoo closes for the default six funds, for offline runs and benchmarks
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stock_data_cache.pkl")
+# Seconds before a symbol the source failed to return is tried again; doubles on each further failure
+DEFAULT_FAILURE_BACKOFF = 300
+MAX_FAILURE_BACKOFF = 24 * 3600
+
+
+class PriceSource:
+    """Interface for anything that can supply daily close prices"""
+
+    def fetch(self, symbols, start, end):
+        """Return a DataFrame of closes indexed by date with one column per symbol.
+
+        ``start`` is inclusive and ``end`` exclusive, both ISO date strings.
+        """
+        raise NotImplementedError
+
+
+class YahooSource(PriceSource):
+    """Download adjusted closes from Yahoo Finance"""
+
+    def fetch(self, symbols, start, end):
+        import yfinance as yf
+
+        data = yf.download(list(symbols), start=start, end=end, auto_adjust=True, progress=False)['Close']
+        if isinstance(data, pd.Series):
+            data = data.to_frame(symbols[0])
+        return data
+
+
+class CsvSource(PriceSource):
+    """Read closes from local CSV files.
+
+    ``path`` is either a single wide CSV (a ``Date`` column plus one column per
+    symbol) or a directory holding one ``<symbol>.csv`` per symbol with
+    ``Date`` and ``Close`` columns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read_all(self, symbols):
+        if os.path.isdir(self.path):
+            frames = {}
+            for sym in symbols:
+                file_path = os.path.join(self.path, f"{sym}.csv")
+                if os.path.exists(file_path):
+                    frame = pd.read_csv(file_path, index_col='Date', parse_dates=True)
+                    frames[sym] = frame['Close']
+            return pd.DataFrame(frames)
+        data = pd.read_csv(self.path, index_col='Date', parse_dates=True)
+        return data[[sym for sym in symbols if sym in data.columns]]
+
+    def fetch(self, symbols, start, end):
+        data = self._read_all(symbols)
+        return data.loc[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+
+class PickleSource(CsvSource):
+    """Read closes from a pickled wide DataFrame, such as a recorded download"""
+
+    def _read_all(self, symbols):
+        data = pd.read_pickle(self.path)
+        return data[[sym for sym in symbols if sym in data.columns]]
+
+
+class RandomWalkSource(PriceSource):
+    """Deterministic synthetic prices, handy as an offline fixture feed"""
+
+    def __init__(self, seed=0, drift=0.0003, vol=0.01):
+        self.seed = seed
+        self.drift = drift
+        self.vol = vol
+
+    def fetch(self, symbols, start, end):
+        dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        frames = {}
+        for sym in symbols:
+            # Seed per symbol and date so overlapping ranges agree with each other
+            rng = np.random.default_rng([self.seed, sum(map(ord, sym))])
+            full = pd.bdate_range("2000-01-03", dates[-1]) if len(dates) else dates
+            steps = rng.normal(self.drift, self.vol, len(full))
+            prices = pd.Series(100 * np.exp(np.cumsum(steps)), index=full)
+            frames[sym] = prices.reindex(dates)
+        return pd.DataFrame(frames, index=dates)
+
+
+def source_from_spec(spec):
+    """Build a source from a spec string.
+
+    ``yahoo`` (concurrent per-symbol downloads), ``yahoo-batch`` (one
+    download for all symbols), an ``http://`` or ``https://`` URL template
+    (see ``async_fetch.HttpSource``), ``csv:<path>``, ``pickle:<path>``,
+    ``random:<seed>``, or ``fixture`` for the recorded prices in
+    ``stock_data_cache.pkl``.
+    """
+    kind, _, arg = (spec or "yahoo").partition(":")
+    if kind == "yahoo":
+        from async_fetch import AsyncYahooSource, fetch_options
+        return AsyncYahooSource(**fetch_options())
+    if kind == "yahoo-batch":
+        return YahooSource()
+    if kind in ("http", "https"):
+        from async_fetch import HttpSource, fetch_options
+        return HttpSource(spec, **fetch_options())
+    if kind == "csv":
+        return CsvSource(arg)
+    if kind == "pickle":
+        return PickleSource(arg)
+    if kind == "fixture":
+        return PickleSource(FIXTURE_PATH)
+    if kind == "random":
+        return RandomWalkSource(seed=int(arg or 0))
+    raise ValueError(f"Unknown price source: {spec}")
+
+
+def _next_day(date):
+    return (datetime.date.fromisoformat(date) + datetime.timedelta(days=1)).isoformat()
+
+def _joins(date, start, end):
+    """Whether ``date`` can extend the covered [start, end) range without leaving a weekday uncovered"""
+    first, last = (end, date) if date >= end else (_next_day(date), start)
+    day, last = datetime.date.fromisoformat(first), datetime.date.fromisoformat(last)
+    while day < last:
+        if day.weekday() < 5:
+            return False
+        day += datetime.timedelta(days=1)
+    return True
+
+
+class PriceStore:
+    """SQLite-backed store of daily closes keyed by symbol and date.
+
+    Only the date ranges not yet covered for a symbol are requested from the
+    source; everything else is served from disk. A symbol the source fails
+    to return is not asked for again until its backoff (``failure_backoff``
+    seconds, doubling per failure) has passed.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, source=None, failure_backoff=DEFAULT_FAILURE_BACKOFF):
+        self.path = path
+        self.source = source or YahooSource()
+        self.failure_backoff = failure_backoff
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS prices (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                close REAL NOT NULL,
+                PRIMARY KEY (symbol, date)
+            );
+            CREATE TABLE IF NOT EXISTS coverage (
+                symbol TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS failures (
+                symbol TEXT PRIMARY KEY,
+                failures INTEGER NOT NULL,
+                retry_after REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def version(self):
+        """Counter bumped by every write, so anything derived from the stored prices can key on it"""
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def _coverage(self, symbols):
+        placeholders = ",".join("?" * len(symbols))
+        rows = self.conn.execute(
+            f"SELECT symbol, start, end FROM coverage WHERE symbol IN ({placeholders})", list(symbols)
+        ).fetchall()
+        return {sym: (start, end) for sym, start, end in rows}
+
+    def backed_off(self, symbols):
+        """Symbols among ``symbols`` whose last fetch failed and that are not due for a retry yet"""
+        placeholders = ",".join("?" * len(symbols))
+        rows = self.conn.execute(
+            f"SELECT symbol FROM failures WHERE symbol IN ({placeholders}) AND retry_after > ?",
+            [*symbols, time.time()],
+        ).fetchall()
+        return {sym for sym, in rows}
+
+    def missing_ranges(self, symbols, start, end):
+        """Group symbols by the [start, end) ranges that still need fetching.
+
+        Symbols in failure backoff are left out, so callers treat the rest of
+        the data as complete until they are due for a retry.
+        """
+        coverage = self._coverage(symbols)
+        skip = self.backed_off(symbols)
+        pending = {}
+        for sym in symbols:
+            if sym in skip:
+                continue
+            if sym not in coverage:
+                ranges = [(start, end)]
+            else:
+                have_start, have_end = coverage[sym]
+                ranges = []
+                if start < have_start:
+                    ranges.append((start, have_start))
+                if end > have_end:
+                    ranges.append((have_end, end))
+            for rng in ranges:
+                pending.setdefault(rng, []).append(sym)
+        return pending
+
+    def _write(self, data, symbols, start, end):
+        # Symbols the source failed to return stay uncovered and are retried once their backoff passes
+        failed = [sym for sym in symbols if sym not in data.columns]
+        symbols = [sym for sym in symbols if sym in data.columns]
+        now = time.time()
+        failures = {sym: 1 for sym in failed}
+        if failed:
+            placeholders = ",".join("?" * len(failed))
+            failures.update((sym, count + 1) for sym, count in self.conn.execute(
+                f"SELECT symbol, failures FROM failures WHERE symbol IN ({placeholders})", failed
+            ))
+        rows = []
+        for sym in symbols:
+            series = data[sym].dropna()
+            rows.extend(
+                (sym, ts.strftime("%Y-%m-%d"), float(val)) for ts, val in series.items()
+            )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO prices (symbol, date, close) VALUES (?, ?, ?)", rows
+            )
+            self.conn.executemany(
+                """INSERT INTO coverage (symbol, start, end) VALUES (?, ?, ?)
+                   ON CONFLICT(symbol) DO UPDATE SET
+                       start = MIN(start, excluded.start),
+                       end = MAX(end, excluded.end)""",
+                [(sym, start, end) for sym in symbols],
+            )
+            self.conn.executemany("DELETE FROM failures WHERE symbol = ?", [(sym,) for sym in symbols])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO failures (symbol, failures, retry_after) VALUES (?, ?, ?)",
+                [(sym, count, now + min(self.failure_backoff * 2 ** (count - 1), MAX_FAILURE_BACKOFF))
+                 for sym, count in failures.items()],
+            )
+            if symbols:
+                self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        timing.count("price_symbols_backed_off", len(failed))
+
+    def add_closes(self, rows):
+        """Store (symbol, 'YYYY-MM-DD', close) observations that arrive from outside the source.
+
+        Used for pushed data such as daily NAV files. Only symbols the store
+        already tracks (those with coverage) count: their coverage grows by
+        the new dates that join it without skipping a weekday, and the
+        version is bumped only if one of them was written. Other symbols are
+        stored but left uncovered, so their first request still fetches the
+        full range.
+        """
+        rows = list(rows)
+        dates = {}
+        for sym, date, _ in rows:
+            dates.setdefault(sym, set()).add(date)
+        coverage = self._coverage(list(dates)) if dates else {}
+        extended = []
+        for sym, (start, end) in coverage.items():
+            # Walk outwards from the covered range so runs of new dates chain onto it
+            for date in sorted((d for d in dates[sym] if d >= end)):
+                if not _joins(date, start, end):
+                    break
+                end = _next_day(date)
+            for date in sorted((d for d in dates[sym] if d < start), reverse=True):
+                if not _joins(date, start, end):
+                    break
+                start = date
+            extended.append((start, end, sym))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO prices (symbol, date, close) VALUES (?, ?, ?)", rows
+            )
+            self.conn.executemany("UPDATE coverage SET start = ?, end = ? WHERE symbol = ?", extended)
+            if coverage:
+                self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return len(rows)
+
+    @contextmanager
+    def _refresh_lock(self):
+        """Serialize refreshes across processes sharing this store"""
+        if self.path == ":memory:":
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def refresh(self, symbols, start, end):
+        """Fetch any uncovered ranges from the source; returns the number of fetches made.
+
+        Processes that need the same ranges at the same time wait for the
+        first one's download instead of repeating it.
+        """
+        if not self.missing_ranges(symbols, start, end):
+            return 0
+        with self._refresh_lock():
+            pending = self.missing_ranges(symbols, start, end)
+            for (rng_start, rng_end), syms in pending.items():
+                with timing.stage("download"):
+                    data = self.source.fetch(syms, rng_start, rng_end)
+                self._write(data, syms, rng_start, rng_end)
+        timing.count("price_downloads", len(pending))
+        return len(pending)
+
+    def load(self, symbols, start, end):
+        """Return the raw stored closes without fetching"""
+        placeholders = ",".join("?" * len(symbols))
+        with timing.stage("load_prices"):
+            frame = pd.read_sql_query(
+                f"""SELECT symbol, date, close FROM prices
+                    WHERE symbol IN ({placeholders}) AND date >= ? AND date < ?""",
+                self.conn,
+                params=[*symbols, start, end],
+            )
+            data = frame.pivot(index='date', columns='symbol', values='close')
+            data.index = pd.to_datetime(data.index)
+        return data.reindex(columns=list(symbols)).sort_index()
+
+    def get_close_matrix(self, symbols, start, end):
+        """Cleaned close matrix (forward-filled, incomplete dates dropped) in ``symbols`` order.
+
+        Symbols without any stored prices are left out rather than emptying
+        the whole matrix.
+        """
+        self.refresh(symbols, start, end)
+        return self.load(symbols, start, end).dropna(axis=1, how='all').ffill().dropna()
+
+
+def snapshot_id(data):
+    """Short content hash of a close matrix, used to key anything derived from it"""
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(map(str, data.columns)).encode())
+    digest.update(data.index.values.astype("datetime64[ns]").tobytes())
+    digest.update(np.ascontiguousarray(data.values, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+_stores = {}
+
+def default_store():
+    """Process-wide store configured from ``PRICE_STORE_PATH``, ``PRICE_SOURCE`` and ``PRICE_FAILURE_BACKOFF``.
+
+    One store, and so one source and fetch loop, is kept per configuration,
+    which lets concurrent fetches coalesce across requests.
+    """
+    key = (
+        os.environ.get("PRICE_STORE_PATH", DEFAULT_STORE_PATH),
+        os.environ.get("PRICE_SOURCE", "yahoo"),
+        float(os.environ.get("PRICE_FAILURE_BACKOFF", DEFAULT_FAILURE_BACKOFF)),
+    )
+    if key not in _stores:
+        path, spec, backoff = key
+        _stores[key] = PriceStore(path, source_from_spec(spec), backoff)
+    return _stores[key]
@@ -0,0 +1,190 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from shared_prices import log_returns
+
+MONTHS_PER_YEAR = 12
+TRADING_DAYS_PER_MONTH = 21
+PERCENTILES = (5, 25, 50, 75, 95)
+METHODS = ("normal", "bootstrap")
+
+def _weights_by_year(weights, years):
+    """(years, n_assets) allocation rows; a single vector is held for the whole horizon"""
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim == 1:
+        return np.tile(weights, (years, 1))
+    if len(weights) < years:
+        weights = np.vstack([weights, np.tile(weights[-1], (years - len(weights), 1))])
+    return weights[:years]
+
+def normal_parameters(weights_by_year, mean_returns, cov_matrix):
+    """Monthly log-return mean and volatility of each year's rebalanced portfolio.
+
+    Asset log returns are jointly normal with the annualized covariance
+    ``cov_matrix``, and ``mean_returns`` are annualized geometric means.
+    A portfolio rebalanced to fixed weights is then lognormal with log
+    variance ``w' C w`` and log drift ``w' g + (w' diag(C) - w' C w) / 2``,
+    so each month needs one correlated draw per path rather than one per
+    asset.
+    """
+    growth = np.log1p(np.asarray(mean_returns, dtype=float))
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    variance = np.einsum('yi,ij,yj->y', weights_by_year, cov_matrix, weights_by_year)
+    drift = weights_by_year @ growth + 0.5 * (weights_by_year @ np.diag(cov_matrix) - variance)
+    return drift / MONTHS_PER_YEAR, np.sqrt(variance / MONTHS_PER_YEAR)
+
+def monthly_blocks(data, weights_by_year):
+    """Historical 21-day portfolio log returns for every start day, one row per year's weights"""
+    daily = np.log1p(np.expm1(log_returns(data)) @ weights_by_year.T).T
+    totals = np.concatenate([np.zeros((len(daily), 1)), np.cumsum(daily, axis=1)], axis=1)
+    return totals[:, TRADING_DAYS_PER_MONTH:] - totals[:, :-TRADING_DAYS_PER_MONTH]
+
+def contribution_schedule(months, monthly_sip=0.0, initial=0.0, step_up=0.0):
+    """Cash added at the start of each month: the lump sum, then SIPs raised by ``step_up`` every year"""
+    contributions = monthly_sip * (1 + step_up) ** (np.arange(months) // MONTHS_PER_YEAR)
+    contributions[0] += initial
+    return contributions
+
+def _checkpoints(months):
+    return np.unique(np.r_[np.arange(MONTHS_PER_YEAR, months + 1, MONTHS_PER_YEAR), months]) - 1
+
+def _simulate_chunks(args):
+    (method, params, contributions, block_months, chunks) = args
+    months = len(contributions)
+    checkpoints = _checkpoints(months)
+    year_of_month = np.minimum(np.arange(months) // MONTHS_PER_YEAR, len(params[0]) - 1)
+    results = []
+    for seed, size in chunks:
+        rng = np.random.default_rng(seed)
+        if method == "normal":
+            drift, volatility = params
+            growth = rng.standard_normal((months, size), dtype=np.float32)
+            growth *= volatility[year_of_month, None].astype(np.float32)
+            growth += drift[year_of_month, None].astype(np.float32)
+        else:
+            blocks = params[0]
+            n_blocks = -(-months // block_months)
+            last_start = blocks.shape[1] - (block_months - 1) * TRADING_DAYS_PER_MONTH
+            starts = rng.integers(0, last_start, (n_blocks, 1, size))
+            days = starts + (np.arange(block_months) * TRADING_DAYS_PER_MONTH)[None, :, None]
+            days = days.reshape(n_blocks * block_months, size)[:months]
+            growth = blocks[year_of_month[:, None], days].astype(np.float32)
+        np.exp(growth, out=growth)
+
+        wealth = np.zeros(size)
+        snapshots = np.empty((size, len(checkpoints)), dtype=np.float32)
+        column = 0
+        for month in range(months):
+            wealth += contributions[month]
+            wealth *= growth[month]
+            if month == checkpoints[column]:
+                snapshots[:, column] = wealth
+                column += 1
+        results.append(snapshots)
+    return np.vstack(results)
+
+def project(weights, mean_returns, cov_matrix, years, monthly_sip=0.0, initial=0.0, step_up=0.0,
+            goal=None, paths=100_000, method="normal", data=None, block_months=12,
+            chunk_size=10_000, seed=None, processes=1, percentiles=PERCENTILES):
+    """Distribution of portfolio value over ``years`` from ``paths`` simulated market paths.
+
+    ``weights`` is one allocation, or one row per year (e.g. a glide path).
+    ``method`` "normal" draws correlated lognormal returns from
+    ``mean_returns``/``cov_matrix``; "bootstrap" resamples blocks of
+    ``block_months`` consecutive historical months from the closes in
+    ``data``. Paths are generated ``chunk_size`` at a time from their own
+    child seeds, so memory is bounded by the chunk and a seeded run gives the
+    same answer for any ``processes``.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of: {', '.join(METHODS)}")
+    months = max(1, int(round(float(years) * MONTHS_PER_YEAR)))
+    n_years = -(-months // MONTHS_PER_YEAR)
+    weights_by_year = _weights_by_year(weights, n_years)
+
+    if method == "normal":
+        params = normal_parameters(weights_by_year, mean_returns, cov_matrix)
+    else:
+        if data is None:
+            raise ValueError("Block bootstrap needs the historical closes")
+        params = (monthly_blocks(data, weights_by_year),)
+        if params[0].shape[1] <= (block_months - 1) * TRADING_DAYS_PER_MONTH:
+            raise ValueError("Price history is shorter than one bootstrap block")
+    contributions = contribution_schedule(months, monthly_sip, initial, step_up)
+
+    sizes = [chunk_size] * (paths // chunk_size)
+    if paths % chunk_size:
+        sizes.append(paths % chunk_size)
+    chunks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    task = lambda shard: (method, params, contributions, block_months, shard)
+
+    if processes <= 1 or len(chunks) == 1:
+        values = _simulate_chunks(task(chunks))
+    else:
+        shards = [chunks[i::processes] for i in range(processes) if chunks[i::processes]]
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            values = np.vstack(list(pool.map(_simulate_chunks, [task(shard) for shard in shards])))
+
+    checkpoints = _checkpoints(months)
+    bands = np.percentile(values, percentiles, axis=0)
+    result = {
+        'years': [round(float(m + 1) / MONTHS_PER_YEAR, 2) for m in checkpoints],
+        'contributed': [round(float(c), 2) for c in np.cumsum(contributions)[checkpoints]],
+        'percentiles': {str(p): [round(float(v), 2) for v in band] for p, band in zip(percentiles, bands)},
+        'mean_final': round(float(values[:, -1].mean()), 2),
+        'paths': int(paths),
+        'method': method,
+    }
+    if goal is not None:
+        result['goal'] = float(goal)
+        result['goal_probability'] = round(float((values[:, -1] >= goal).mean()) * 100, 2)
+    return result
+
+def project_portfolio(risk_aversion, time_period, monthly_sip=0.0, initial=0.0, step_up=0.0, goal=None,
+                      method="normal", paths=100_000, seed=None):
+    """Optimize for a client profile, then project the recommended allocation over its horizon.
+
+    The projection uses the funds the optimizer answered with, and the same
+    universe prices and risk estimates it solved over.
+    """
+    from portfolio_optimizer import load_universe, optimize_portfolio, universe_risk_metrics
+    from risk_model import FactorModel
+
+    try:
+        time_period, paths = float(time_period), int(paths)
+        monthly_sip, initial, step_up = float(monthly_sip), float(initial), float(step_up)
+        goal = None if goal is None else float(goal)
+    except (TypeError, ValueError):
+        return {"error": "Time period, paths, contributions and goal must be numbers"}
+    if not (0 < time_period <= 30):
+        return {"error": "Time period must be between 0-30 years"}
+    if not (1_000 <= paths <= 1_000_000):
+        return {"error": "Paths must be between 1,000 and 1,000,000"}
+    if monthly_sip < 0 or initial < 0 or (monthly_sip == 0 and initial == 0):
+        return {"error": "Provide a positive monthly SIP or initial investment"}
+
+    allocation = optimize_portfolio(risk_aversion, time_period)
+    if "error" in allocation:
+        return allocation
+    try:
+        universe, data, _ = load_universe()
+        mean_returns, cov_matrix = universe_risk_metrics(universe, data)
+        symbols = list(allocation['allocations'])
+        missing = [sym for sym in symbols if sym not in universe.symbols]
+        if missing:
+            return {"error": f"No prices for {', '.join(missing)}"}
+        index = [universe.symbols.index(sym) for sym in symbols]
+        if isinstance(cov_matrix, FactorModel):
+            loadings = cov_matrix.loadings[index]
+            cov_matrix = loadings @ loadings.T + np.diag(cov_matrix.specific[index])
+        else:
+            cov_matrix = np.asarray(cov_matrix)[np.ix_(index, index)]
+        mean_returns, data = np.asarray(mean_returns)[index], data[symbols]
+        weights = np.array([allocation['allocations'][sym] for sym in symbols]) / 100
+        projection = project(
+            weights / weights.sum(), mean_returns, cov_matrix, time_period, monthly_sip,
+            initial, step_up, goal, paths, method, data, seed=seed,
+        )
+        return {'allocation': allocation, **projection}
+    except Exception as e:
+        return {"error": str(e)}
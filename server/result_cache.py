@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+
+import timing
+
+DEFAULT_TTL = 3600
+DEFAULT_SIZE = 1024
+
+class ResultCache:
+    """Response cache with an in-process LRU tier and an optional on-disk tier.
+
+    Entries expire ``ttl`` seconds after they are stored. The disk tier is a
+    directory of one JSON file per key, written atomically, so every worker
+    process pointed at the same directory shares it; it is pruned back to
+    ``max_entries`` files, oldest first. Values are held as JSON text, so
+    every hit is a fresh copy that callers may change freely.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SIZE, ttl=DEFAULT_TTL, directory=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._disk_writes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        """Entries held in the in-process tier"""
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key, expires, encoded):
+        self._entries[key] = (expires, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires"] <= time.time():
+            self.stats["expired"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        return entry["expires"], entry["value"]
+
+    def get(self, key):
+        """Cached value for ``key`` (a fresh copy), or None"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self._entries[key]
+            self.stats["expired"] += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            timing.count("result_cache_hit")
+            return json.loads(entry[1])
+
+        if self.directory:
+            entry = self._read_disk(key)
+            if entry is not None:
+                expires, value = entry
+                self._remember(key, expires, json.dumps(value))
+                self.stats["disk_hits"] += 1
+                timing.count("result_cache_disk_hit")
+                return value
+
+        self.stats["misses"] += 1
+        timing.count("result_cache_miss")
+        return None
+
+    def put(self, key, value):
+        expires = time.time() + self.ttl
+        encoded = json.dumps(value)
+        self._remember(key, expires, encoded)
+        if not self.directory:
+            return
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"expires": expires, "value": value}, f)
+        os.replace(tmp_path, self._path(key))
+        self._disk_writes += 1
+        if self._disk_writes % 64 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda path: os.stat(path).st_mtime)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+                self.stats["evictions"] += 1
+            except OSError:
+                pass
+
+    def clear(self):
+        self._entries.clear()
+
+_cache = None
+
+def get_result_cache():
+    """Process-wide cache configured from the environment, or None when disabled.
+
+    ``RESULT_CACHE_SIZE`` bounds the in-process tier (0 disables caching),
+    ``RESULT_CACHE_TTL`` sets the lifetime in seconds and
+    ``RESULT_CACHE_DIR`` turns on the shared on-disk tier.
+    """
+    global _cache
+    size = int(os.environ.get("RESULT_CACHE_SIZE", DEFAULT_SIZE))
+    if size <= 0:
+        return None
+    if _cache is None:
+        _cache = ResultCache(
+            size,
+            float(os.environ.get("RESULT_CACHE_TTL", DEFAULT_TTL)),
+            os.environ.get("RESULT_CACHE_DIR") or None,
+        )
+    return _cache
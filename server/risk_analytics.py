@@ -0,0 +1,108 @@
+import numpy as np
+from statistics import NormalDist
+
+from shared_prices import log_returns
+
+TRADING_DAYS = 252
+DRAWDOWN_BLOCK = 64
+
+def _as_matrix(weights):
+    weights = np.asarray(weights, dtype=float)
+    return weights[None, :] if weights.ndim == 1 else weights
+
+def portfolio_returns(returns, weights):
+    """Daily simple returns (days, candidates) of every weight vector, as one product"""
+    return np.expm1(returns) @ _as_matrix(weights).T
+
+def historical_var_cvar(port_returns, alpha=0.95):
+    """Historical VaR and CVaR (as positive losses) of each column of ``port_returns``"""
+    n_tail = max(1, int(np.ceil((1 - alpha) * len(port_returns))))
+    tail = np.partition(port_returns, n_tail - 1, axis=0)[:n_tail]
+    var = -tail.max(axis=0)
+    cvar = -tail.mean(axis=0)
+    return var, cvar
+
+def parametric_var_cvar(weights, mean_returns, cov_matrix, alpha=0.95, horizon_days=1):
+    """Gaussian VaR and CVaR over ``horizon_days`` from annualized mean returns and covariance"""
+    weights = _as_matrix(weights)
+    scale = horizon_days / TRADING_DAYS
+    mean = weights @ mean_returns * scale
+    sigma = np.sqrt(np.einsum('ki,ij,kj->k', weights, cov_matrix, weights) * scale)
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - alpha)
+    var = -(mean + z * sigma)
+    cvar = -(mean - sigma * normal.pdf(z) / (1 - alpha))
+    return var, cvar
+
+def risk_contributions(weights, cov_matrix):
+    """Each asset's share of portfolio variance, (candidates, assets) rows summing to 1"""
+    weights = _as_matrix(weights)
+    marginal = weights @ cov_matrix
+    contributions = weights * marginal
+    return contributions / contributions.sum(axis=1, keepdims=True)
+
+def max_drawdown(port_returns):
+    """Worst peak-to-trough fall (as a positive fraction) of each column"""
+    drawdowns = np.empty(port_returns.shape[1])
+    # Column blocks keep the running wealth/peak arrays cache-sized
+    for start in range(0, port_returns.shape[1], DRAWDOWN_BLOCK):
+        block = slice(start, start + DRAWDOWN_BLOCK)
+        wealth = port_returns[:, block] + 1
+        np.cumprod(wealth, axis=0, out=wealth)
+        peaks = np.maximum.accumulate(wealth, axis=0)
+        np.maximum(peaks, 1, out=peaks)
+        np.divide(wealth, peaks, out=peaks)
+        drawdowns[block] = 1 - peaks.min(axis=0)
+    return drawdowns
+
+def momentum_days(data, lookback=90):
+    """Lookback actually available: ``lookback`` days, or the whole history when it is shorter"""
+    return max(min(lookback, len(data) - 1), 0)
+
+def momentum_scores(data, weights, lookback=90):
+    """Weighted ``lookback``-day price return of each candidate, over the whole
+    history when it is shorter than ``lookback`` days"""
+    prices = np.asarray(data.values)
+    asset_momentum = prices[-1] / prices[-1 - momentum_days(data, lookback)] - 1
+    return _as_matrix(weights) @ asset_momentum
+
+def analyze(data, weights, mean_returns, cov_matrix, alpha=0.95, lookback=90):
+    """Risk figures for many candidate portfolios over the same price history.
+
+    ``weights`` is (candidates, assets) or a single vector; ``mean_returns``
+    and ``cov_matrix`` are the annualized estimates from
+    ``calculate_risk_metrics``. All figures are daily except the drawdown,
+    which covers the whole history.
+    """
+    weights = _as_matrix(weights)
+    daily = portfolio_returns(log_returns(data), weights)
+    hist_var, hist_cvar = historical_var_cvar(daily, alpha)
+    param_var, param_cvar = parametric_var_cvar(weights, mean_returns, cov_matrix, alpha)
+    return {
+        "alpha": alpha,
+        "historical_var": hist_var,
+        "historical_cvar": hist_cvar,
+        "parametric_var": param_var,
+        "parametric_cvar": param_cvar,
+        "risk_contributions": risk_contributions(weights, cov_matrix),
+        "max_drawdown": max_drawdown(daily),
+        "momentum": momentum_scores(data, weights, lookback),
+        "momentum_days": momentum_days(data, lookback),
+    }
+
+def format_report(symbols, report, index=0):
+    """Response payload (percentages) for one candidate of an ``analyze`` report"""
+    pct = lambda key: round(float(report[key][index]) * 100, 2)
+    return {
+        'confidence': round(report["alpha"] * 100, 2),
+        'var': pct("historical_var"),
+        'cvar': pct("historical_cvar"),
+        'parametric_var': pct("parametric_var"),
+        'parametric_cvar': pct("parametric_cvar"),
+        'max_drawdown': pct("max_drawdown"),
+        'momentum': pct("momentum"),
+        'momentum_days': report["momentum_days"],
+        'risk_contributions': {
+            sym: round(float(c) * 100, 2) for sym, c in zip(symbols, report["risk_contributions"][index])
+        },
+    }
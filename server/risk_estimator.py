@@ -0,0 +1,216 @@
+import os
+import numpy as np
+
+TRADING_DAYS = 252
+STATS = ('sum', 'cross', 'sq_cross', 'sq_sq')
+
+class RiskEstimator:
+    """Incremental annualized returns and Ledoit-Wolf covariance from daily log returns.
+
+    Keeps the (optionally decayed) sufficient statistics of the log returns:
+    total weight, sums, cross-products and the square/cross fourth-moment
+    sums that the Ledoit-Wolf shrinkage intensity needs. Each new price bar
+    is an O(assets^2) update.
+
+    ``window`` keeps only the last ``window`` returns (the leaving row is
+    subtracted back out); ``decay`` instead multiplies all statistics by
+    ``decay`` per bar. With neither, the result matches ``LedoitWolf().fit``
+    over the full history.
+    """
+
+    def __init__(self, n_assets, window=None, decay=None):
+        if window and decay:
+            raise ValueError("Use either a rolling window or exponential decay, not both")
+        self.n_assets = n_assets
+        self.window = window
+        self.decay = decay
+        self.reset()
+
+    def reset(self):
+        n = self.n_assets
+        self.count = 0.0
+        self.count_sq = 0.0
+        self.n_obs = 0
+        self.sum = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.sq_cross = np.zeros((n, n))
+        self.sq_sq = np.zeros((n, n))
+        self.buffer = np.zeros((self.window, n)) if self.window else None
+        self.last_prices = None
+        self.last_date = None
+        self.columns = None
+
+    def _accumulate(self, x, sign=1.0):
+        x2 = x * x
+        self.count += sign
+        self.count_sq += sign
+        self.sum += sign * x
+        self.cross += sign * np.outer(x, x)
+        self.sq_cross += sign * np.outer(x2, x)
+        self.sq_sq += sign * np.outer(x2, x2)
+
+    def add_return(self, x):
+        """Fold in one day of log returns"""
+        if self.decay:
+            self.count *= self.decay
+            self.count_sq *= self.decay ** 2
+            for name in STATS:
+                getattr(self, name)[...] *= self.decay
+        if self.window:
+            slot = self.n_obs % self.window
+            if self.n_obs >= self.window:
+                self._accumulate(self.buffer[slot], -1.0)
+            self.buffer[slot] = x
+        self._accumulate(x)
+        self.n_obs += 1
+
+    def add_returns(self, returns):
+        """Fold in a block of log returns, in one shot when no window or decay applies"""
+        if self.window or self.decay:
+            for x in returns:
+                self.add_return(x)
+            return
+        squared = returns * returns
+        self.count += len(returns)
+        self.count_sq += len(returns)
+        self.n_obs += len(returns)
+        self.sum += returns.sum(axis=0)
+        self.cross += returns.T @ returns
+        self.sq_cross += squared.T @ returns
+        self.sq_sq += squared.T @ squared
+
+    def sync(self, data):
+        """Bring the statistics up to date with a close-price DataFrame.
+
+        Only rows after the last seen date are processed. If the history no
+        longer agrees with what was seen (a restated price, a different
+        universe), the state is rebuilt from scratch.
+        """
+        prices = data.values
+        start = 0
+        if self.last_date is not None:
+            known = data.index.get_indexer([self.last_date])[0]
+            if known >= 0 and np.allclose(prices[known], self.last_prices):
+                start = known
+            else:
+                self.reset()
+        block = prices[start:]
+        self.add_returns(np.log(block[1:] / block[:-1]))
+        self.last_prices = prices[-1].copy()
+        self.last_date = data.index[-1]
+        self.columns = list(data.columns)
+
+    def location(self):
+        return self.sum / self.count
+
+    def empirical_covariance(self):
+        m = self.location()
+        return self.cross / self.count - np.outer(m, m)
+
+    def shrinkage(self):
+        """Ledoit-Wolf shrinkage intensity re-derived from the stored statistics"""
+        n, w = self.n_assets, self.count
+        # Effective sample size; equals the count unless returns are decayed
+        n_eff = w ** 2 / self.count_sq
+        m = self.location()
+        diag = np.diag(self.cross)
+        emp_cov = self.empirical_covariance()
+
+        # Sum over samples of (x_j - m_j)^2 (x_k - m_k)^2, expanded in raw moments
+        centered_sq_sq = (
+            self.sq_sq
+            - 2 * self.sq_cross * m[None, :]
+            - 2 * self.sq_cross.T * m[:, None]
+            + diag[:, None] * (m ** 2)[None, :]
+            + (m ** 2)[:, None] * diag[None, :]
+            + 4 * np.outer(m, m) * self.cross
+            - 2 * np.outer(self.sum * m, m ** 2)
+            - 2 * np.outer(m ** 2, self.sum * m)
+            + w * np.outer(m ** 2, m ** 2)
+        )
+
+        trace = np.diag(emp_cov)
+        mu = trace.sum() / n
+        delta_ = np.sum(emp_cov ** 2)
+        beta = (centered_sq_sq.sum() / w - delta_) / (n * n_eff)
+        delta = (delta_ - 2.0 * mu * trace.sum() + n * mu ** 2) / n
+        beta = min(beta, delta)
+        return 0.0 if beta == 0 else beta / delta
+
+    def covariance(self):
+        """Shrunk covariance of daily log returns"""
+        emp_cov = self.empirical_covariance()
+        shrinkage = self.shrinkage()
+        mu = np.trace(emp_cov) / self.n_assets
+        shrunk = (1.0 - shrinkage) * emp_cov
+        shrunk.flat[::self.n_assets + 1] += shrinkage * mu
+        return shrunk
+
+    def risk_metrics(self):
+        """Same outputs as ``calculate_risk_metrics``: annualized returns and covariance"""
+        mean_returns = np.exp(self.location() * TRADING_DAYS) - 1
+        return mean_returns, self.covariance() * TRADING_DAYS
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            n_assets=self.n_assets,
+            columns=np.array(self.columns),
+            window=self.window or 0,
+            decay=self.decay or 0.0,
+            count=self.count,
+            count_sq=self.count_sq,
+            n_obs=self.n_obs,
+            buffer=self.buffer if self.window else np.zeros((0, self.n_assets)),
+            last_prices=self.last_prices,
+            last_date=np.datetime64(self.last_date, 'ns'),
+            **{name: getattr(self, name) for name in STATS},
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            estimator = cls(int(f['n_assets']), int(f['window']) or None, float(f['decay']) or None)
+            estimator.count = float(f['count'])
+            estimator.count_sq = float(f['count_sq'])
+            estimator.n_obs = int(f['n_obs'])
+            if estimator.window:
+                estimator.buffer = f['buffer'].copy()
+            for name in STATS:
+                setattr(estimator, name, f[name].copy())
+            estimator.last_prices = f['last_prices'].copy()
+            estimator.last_date = f['last_date'][()]
+            estimator.columns = f['columns'].tolist()
+        return estimator
+
+def estimator_settings():
+    """(window, decay) from ``RISK_WINDOW`` (trading days) and ``RISK_DECAY``
+    (per-day weight factor), each None when unset"""
+    window = int(os.environ.get("RISK_WINDOW") or 0) or None
+    decay = float(os.environ.get("RISK_DECAY") or 0) or None
+    if window is not None and window < 2:
+        raise ValueError("RISK_WINDOW must be at least 2 days")
+    if decay is not None and not 0 < decay < 1:
+        raise ValueError("RISK_DECAY must be between 0 and 1")
+    return window, decay
+
+def windowed_risk_metrics(data, window=None, decay=None):
+    """Risk metrics over ``data`` with a rolling window or exponential decay, without persisted state"""
+    estimator = RiskEstimator(data.shape[1], window, decay)
+    estimator.sync(data)
+    return estimator.risk_metrics()
+
+def incremental_risk_metrics(data, path, window=None, decay=None):
+    """Risk metrics from persisted estimator state at ``path``, updated with any new rows in ``data``"""
+    estimator = None
+    if os.path.exists(path):
+        estimator = RiskEstimator.load(path)
+        if (estimator.columns, estimator.window, estimator.decay) != (list(data.columns), window, decay):
+            estimator = None
+    if estimator is None:
+        estimator = RiskEstimator(data.shape[1], window, decay)
+    estimator.sync(data)
+    estimator.save(path)
+    return estimator.risk_metrics()
@@ -0,0 +1,58 @@
+import numpy as np
+
+from shared_prices import log_returns
+
+TRADING_DAYS = 252
+DEFAULT_FACTORS = 20
+
+class FactorModel:
+    """Covariance ``B B' + diag(specific)`` from a few statistical factors.
+
+    Storage and QP size grow with ``n_assets * n_factors`` instead of
+    ``n_assets ** 2``, which keeps universes of thousands of funds tractable.
+    """
+
+    def __init__(self, loadings, specific):
+        self.loadings = loadings
+        self.specific = specific
+
+    @property
+    def n_factors(self):
+        return self.loadings.shape[1]
+
+    def diag(self):
+        return np.einsum('ik,ik->i', self.loadings, self.loadings) + self.specific
+
+    def variance(self, weights):
+        exposure = self.loadings.T @ weights
+        return float(exposure @ exposure + (self.specific * weights) @ weights)
+
+    def covariance(self):
+        """Dense matrix, for small universes and checks only"""
+        return self.loadings @ self.loadings.T + np.diag(self.specific)
+
+def fit_factor_model(returns, n_factors=DEFAULT_FACTORS, annualize=TRADING_DAYS):
+    """Principal-component factor model of a (days, assets) return array.
+
+    The top ``n_factors`` components explain the common variance; what is
+    left of each asset's sample variance becomes its specific variance.
+    """
+    returns = np.asarray(returns)
+    n_days, n_assets = returns.shape
+    n_factors = max(1, min(n_factors, n_assets - 1, n_days - 1))
+    centered = returns - returns.mean(axis=0)
+    _, singular, vt = np.linalg.svd(centered, full_matrices=False)
+    scale = np.sqrt(annualize / (n_days - 1))
+    loadings = vt[:n_factors].T * (singular[:n_factors] * scale)
+
+    total = centered.var(axis=0, ddof=1) * annualize
+    common = np.einsum('ik,ik->i', loadings, loadings)
+    # Floor keeps the quadratic term strictly convex even for near-duplicate funds
+    specific = np.maximum(total - common, 1e-4 * total.mean())
+    return FactorModel(loadings, specific)
+
+def factor_risk_metrics(data, n_factors=DEFAULT_FACTORS):
+    """Annualized geometric mean returns and a factor covariance model for ``data``"""
+    returns = log_returns(data)
+    mean_returns = np.exp(returns.mean(axis=0) * TRADING_DAYS) - 1
+    return mean_returns, fit_factor_model(returns, n_factors)
@@ -2,7 +2,13 @@ import type { Express } from "express";
 import { createServer, type Server } from "http";
 import { setupAuth } from "./auth";
 import { storage } from "./storage";
-import { spawn } from "child_process"; // <-- Added import
+import { spawn } from "child_process";
+import fs from "fs";
+import path from "path";
+import { getOptimizerPool } from "./optimizerPool";
+
+// Same directory frontier_chart.py renders into
+const CHART_DIR = path.resolve(process.env.CHART_DIR || "server/data/charts");
 
 export function registerRoutes(app: Express): Server {
   // Set up authentication routes (/api/register, /api/login, /api/logout, /api/user)
@@ -60,51 +66,113 @@ export function registerRoutes(app: Express): Server {
 
     try {
       const { riskLevel, timeFrame } = req.body;
-      // Use the imported spawn instead of require
-      const python = spawn("python3", [
-        "server/portfolio_optimizer.py",
-        riskLevel,
-        timeFrame,
-      ]);
+      const optimizedResult = await getOptimizerPool().optimize(riskLevel, timeFrame);
+      res.json(optimizedResult);
+    } catch (error: any) {
+      console.error("Portfolio optimization failed:", error);
+      res.status(422).json({
+        message: "Portfolio optimization failed",
+        details: error.toString(),
+      });
+    }
+  });
 
-      let result = "";
-      let errorOutput = "";
+  app.post("/api/optimize-batch", (req, res) => {
+    if (!req.isAuthenticated()) return res.sendStatus(401);
 
-      python.stdout.on("data", (data: Buffer) => {
-        result += data.toString();
-      });
+    const profiles = Array.isArray(req.body?.profiles) ? req.body.profiles : null;
+    if (!profiles) {
+      return res.status(400).json({ message: "profiles must be an array" });
+    }
 
-      python.stderr.on("data", (data: Buffer) => {
-        errorOutput += data.toString();
+    // Results are streamed back as JSON lines in completion order
+    const python = spawn("python3", ["server/batch_optimizer.py"]);
+    res.type("application/x-ndjson");
+    python.stdout.pipe(res);
+
+    python.stderr.on("data", (data: Buffer) => {
+      console.error("Batch optimizer:", data.toString());
+    });
+
+    python.on("error", (error) => {
+      console.error("Failed to start batch optimizer:", error);
+      res.end();
+    });
+
+    // The request body is consumed long before the response ends, so only a
+    // client that disconnects mid-stream should stop the batch
+    res.on("close", () => {
+      if (!res.writableFinished) python.kill();
+    });
+
+    python.stdin.on("error", (error) => {
+      console.error("Batch optimizer input closed:", error);
+    });
+
+    for (const profile of profiles) {
+      python.stdin.write(
+        JSON.stringify({
+          client_id: profile.clientId,
+          risk_aversion: profile.riskLevel,
+          time_period: profile.timeFrame,
+        }) + "\n",
+      );
+    }
+    python.stdin.end();
+  });
+
+  app.get("/api/efficient-frontier", async (req, res) => {
+    if (!req.isAuthenticated()) return res.sendStatus(401);
+
+    try {
+      const points = Number(req.query.points) || 50;
+      const frontier = await getOptimizerPool().frontier(points);
+      if (frontier.error) {
+        return res.status(422).json({ message: "Frontier calculation failed", details: frontier.error });
+      }
+      res.json(frontier);
+    } catch (error: any) {
+      console.error("Frontier calculation failed:", error);
+      res.status(422).json({
+        message: "Frontier calculation failed",
+        details: error.toString(),
       });
+    }
+  });
+
+  app.get("/api/charts/:id", (req, res) => {
+    if (!req.isAuthenticated()) return res.sendStatus(401);
+
+    const { id } = req.params;
+    if (!/^[0-9a-f]{24}$/.test(id)) return res.sendStatus(404);
 
+    const sendChart = (file: string) => {
+      res.set("Cache-Control", "public, max-age=31536000, immutable");
+      res.sendFile(file);
+    };
+
+    // Charts are content-addressed, so a rendered PNG is served as is;
+    // Python only runs to render one on its first fetch
+    const pngPath = path.join(CHART_DIR, `${id}.png`);
+    fs.access(pngPath, fs.constants.R_OK, (missing) => {
+      if (!missing) return sendChart(pngPath);
+
+      const python = spawn("python3", ["server/frontier_chart.py", id]);
+      let output = "";
+      python.stdout.on("data", (data: Buffer) => {
+        output += data.toString();
+      });
       python.on("close", (code: number) => {
-        console.log("Raw Python output:", result);
-        if (code !== 0) {
-          console.error("Python script error:", errorOutput);
-          return res.status(422).json({
-            message: "Portfolio optimization failed",
-            details: errorOutput || "Unknown error occurred",
-          });
-        }
         try {
-          const optimizedResult = JSON.parse(result);
-          res.json(optimizedResult);
-        } catch (parseError) {
-          console.error("Failed to parse Python output:", parseError);
-          return res.status(500).json({
-            message: "Invalid response format from optimizer",
-            details: result,
-          });
+          const rendered = JSON.parse(output);
+          if (code !== 0 || !rendered.path) return res.status(404).json({ message: rendered.error });
+          sendChart(rendered.path);
+        } catch (error) {
+          console.error("Chart rendering failed:", output);
+          res.status(500).json({ message: "Chart rendering failed" });
         }
       });
-    } catch (error: any) {
-      console.error("Server error during optimization:", error);
-      res.status(500).json({
-        message: "Failed to optimize portfolio",
-        details: error.toString(),
-      });
-    }
+    });
   });
 
   const httpServer = createServer(app);
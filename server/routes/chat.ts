@@ -1,6 +1,6 @@
 import { Router } from 'express';
-import { spawn } from 'child_process';
 import { readdir, readFile } from 'fs/promises';
+import { PythonWorkerPool } from '../optimizerPool';
 import path from 'path';
 import { fileURLToPath } from 'url';
 import { dirname } from 'path';
@@ -9,34 +9,22 @@ const router = Router();
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
 
-async function processChat(message: string, selectedContent?: string): Promise<string> {
-  return new Promise((resolve, reject) => {
-    const pythonProcess = spawn('python3', [
-      path.join(__dirname, '../chat_processor.py')
-    ]);
-
-    let result = '';
-    let error = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      error += data.toString();
-    });
+let chatPool: PythonWorkerPool | undefined;
 
-    pythonProcess.stdin.write(JSON.stringify({ message, selectedContent }) + '\n');
-    pythonProcess.stdin.end();
-
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        reject(new Error(`Python process exited with code ${code}: ${error}`));
-      } else {
-        resolve(result.trim());
-      }
-    });
-  });
+// A resident chat_processor.py keeps its knowledge-base index loaded across messages
+async function processChat(message: string, selectedContent?: string): Promise<string> {
+  if (!chatPool) {
+    chatPool = new PythonWorkerPool(
+      path.join(__dirname, '../chat_processor.py'),
+      Number(process.env.CHAT_WORKERS) || 1,
+      Number(process.env.CHAT_TIMEOUT_MS) || 10000
+    );
+  }
+  const result = await chatPool.request({ message, selectedContent });
+  if (result.error) {
+    throw new Error(result.error);
+  }
+  return result.response;
 }
 
 router.post('/chat', async (req, res) => {
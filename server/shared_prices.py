@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+import timing
+from price_store import snapshot_id
+
+DEFAULT_MATRIX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "matrices")
+MAGIC = b"PRCMTX01"
+ALIGN = 64
+
+class PriceMatrix:
+    """Read-only, memory-mapped close matrix and its log returns.
+
+    File layout: magic, header length, JSON header (snapshot, store version,
+    symbols, rows) padded to 64 bytes, then int64 dates, the float64 close matrix
+    and the float64 log-return matrix. Every process that opens the file
+    shares the same page-cache pages instead of holding its own copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._map[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a price matrix file")
+        header_len = int(self._map[8:16].view("<u8")[0])
+        header = json.loads(bytes(self._map[16:16 + header_len]))
+        self.snapshot = header["snapshot"]
+        self.store_version = header.get("store_version")
+        self.symbols = header["symbols"]
+        rows, cols = header["rows"], len(self.symbols)
+
+        offset = 16 + _padded(header_len)
+        self.dates = self._view(offset, "<i8", (rows,))
+        offset += rows * 8
+        self.closes = self._view(offset, "<f8", (rows, cols))
+        offset += rows * cols * 8
+        self.log_returns = self._view(offset, "<f8", (rows - 1, cols))
+
+    def _view(self, offset, dtype, shape):
+        size = int(np.prod(shape)) * 8
+        return self._map[offset:offset + size].view(dtype).reshape(shape)
+
+    def frame(self):
+        """Close matrix as a DataFrame backed by the mapping"""
+        return pd.DataFrame(
+            self.closes, index=pd.DatetimeIndex(self.dates.view("datetime64[ns]")),
+            columns=self.symbols, copy=False
+        )
+
+    def rows_of(self, values):
+        """(first, last) rows of ``closes`` that ``values`` is a view of, or None"""
+        closes = self.closes
+        if values.shape[1:] != closes.shape[1:] or values.strides != closes.strides:
+            return None
+        offset = values.__array_interface__["data"][0] - closes.__array_interface__["data"][0]
+        first, rest = divmod(offset, closes.strides[0])
+        if rest or first < 0 or first + len(values) > len(closes):
+            return None
+        return first, first + len(values)
+
+def _padded(size):
+    return -(-size // ALIGN) * ALIGN
+
+def publish(path, data, snapshot, store_version=None):
+    """Write ``data`` and its log returns to ``path``, replacing any previous file atomically"""
+    closes = np.ascontiguousarray(data.values, dtype="<f8")
+    header = json.dumps({
+        "snapshot": snapshot,
+        "store_version": store_version,
+        "symbols": [str(sym) for sym in data.columns],
+        "rows": len(closes),
+    }).encode()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([len(header)], dtype="<u8").tobytes())
+        f.write(header.ljust(_padded(len(header)), b" "))
+        f.write(data.index.values.astype("datetime64[ns]").astype("<i8").tobytes())
+        f.write(closes.tobytes())
+        f.write(np.log(closes[1:] / closes[:-1]).tobytes())
+    os.replace(tmp_path, path)
+
+_matrices = {}
+
+def open_matrix(path):
+    """Process-wide mapping of ``path``, remapped when the file has been republished"""
+    stat = os.stat(path)
+    version = (stat.st_ino, stat.st_mtime_ns)
+    cached = _matrices.get(path)
+    if cached is None or cached[0] != version:
+        cached = _matrices[path] = (version, PriceMatrix(path))
+    return cached[1]
+
+def matrix_path(store_path, symbols, start, end, directory=None):
+    directory = directory or os.environ.get("SHARED_PRICES_DIR", DEFAULT_MATRIX_DIR)
+    if store_path != ":memory:":
+        store_path = os.path.abspath(store_path)
+    key = hashlib.sha256("\x1f".join([store_path, *symbols, start, end]).encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{key}.prices")
+
+def shared_close_matrix(store, symbols, start, end, directory=None):
+    """Published matrix for ``symbols`` over [start, end) from ``store``.
+
+    The file is keyed by the store's path and records the store version it
+    was built from, so it is republished after any write to the store, not
+    only after a refresh. In-memory stores are private to one process and
+    are never published.
+    """
+    if store.path == ":memory:":
+        return None
+    path = matrix_path(store.path, symbols, start, end, directory)
+    if os.path.exists(path) and not store.missing_ranges(symbols, start, end):
+        matrix = open_matrix(path)
+        if matrix.store_version == store.version():
+            timing.count("shared_prices_hit")
+            return matrix
+    timing.count("shared_prices_miss")
+    store.refresh(symbols, start, end)
+    # Read the version before the prices so a concurrent write can only make the file look older
+    version = store.version()
+    data = store.get_close_matrix(symbols, start, end)
+    if data.empty:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    publish(path, data, snapshot_id(data), version)
+    return open_matrix(path)
+
+def log_returns(data):
+    """Daily log returns of a close matrix as an array.
+
+    A frame backed by a published matrix (or a row slice of one) gets a
+    read-only view of the precomputed returns; anything else is computed.
+    """
+    values = data.values
+    for _, matrix in _matrices.values():
+        rows = matrix.rows_of(values)
+        if rows is not None:
+            return matrix.log_returns[rows[0]:rows[1] - 1]
+    return np.log(data / data.shift(1)).dropna().values
@@ -0,0 +1,91 @@
+import os
+import time
+import cProfile
+from contextlib import contextmanager
+
+class RequestTiming:
+    """Wall and CPU time per pipeline stage, counters and solver stats for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.solver = []
+
+    def add_stage(self, name, wall, cpu):
+        stage = self.stages.setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0, "calls": 0})
+        stage["wall_ms"] += wall * 1000
+        stage["cpu_ms"] += cpu * 1000
+        stage["calls"] += 1
+
+    def as_dict(self):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": {
+                name: {"wall_ms": round(s["wall_ms"], 3), "cpu_ms": round(s["cpu_ms"], 3), "calls": s["calls"]}
+                for name, s in self.stages.items()
+            },
+            "counters": dict(self.counters),
+            "solver": self.solver,
+        }
+
+# Workers handle one request at a time, so a single current record suffices
+_current = None
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as ``name`` on the current request, if any"""
+    if _current is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        _current.add_stage(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+def count(name, n=1):
+    """Bump a counter such as ``problem_cache_hit`` on the current request"""
+    if _current is not None:
+        _current.counters[name] = _current.counters.get(name, 0) + n
+
+def record_solve(problem):
+    """Keep compile time, solve time and iterations of a solved CVXPY problem"""
+    if _current is None:
+        return
+    stats = problem.solver_stats
+    _current.solver.append({
+        "solver": stats.solver_name,
+        "iterations": stats.num_iters,
+        "compile_ms": round((problem.compilation_time or 0.0) * 1000, 3),
+        "solve_ms": round((stats.solve_time or 0.0) * 1000, 3),
+        "status": problem.status,
+    })
+
+_profiles = 0
+
+@contextmanager
+def request(profile_dir=None, label="request"):
+    """Collect timings for the enclosed request.
+
+    With ``profile_dir`` the request also runs under cProfile and the stats
+    are written to ``<profile_dir>/<pid>-<n>-<label>.prof`` (readable with
+    pstats, snakeviz or any other cProfile viewer); the path is recorded in
+    the timing output.
+    """
+    global _current, _profiles
+    timing = _current = RequestTiming()
+    profiler = cProfile.Profile() if profile_dir else None
+    try:
+        if profiler:
+            profiler.enable()
+        yield timing
+    finally:
+        if profiler:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            _profiles += 1
+            path = os.path.join(profile_dir, f"{os.getpid()}-{_profiles}-{label}.prof")
+            profiler.dump_stats(path)
+            timing.counters["profile"] = path
+        _current = None
@@ -0,0 +1,57 @@
+import os
+import json
+import numpy as np
+
+# Asset classes that count towards the horizon-driven safe allocation
+SAFE_CLASSES = {"debt", "liquid", "gilt", "money_market", "overnight"}
+
+class Universe:
+    """Fund schemes to optimize over, optionally tagged with asset classes.
+
+    When no fund carries a tag, the two lowest-volatility funds stand in as
+    the safe assets, as the original six-fund optimizer did.
+    """
+
+    def __init__(self, symbols, asset_classes=None):
+        self.symbols = list(symbols)
+        self.asset_classes = list(asset_classes) if asset_classes else [None] * len(self.symbols)
+        if len(self.asset_classes) != len(self.symbols):
+            raise ValueError("Need one asset class per symbol")
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def tagged(self):
+        return any(self.asset_classes)
+
+    @classmethod
+    def from_file(cls, path):
+        """Load ``[{"symbol": ..., "asset_class": ...}, ...]`` from a JSON file"""
+        with open(path) as f:
+            funds = json.load(f)
+        return cls([fund["symbol"] for fund in funds], [fund.get("asset_class") for fund in funds])
+
+    def subset(self, symbols):
+        """Universe restricted to ``symbols``, in that order"""
+        classes = dict(zip(self.symbols, self.asset_classes))
+        return Universe(symbols, [classes[sym] for sym in symbols])
+
+    def safe_assets(self):
+        """Indices of the funds tagged with a safe asset class"""
+        return np.array([
+            i for i, asset_class in enumerate(self.asset_classes)
+            if asset_class and asset_class.lower() in SAFE_CLASSES
+        ], dtype=int)
+
+_universe = None
+
+def default_universe(symbols):
+    """Universe from the ``FUND_UNIVERSE`` file, or ``symbols`` untagged"""
+    global _universe
+    path = os.environ.get("FUND_UNIVERSE")
+    if not path:
+        return Universe(symbols)
+    if _universe is None or _universe[0] != path:
+        _universe = (path, Universe.from_file(path))
+    return _universe[1]
@@ -0,0 +1,281 @@
+import io
+import datetime
+import numpy as np
+import pandas as pd
+
+import timing
+from database import connection
+
+EPOCH = datetime.date(1970, 1, 1)
+OUTFLOW_TYPES = ("BUY", "SIP")
+UNIT_EPSILON = 1e-9
+
+def _day_number(date):
+    return (pd.Timestamp(date).date() - EPOCH).days
+
+def _group_starts(keys):
+    """Start offsets and lengths of the runs of equal values in sorted ``keys``"""
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    return starts, counts
+
+def _segment_cumsum(values, starts, counts):
+    totals = np.cumsum(values)
+    return totals - np.repeat(totals[starts] - values[starts], counts)
+
+class Ledger:
+    """Transactions as columnar arrays, sorted by (fund_id, day).
+
+    ``units`` are signed (sales negative) and ``flows`` are the investor's
+    cash flows (purchases negative, sale proceeds positive). ``days`` count
+    days since 1970-01-01.
+    """
+
+    def __init__(self, client_id, fund_id, units, flows, days):
+        order = np.lexsort((days, fund_id))
+        self.client_id = np.asarray(client_id, dtype=np.int64)[order]
+        self.fund_id = np.asarray(fund_id, dtype=np.int64)[order]
+        self.units = np.asarray(units, dtype=float)[order]
+        self.flows = np.asarray(flows, dtype=float)[order]
+        self.days = np.asarray(days, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.fund_id)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Ledger from rows shaped like the ``transactions`` table joined to the fund's client_id.
+
+        Rows for holdings not assigned to a client are left out.
+        """
+        frame = frame[frame["client_id"].notna()]
+        inflow = ~frame["type"].str.upper().isin(OUTFLOW_TYPES).to_numpy()
+        units = frame["units"].to_numpy(dtype=float)
+        amount = frame["amount"].to_numpy(dtype=float)
+        days = (pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]").astype(np.int64))
+        return cls(
+            frame["client_id"].to_numpy(), frame["fund_id"].to_numpy(),
+            np.where(inflow, -units, units), np.where(inflow, amount, -amount), days,
+        )
+
+    def append(self, other):
+        return Ledger(
+            *(np.concatenate([getattr(self, col), getattr(other, col)])
+              for col in ("client_id", "fund_id", "units", "flows", "days"))
+        )
+
+    def select(self, mask):
+        ledger = Ledger.__new__(Ledger)
+        for col in ("client_id", "fund_id", "units", "flows", "days"):
+            setattr(ledger, col, getattr(self, col)[mask])
+        return ledger
+
+def _average_cost(ledger, starts, counts):
+    """Average-cost basis of every holding after its last transaction.
+
+    The basis follows ``cost = cost * units_after / units_before`` on a sale
+    and ``cost = cost + amount`` on a purchase. That recurrence is solved in
+    closed form per run of transactions since the holding was last fully
+    sold, so no per-transaction loop is needed.
+    """
+    after = _segment_cumsum(ledger.units, starts, counts)
+    before = after - ledger.units
+    sale = ledger.units < 0
+    ratio = np.ones(len(ledger))
+    np.divide(after, before, out=ratio, where=sale & (before > UNIT_EPSILON))
+    ratio = np.clip(ratio, 0, 1)
+    ratio[sale & (after <= UNIT_EPSILON)] = 0
+
+    # A full sale zeroes the basis; runs restart on the row after it
+    new_run = np.zeros(len(ledger), dtype=bool)
+    new_run[starts] = True
+    new_run[1:] |= ratio[:-1] == 0
+    run = np.cumsum(new_run) - 1
+    run_starts, run_counts = _group_starts(run)
+
+    log_ratio = np.log(np.where(ratio > 0, ratio, 1.0))
+    decay = _segment_cumsum(log_ratio, run_starts, run_counts)
+    run_end_decay = decay[run_starts + run_counts - 1]
+    contribution = np.maximum(-ledger.flows, 0) * np.exp(run_end_decay[run] - decay)
+
+    ends = starts + counts - 1
+    in_last_run = run == np.repeat(run[ends], counts)
+    holding = np.repeat(np.arange(len(starts)), counts)
+    cost = np.bincount(holding[in_last_run], contribution[in_last_run], minlength=len(starts))
+    cost[ratio[ends] == 0] = 0.0
+    return cost
+
+def xirr(groups, amounts, days, n_groups, guess=None, tol=1e-7, max_iter=100):
+    """Annualized internal rate of return of ``n_groups`` cash-flow series at once.
+
+    Flow ``i`` of ``amounts`` happens on day ``days[i]`` and belongs to
+    series ``groups[i]``. Each series is solved by Newton's method inside a
+    bisection bracket, so a bad step never leaves the bracket. Series without
+    a sign change in their net present value over the bracket get NaN.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=float)
+    first_day = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first_day, groups, days)
+    years = (days - first_day[groups]) / 365.0
+
+    def npv(rates, flows):
+        growth = np.log1p(rates)[groups[flows]]
+        discounted = amounts[flows] * np.exp(-years[flows] * growth)
+        value = np.bincount(groups[flows], discounted, minlength=n_groups)
+        slope = np.bincount(groups[flows], -years[flows] * discounted, minlength=n_groups) / (1 + rates)
+        return value, slope
+
+    all_flows = np.arange(len(amounts))
+    lo = np.full(n_groups, -0.9999)
+    hi = np.full(n_groups, 1000.0)
+    f_lo, _ = npv(lo, all_flows)
+    f_hi, _ = npv(hi, all_flows)
+    bracketed = np.sign(f_lo) * np.sign(f_hi) < 0
+
+    rates = np.full(n_groups, 0.1) if guess is None else np.nan_to_num(np.asarray(guess, dtype=float), nan=0.1)
+    rates = np.clip(rates, lo + 1e-6, hi - 1e-6)
+    result = np.full(n_groups, np.nan)
+    active = bracketed.copy()
+    flows = all_flows[active[groups]]
+    scale = np.bincount(groups, np.abs(amounts), minlength=n_groups)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        value, slope = npv(rates, flows)
+        below = np.sign(value) == np.sign(f_lo)
+        lo = np.where(active & below, rates, lo)
+        f_lo = np.where(active & below, value, f_lo)
+        hi = np.where(active & ~below, rates, hi)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = rates - value / slope
+        outside = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        step = np.where(outside, 0.5 * (lo + hi), step)
+
+        done = active & ((np.abs(step - rates) < tol * (1 + np.abs(rates))) | (np.abs(value) < tol * scale))
+        result[done] = step[done]
+        rates = np.where(active, step, rates)
+        if done.any():
+            active &= ~done
+            flows = flows[active[groups[flows]]]
+    return result
+
+def _valuations(ledger, navs, as_of, holding_guess=None, client_guess=None):
+    """Holdings and client summaries, as frames, for every holding in ``ledger``"""
+    starts, counts = _group_starts(ledger.fund_id)
+    fund_ids = ledger.fund_id[starts]
+    fund_clients = ledger.client_id[starts]
+    holding = np.repeat(np.arange(len(starts)), counts)
+
+    with timing.stage("holdings"):
+        units = np.add.reduceat(ledger.units, starts) if len(ledger) else np.zeros(0)
+        units[np.abs(units) < UNIT_EPSILON] = 0.0
+        cost = _average_cost(ledger, starts, counts) if len(ledger) else np.zeros(0)
+        nav = navs.reindex(fund_ids).to_numpy(dtype=float)
+        value = units * nav
+        invested = np.bincount(holding, np.maximum(-ledger.flows, 0), minlength=len(starts))
+        withdrawn = np.bincount(holding, np.maximum(ledger.flows, 0), minlength=len(starts))
+
+    clients, client_of_fund = np.unique(fund_clients, return_inverse=True)
+    held = np.isfinite(value) & (value > 0)
+    terminal = np.flatnonzero(held)
+    flow_holding = np.r_[holding, terminal]
+    flow_amounts = np.r_[ledger.flows, value[terminal]]
+    flow_days = np.r_[ledger.days, np.full(len(terminal), _day_number(as_of))]
+
+    with timing.stage("xirr"):
+        holding_xirr = xirr(flow_holding, flow_amounts, flow_days, len(starts), holding_guess)
+        client_xirr = xirr(client_of_fund[flow_holding], flow_amounts, flow_days, len(clients), client_guess)
+
+    holdings = pd.DataFrame({
+        "client_id": fund_clients,
+        "units": units,
+        "nav": nav,
+        "value": value,
+        "cost_basis": cost,
+        "unrealized_gain": value - cost,
+        "invested": invested,
+        "withdrawn": withdrawn,
+        "xirr": holding_xirr,
+    }, index=pd.Index(fund_ids, name="fund_id"))
+    summary = holdings.groupby("client_id")[["value", "cost_basis", "unrealized_gain", "invested", "withdrawn"]].sum()
+    summary["xirr"] = pd.Series(client_xirr, index=clients)
+    return holdings, summary
+
+class Valuation:
+    """Holdings, gains and XIRR for every client, kept current incrementally.
+
+    ``navs`` is a Series of current NAV indexed by fund_id (a holding row of
+    the ``funds`` table). New transactions and NAV changes only recompute
+    the affected clients, warm-starting their XIRR from the previous answer.
+    """
+
+    def __init__(self, ledger, navs, as_of=None):
+        self.ledger = ledger
+        self.navs = navs.astype(float)
+        self.as_of = as_of or datetime.date.today()
+        self.holdings, self.clients = _valuations(ledger, self.navs, self.as_of)
+
+    def _recompute(self, client_ids):
+        client_ids = np.unique(np.asarray(client_ids, dtype=np.int64))
+        if len(client_ids) == 0:
+            return 0
+        ledger = self.ledger.select(np.isin(self.ledger.client_id, client_ids))
+        fund_ids = np.unique(ledger.fund_id)
+        holdings, clients = _valuations(
+            ledger, self.navs, self.as_of,
+            self.holdings["xirr"].reindex(fund_ids).to_numpy(),
+            self.clients["xirr"].reindex(np.unique(ledger.client_id)).to_numpy(),
+        )
+        keep_holdings = ~self.holdings["client_id"].isin(client_ids)
+        self.holdings = pd.concat([self.holdings[keep_holdings], holdings]).sort_index()
+        self.clients = pd.concat([self.clients[~self.clients.index.isin(client_ids)], clients]).sort_index()
+        return len(client_ids)
+
+    def add_transactions(self, ledger):
+        """Fold in new transactions; returns the number of clients recomputed"""
+        self.ledger = self.ledger.append(ledger)
+        return self._recompute(ledger.client_id)
+
+    def update_navs(self, navs):
+        """Apply new NAVs (Series by fund_id); returns the number of clients recomputed"""
+        navs = navs.astype(float)
+        changed = navs[navs.ne(self.navs.reindex(navs.index))]
+        self.navs = pd.concat([self.navs[~self.navs.index.isin(changed.index)], changed])
+        affected = self.holdings["client_id"].reindex(changed.index).dropna()
+        return self._recompute(affected.to_numpy())
+
+def _copy_frame(cursor, query):
+    buffer = io.StringIO()
+    cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+def load_ledger(dsn=None, since_id=None):
+    """Transactions joined to their client, read in bulk with COPY.
+
+    With ``since_id`` only transactions with a larger id are read, for
+    feeding ``Valuation.add_transactions``. Returns the ledger and the
+    largest transaction id seen.
+    """
+    # Holdings without a client (funds.client_id is nullable) have no one to value them for
+    where = "WHERE f.client_id IS NOT NULL"
+    if since_id is not None:
+        where += f" AND t.id > {int(since_id)}"
+    with connection(dsn) as conn, conn.cursor() as cursor:
+        frame = _copy_frame(cursor, f"""
+            SELECT t.id, f.client_id, t.fund_id, t.type, t.units, t.amount, t.date
+            FROM transactions t JOIN funds f ON f.id = t.fund_id {where}
+        """)
+    last_id = int(frame["id"].max()) if len(frame) else since_id
+    return Ledger.from_frame(frame), last_id
+
+def load_navs(dsn=None):
+    """Current NAV of every holding, as a Series indexed by fund_id"""
+    with connection(dsn) as conn, conn.cursor() as cursor:
+        frame = _copy_frame(cursor, "SELECT id AS fund_id, current_nav FROM funds")
+    return frame.set_index("fund_id")["current_nav"]
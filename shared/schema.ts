@@ -25,6 +25,7 @@ export const funds = pgTable("funds", {
   id: serial("id").primaryKey(),
   clientId: integer("client_id").references(() => clients.id),
   fundName: text("fund_name").notNull(),
+  schemeCode: text("scheme_code"),
   units: decimal("units").notNull(),
   currentNav: decimal("current_nav").notNull(),
   investedAmount: decimal("invested_amount").notNull(),